@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def drain_image_pipeline():
+    """Дожидается фоновой подготовки миниатюр после каждого запроса.
+
+    Иначе поток пула пишет в базу и MEDIA_ROOT одновременно с тестом.
+    """
+    from django.core.signals import request_finished
+    from posts import images
+
+    def drain(**kwargs):
+        images.wait()
+
+    request_finished.connect(drain)
+    yield
+    request_finished.disconnect(drain)
+    images.wait()
@@ -0,0 +1,6 @@
+"""JSON API постов, групп, комментариев и подписок.
+
+Списки отдаются курсорными страницами, ?fields= задаёт набор полей.
+Строки читаются через values() без создания объектов моделей.
+Авторизация — сессией сайта, изменения защищены CSRF, как и формы.
+"""
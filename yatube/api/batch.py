@@ -0,0 +1,67 @@
+"""Чтение многих постов по id за постоянное число запросов.
+
+Каждый пост кэшируется отдельно под ключом с поколением его области
+cache_keys.post: сохранение поста, комментарии и готовые миниатюры
+повышают поколение, и старая запись просто перестаёт читаться.
+Переименование автора или группы поколение поста не меняет, такие
+записи обновляются по истечении CACHE_TTL['api_post'].
+"""
+from django.core.cache import cache
+
+from core.cache import get_ttl
+from posts import cache_keys, images
+from posts.models import Post
+
+from .serializers import POST_FIELDS, select, serialize
+
+MAX_IDS = 100
+CACHE_FAMILY = 'api_post'
+BATCH_FIELDS = {**POST_FIELDS, 'thumbnail': None}
+
+
+def _key(post_id, generation):
+    return f'api:post:{post_id}:{generation}'
+
+
+def _load(post_ids):
+    """Данные постов из базы: один запрос к постам и один к миниатюрам."""
+    names = list(POST_FIELDS)
+    rows = {
+        row['pk']: row
+        for row in select(
+            Post.objects.filter(pk__in=post_ids), POST_FIELDS, names
+        )
+    }
+    thumbnails = images.resolve_image_names(
+        {post_id: row['image'] for post_id, row in rows.items()}
+    )
+    loaded = {}
+    for post_id, row in rows.items():
+        data = serialize(row, POST_FIELDS, names)
+        data['thumbnail'] = thumbnails.get(post_id)
+        loaded[post_id] = data
+    return loaded
+
+
+def fetch_posts(post_ids):
+    """{id: данные} существующих постов из post_ids."""
+    generations = cache_keys.get_generations(
+        *(cache_keys.post(post_id) for post_id in post_ids)
+    )
+    keys = {
+        post_id: _key(post_id, generation)
+        for post_id, generation in zip(post_ids, generations)
+    }
+    found = cache.get_many(keys.values())
+    posts = {
+        post_id: found[key] for post_id, key in keys.items() if key in found
+    }
+    missing = [post_id for post_id in post_ids if post_id not in posts]
+    if missing:
+        loaded = _load(missing)
+        cache.set_many(
+            {keys[post_id]: data for post_id, data in loaded.items()},
+            get_ttl(CACHE_FAMILY)
+        )
+        posts.update(loaded)
+    return posts
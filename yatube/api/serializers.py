@@ -0,0 +1,133 @@
+"""Поля ресурсов API и их чтение через values().
+
+Каждый ресурс описан словарём «поле API → путь в ORM». Запрос выбирает
+только нужные столбцы (и связанные таблицы — join в том же запросе),
+а строка превращается в ответ переименованием ключей.
+"""
+from django.core.files.storage import default_storage
+
+from core.paginator import CursorPaginator
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+POST_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+FEED_FIELDS = {
+    'id': 'post_id',
+    'text': 'post__text',
+    'pub_date': 'pub_date',
+    'author': 'post__author__username',
+    'group': 'post__group__slug',
+    'image': 'post__image',
+    'comments_count': 'post__comments_count',
+}
+COMMENT_FIELDS = {
+    'id': 'pk',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+GROUP_FIELDS = {
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+    'posts_count': 'posts_count',
+}
+
+
+def _image_url(name):
+    return default_storage.url(name) if name else None
+
+
+CONVERTERS = {
+    'image': _image_url,
+}
+
+
+class ApiError(Exception):
+    """Ошибка запроса, которую нужно вернуть клиенту с кодом status."""
+
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def parse_fields(request, available):
+    """Поля из ?fields=a,b; без параметра — все поля ресурса."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(available)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ApiError(400, f'Неизвестные поля: {", ".join(unknown)}')
+    return names
+
+
+def parse_limit(request):
+    raw = request.GET.get('limit')
+    if raw is None:
+        return PAGE_SIZE
+    try:
+        limit = int(raw)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ApiError(400, f'limit должен быть от 1 до {MAX_PAGE_SIZE}')
+    return limit
+
+
+def select(queryset, available, names, *extra):
+    """values() только с нужными столбцами и служебными extra."""
+    lookups = {available[name] for name in names}
+    lookups.update(extra)
+    return queryset.values(*lookups)
+
+
+def serialize(row, available, names):
+    result = {}
+    for name in names:
+        value = row[available[name]]
+        converter = CONVERTERS.get(name)
+        result[name] = converter(value) if converter else value
+    return result
+
+
+def _page_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return f'{request.path}?{params.urlencode()}'
+
+
+def paginate(request, queryset, available, key='pub_date'):
+    """Курсорная страница ресурса: results, next и previous."""
+    names = parse_fields(request, available)
+    paginator = CursorPaginator(
+        select(queryset, available, names, 'pk', key),
+        parse_limit(request), key=key
+    )
+    page = paginator.get_cursor_page(request.GET.get('cursor'))
+    return {
+        'results': [serialize(row, available, names) for row in page],
+        'next': _page_url(request, page.next_cursor),
+        'previous': _page_url(request, page.previous_cursor),
+    }
+
+
+def detail(queryset, available, names=None):
+    """Один объект ресурса или None."""
+    names = names or list(available)
+    row = select(queryset, available, names).first()
+    return None if row is None else serialize(row, available, names)
@@ -0,0 +1,224 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.queries import QueryAssertionsMixin
+from posts.models import Comment, Follow, Group, Post
+
+from . import batch
+
+User = get_user_model()
+
+
+class ApiTests(QueryAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {index}'
+            )
+            for index in range(5)
+        ]
+        cls.post = cls.posts[-1]
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+        self.client = Client()
+        self.client.force_login(ApiTests.reader)
+        self.author_client = Client()
+        self.author_client.force_login(ApiTests.author)
+
+    def test_cursor_pages_cover_all_posts(self):
+        """Курсорные страницы по ссылке next проходят все посты."""
+        url = reverse('api:posts') + '?limit=2'
+        ids = []
+        while url:
+            data = self.guest.get(url).json()
+            ids.extend(post['id'] for post in data['results'])
+            url = data['next']
+        self.assertEqual(ids, [post.pk for post in reversed(self.posts)])
+
+    def test_groups_second_page(self):
+        """Ссылка next списка групп ведёт на вторую страницу."""
+        for index in range(3):
+            Group.objects.create(
+                title=f'Группа {index}', slug=f'group-{index}',
+                description='Описание'
+            )
+        data = self.guest.get(reverse('api:groups'), {'limit': 2}).json()
+        second = self.guest.get(data['next'])
+        self.assertEqual(second.status_code, 200)
+        slugs = [
+            group['slug']
+            for group in data['results'] + second.json()['results']
+        ]
+        self.assertEqual(
+            slugs, ['group-2', 'group-1', 'group-0', 'group']
+        )
+
+    def test_sparse_fields(self):
+        """?fields= оставляет в ответе только перечисленные поля."""
+        data = self.guest.get(
+            reverse('api:posts'), {'fields': 'id,author'}
+        ).json()
+        self.assertEqual(
+            data['results'][0], {'id': self.post.pk, 'author': 'author'}
+        )
+        response = self.guest.get(reverse('api:posts'), {'fields': 'email'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_post_detail(self):
+        """Пост отдаётся со всеми полями; чужой id — JSON с 404."""
+        data = self.guest.get(
+            reverse('api:post_detail', args=[self.post.pk])
+        ).json()
+        self.assertEqual(data['group'], 'group')
+        self.assertEqual(data['comments_count'], 1)
+        self.assertIsNone(data['image'])
+        response = self.guest.get(reverse('api:post_detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_create_post(self):
+        """Создать пост может только авторизованный пользователь."""
+        url = reverse('api:posts')
+        payload = {'text': 'Новый пост', 'group': 'group'}
+        response = self.guest.post(
+            url, payload, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+        response = self.client.post(
+            url, payload, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        post = Post.objects.get(pk=response.json()['id'])
+        self.assertEqual(post.author, ApiTests.reader)
+        self.assertEqual(post.group, ApiTests.group)
+        response = self.client.post(
+            url, {'text': ''}, content_type='application/json'
+        )
+        self.assertIn('text', response.json()['errors'])
+
+    def test_edit_post(self):
+        """Менять пост может только автор; не переданные поля остаются."""
+        url = reverse('api:post_detail', args=[self.post.pk])
+        payload = {'text': 'Исправлено'}
+        response = self.client.patch(
+            url, payload, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self.author_client.patch(
+            url, payload, content_type='application/json'
+        )
+        self.assertEqual(response.json()['text'], 'Исправлено')
+        self.assertEqual(response.json()['group'], 'group')
+
+    def test_edit_post_requires_json(self):
+        """PATCH формой отклоняется, а не молча ничего не меняет."""
+        url = reverse('api:post_detail', args=[self.post.pk])
+        response = self.author_client.patch(
+            url, 'text=Исправлено',
+            content_type='application/x-www-form-urlencoded'
+        )
+        self.assertEqual(response.status_code, 415)
+        self.post.refresh_from_db()
+        self.assertNotEqual(self.post.text, 'Исправлено')
+
+    def test_comments(self):
+        """Комментарии читаются страницами и добавляются через POST."""
+        url = reverse('api:comments', args=[self.post.pk])
+        response = self.client.post(
+            url, {'text': 'Ещё'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        texts = [
+            comment['text']
+            for comment in self.guest.get(url).json()['results']
+        ]
+        self.assertEqual(texts, ['Ещё', 'Комментарий'])
+
+    def test_follow(self):
+        """Подписка добавляет посты автора в ленту, отписка убирает."""
+        url = reverse('api:follow', args=['author'])
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertTrue(Follow.objects.filter(
+            user=ApiTests.reader, author=ApiTests.author
+        ).exists())
+        feed = self.client.get(reverse('api:follow_index')).json()
+        self.assertEqual(len(feed['results']), len(self.posts))
+        self.client.delete(url)
+        feed = self.client.get(reverse('api:follow_index')).json()
+        self.assertEqual(feed['results'], [])
+        response = self.author_client.post(url)
+        self.assertEqual(response.status_code, 400)
+
+    def test_method_not_allowed(self):
+        response = self.client.delete(reverse('api:posts'))
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, POST')
+
+    def test_batch(self):
+        """Посты по списку id отдаются в порядке запроса."""
+        ids = [self.posts[1].pk, 0, self.post.pk]
+        url = reverse('api:posts_batch')
+        data = self.guest.get(
+            url, {'ids': ','.join(map(str, ids))}
+        ).json()
+        self.assertEqual(
+            [post['id'] for post in data['results']], [ids[0], ids[2]]
+        )
+        self.assertEqual(data['missing'], [0])
+        self.assertEqual(data['results'][1]['comments_count'], 1)
+        self.assertIsNone(data['results'][1]['thumbnail'])
+        response = self.guest.get(url, {'ids': 'x'})
+        self.assertEqual(response.status_code, 400)
+        response = self.guest.get(
+            url, {'ids': ','.join(map(str, range(1, batch.MAX_IDS + 2)))}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_queries_do_not_grow(self):
+        """Число запросов не зависит от числа id; из кэша — без базы."""
+        url = reverse('api:posts_batch') + '?ids=' + ','.join(
+            str(post.pk) for post in self.posts
+        )
+        self.assertWithinBudget(url)
+        with self.assertNumQueries(0):
+            self.guest.get(url)
+
+    def test_batch_cache_follows_changes(self):
+        """Новый комментарий сразу виден в закэшированном посте."""
+        url = reverse('api:posts_batch') + f'?ids={self.post.pk}'
+        self.guest.get(url)
+        Comment.objects.create(
+            post=self.post, author=ApiTests.reader, text='Ещё'
+        )
+        data = self.guest.get(url).json()
+        self.assertEqual(data['results'][0]['comments_count'], 2)
+
+    def test_query_budgets(self):
+        """Чтение ресурсов укладывается в объявленные бюджеты."""
+        Follow.objects.create(user=ApiTests.reader, author=ApiTests.author)
+        urls = (
+            reverse('api:posts'),
+            reverse('api:post_detail', args=[self.post.pk]),
+            reverse('api:groups'),
+            reverse('api:group_posts', args=['group']),
+            reverse('api:profile_posts', args=['author']),
+            reverse('api:comments', args=[self.post.pk]),
+            reverse('api:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.assertWithinBudget(url)
+                self.assertEqual(response.status_code, 200)
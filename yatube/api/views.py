@@ -0,0 +1,254 @@
+import json
+from functools import wraps
+
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+
+from core.queries import query_budget
+from posts.authors import get_author_or_404
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, FeedItem, Follow, Group, Post
+
+from . import batch
+from .serializers import (COMMENT_FIELDS, FEED_FIELDS, GROUP_FIELDS,
+                          POST_FIELDS, ApiError, detail, paginate,
+                          parse_fields)
+
+
+def api_view(*methods):
+    """Разрешает методы methods и превращает ошибки в JSON-ответы."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    raise ApiError(405, 'Метод не поддерживается.')
+                return view(request, *args, **kwargs)
+            except ApiError as error:
+                response = JsonResponse(
+                    {'detail': error.detail}, status=error.status
+                )
+            except Http404:
+                response = JsonResponse({'detail': 'Не найдено.'}, status=404)
+            except PermissionDenied:
+                response = JsonResponse(
+                    {'detail': 'Недостаточно прав.'}, status=403
+                )
+            if response.status_code == 405:
+                response['Allow'] = ', '.join(methods)
+            return response
+        return wrapper
+    return decorator
+
+
+def _require_user(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужна авторизация.')
+
+
+def _payload(request):
+    """Данные запроса: JSON-объект или обычная форма.
+
+    Django разбирает форму только в POST, поэтому остальные методы
+    принимают лишь JSON.
+    """
+    if request.content_type != 'application/json':
+        if request.method != 'POST':
+            raise ApiError(415, 'Ожидается application/json.')
+        return request.POST
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ApiError(400, 'Тело запроса — не JSON.')
+    if not isinstance(data, dict):
+        raise ApiError(400, 'Ожидается JSON-объект.')
+    return data
+
+
+def _invalid(form):
+    return JsonResponse({'errors': form.errors}, status=400)
+
+
+def _post_form(request, post=None):
+    """PostForm по данным API; группа передаётся slug'ом."""
+    data = _payload(request)
+    text = data.get('text', post.text if post else '')
+    if 'group' in data:
+        slug = data['group']
+    else:
+        slug = post.group.slug if post and post.group else None
+    group_id = ''
+    if slug:
+        group_id = Group.objects.filter(slug=slug).values_list(
+            'pk', flat=True
+        ).first()
+        if group_id is None:
+            raise ApiError(400, f'Группа не найдена: {slug}')
+    return PostForm(
+        {'text': text, 'group': group_id},
+        files=request.FILES or None,
+        instance=post
+    )
+
+
+def _post(pk, status=200):
+    return JsonResponse(
+        detail(Post.objects.filter(pk=pk), POST_FIELDS), status=status
+    )
+
+
+@query_budget(2)
+@api_view('GET', 'POST')
+def posts(request):
+    """Лента всех постов; POST создаёт пост."""
+    if request.method == 'POST':
+        _require_user(request)
+        form = _post_form(request)
+        if not form.is_valid():
+            return _invalid(form)
+        post = form.save(commit=False)
+        post.author = request.user
+        post.save()
+        return _post(post.pk, status=201)
+    return JsonResponse(paginate(request, Post.objects.all(), POST_FIELDS))
+
+
+def _parse_ids(request):
+    ids = []
+    for raw in request.GET.get('ids', '').split(','):
+        raw = raw.strip()
+        if not raw:
+            continue
+        if not raw.isdigit():
+            raise ApiError(400, f'Неверный id: {raw}')
+        if int(raw) not in ids:
+            ids.append(int(raw))
+    if not ids:
+        raise ApiError(400, 'Передайте id постов: ?ids=1,2,3')
+    if len(ids) > batch.MAX_IDS:
+        raise ApiError(400, f'Не больше {batch.MAX_IDS} id за запрос')
+    return ids
+
+
+@query_budget(2)
+@api_view('GET')
+def posts_batch(request):
+    """Посты по списку ?ids= в том же порядке, с миниатюрами."""
+    ids = _parse_ids(request)
+    names = parse_fields(request, batch.BATCH_FIELDS)
+    found = batch.fetch_posts(ids)
+    return JsonResponse({
+        'results': [
+            {name: found[post_id][name] for name in names}
+            for post_id in ids if post_id in found
+        ],
+        'missing': [post_id for post_id in ids if post_id not in found],
+    })
+
+
+@query_budget(2)
+@api_view('GET', 'PATCH')
+def post_detail(request, post_id):
+    """Пост; PATCH с JSON меняет автору текст или группу поста."""
+    if request.method == 'PATCH':
+        _require_user(request)
+        post = get_object_or_404(
+            Post.objects.select_related('group'), pk=post_id
+        )
+        if post.author_id != request.user.pk:
+            raise PermissionDenied
+        form = _post_form(request, post)
+        if not form.is_valid():
+            return _invalid(form)
+        form.save()
+        return _post(post.pk)
+    post = detail(
+        Post.objects.filter(pk=post_id),
+        POST_FIELDS, parse_fields(request, POST_FIELDS)
+    )
+    if post is None:
+        raise Http404
+    return JsonResponse(post)
+
+
+@query_budget(2)
+@api_view('GET')
+def groups(request):
+    """Все группы."""
+    return JsonResponse(
+        paginate(request, Group.objects.all(), GROUP_FIELDS, key='pk')
+    )
+
+
+@query_budget(3)
+@api_view('GET')
+def group_posts(request, slug):
+    """Посты группы."""
+    group_id = get_object_or_404(
+        Group.objects.values_list('pk', flat=True), slug=slug
+    )
+    return JsonResponse(paginate(
+        request, Post.objects.filter(group_id=group_id), POST_FIELDS
+    ))
+
+
+@query_budget(3)
+@api_view('GET')
+def profile_posts(request, username):
+    """Посты автора."""
+    author = get_author_or_404(username)
+    return JsonResponse(paginate(
+        request, Post.objects.filter(author=author), POST_FIELDS
+    ))
+
+
+@query_budget(3)
+@api_view('GET', 'POST')
+def comments(request, post_id):
+    """Комментарии к посту, новые первыми; POST добавляет комментарий."""
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    if request.method == 'POST':
+        _require_user(request)
+        form = CommentForm(_payload(request))
+        if not form.is_valid():
+            return _invalid(form)
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post_id = post_id
+        comment.save()
+        return JsonResponse(
+            detail(Comment.objects.filter(pk=comment.pk), COMMENT_FIELDS),
+            status=201
+        )
+    return JsonResponse(paginate(
+        request, Comment.objects.filter(post_id=post_id), COMMENT_FIELDS,
+        key='created'
+    ))
+
+
+@query_budget(3)
+@api_view('GET')
+def follow_index(request):
+    """Лента подписок текущего пользователя."""
+    _require_user(request)
+    return JsonResponse(paginate(
+        request, FeedItem.objects.filter(user=request.user), FEED_FIELDS
+    ))
+
+
+@api_view('POST', 'DELETE')
+def follow(request, username):
+    """POST подписывает на автора, DELETE — отписывает."""
+    _require_user(request)
+    author = get_author_or_404(username)
+    if request.method == 'DELETE':
+        Follow.objects.filter(user=request.user, author=author).delete()
+        return JsonResponse({'following': False})
+    if author.pk == request.user.pk:
+        raise ApiError(400, 'Нельзя подписаться на себя.')
+    _, created = Follow.objects.get_or_create(
+        user=request.user, author=author
+    )
+    return JsonResponse({'following': True}, status=201 if created else 200)
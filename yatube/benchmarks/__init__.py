@@ -0,0 +1,7 @@
+"""Нагрузочные замеры страниц ленты на синтетических данных.
+
+    python manage.py benchmark --scale medium --output bench.json
+    python manage.py benchmark --compare bench.json
+
+Данные генерируются в отдельной тестовой базе и удаляются после замера.
+"""
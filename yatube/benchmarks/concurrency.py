@@ -0,0 +1,168 @@
+"""Сравнение режимов WSGI и ASGI при медленных клиентах.
+
+Оба режима выполняют одно и то же приложение Django в threads потоках
+и обслуживают concurrency клиентов, каждый из которых отправляет
+запросы подряд и читает ответ client_delay секунд. В WSGI поток сервера
+занят, пока клиент читает ответ; в ASGI ответ отдаёт цикл событий, а
+поток сразу берёт следующий запрос.
+"""
+import asyncio
+import itertools
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import Client
+
+from core.asgi import WsgiToAsgi, build_environ
+
+from . import runner
+
+MODES = ('wsgi_server', 'asgi_server')
+
+
+def _scope(url, cookie):
+    parts = urlsplit(url)
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': parts.path,
+        'query_string': parts.query.encode(),
+        'headers': [
+            (b'host', b'testserver'),
+            (b'cookie', f'{settings.SESSION_COOKIE_NAME}={cookie}'.encode()),
+        ],
+        'server': ('testserver', 80),
+    }
+
+
+def _check(url, status):
+    if status != 200:
+        raise RuntimeError(f'{url}: статус {status}')
+
+
+def _wsgi_request(handler, scope, workers, client_delay):
+    statuses = []
+    with workers:
+        result = handler(
+            build_environ(scope, b''),
+            lambda status, headers: statuses.append(int(status[:3]))
+        )
+        try:
+            b''.join(result)
+            time.sleep(client_delay)
+        finally:
+            result.close()
+    _check(scope['path'], statuses[0])
+
+
+def _run_wsgi(handler, scopes, concurrency, threads, client_delay):
+    """Потоки клиентов; семафор — потоки WSGI-сервера."""
+    workers = threading.Semaphore(threads)
+    pending = iter(scopes)
+    lock = threading.Lock()
+    timings, errors = [], []
+
+    def client():
+        while True:
+            with lock:
+                scope = next(pending, None)
+            if scope is None:
+                return
+            started = time.perf_counter()
+            try:
+                _wsgi_request(handler, scope, workers, client_delay)
+            except Exception as error:
+                errors.append(error)
+                return
+            timings.append(time.perf_counter() - started)
+
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return timings
+
+
+async def _asgi_request(application, scope, client_delay):
+    statuses = []
+    messages = [{'type': 'http.request', 'body': b''}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Клиент не отключается, пока приложение отвечает.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+        elif not message.get('more_body', False):
+            await asyncio.sleep(client_delay)
+
+    await application(scope, receive, send)
+    _check(scope['path'], statuses[0])
+
+
+def _run_asgi(handler, scopes, concurrency, threads, client_delay):
+    """Корутины клиентов поверх адаптера WsgiToAsgi."""
+    application = WsgiToAsgi(handler, max_workers=threads)
+    pending = iter(scopes)
+    timings = []
+
+    async def client():
+        for scope in pending:
+            started = time.perf_counter()
+            await _asgi_request(application, scope, client_delay)
+            timings.append(time.perf_counter() - started)
+
+    async def main():
+        try:
+            await asyncio.gather(*(client() for _ in range(concurrency)))
+        finally:
+            application.executor.shutdown()
+
+    asyncio.run(main())
+    return timings
+
+
+def summarize(timings, wall):
+    summary = {'requests': len(timings)}
+    for percent in runner.PERCENTILES:
+        summary[f'p{percent}_ms'] = round(
+            runner.percentile(timings, percent) * 1000, 3
+        )
+    summary['max_ms'] = round(max(timings) * 1000, 3)
+    summary['wall_s'] = round(wall, 3)
+    summary['throughput_rps'] = round(len(timings) / wall, 1)
+    return summary
+
+
+def run(requests=50, concurrency=32, threads=8, client_delay=0.05,
+        seed=0, views=runner.VIEWS):
+    """Замеряет оба режима на одних и тех же адресах."""
+    client = Client()
+    client.force_login(runner._reader())
+    cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+    by_view = runner._urls(random.Random(seed), requests)
+    urls = [
+        url
+        for group in itertools.zip_longest(*(
+            urls for view, urls in by_view.items() if view in views
+        ))
+        for url in group if url is not None
+    ]
+    handler = WSGIHandler()
+    results = {}
+    for mode, serve in zip(MODES, (_run_wsgi, _run_asgi)):
+        scopes = [_scope(url, cookie) for url in urls]
+        started = time.perf_counter()
+        timings = serve(handler, scopes, concurrency, threads, client_delay)
+        results[mode] = summarize(timings, time.perf_counter() - started)
+    return results
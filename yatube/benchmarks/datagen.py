@@ -0,0 +1,109 @@
+"""Генератор синтетических данных, похожих на живые.
+
+Активность распределена по закону Ципфа: немногие авторы пишут
+большую часть постов и собирают большую часть подписчиков, немногие
+посты собирают большую часть комментариев. Записи выдаются в формате
+posts.transfer и загружаются его же пачками bulk_create.
+"""
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.utils import timezone
+
+USERNAME = 'bench_user_{}'
+SCALES = {
+    'small': {
+        'users': 50, 'groups': 5, 'posts': 500,
+        'comments': 1_000, 'follows': 5,
+    },
+    'medium': {
+        'users': 500, 'groups': 20, 'posts': 10_000,
+        'comments': 30_000, 'follows': 20,
+    },
+    'large': {
+        'users': 5_000, 'groups': 50, 'posts': 200_000,
+        'comments': 600_000, 'follows': 50,
+    },
+}
+ZIPF_EXPONENT = 1.1
+GROUP_SHARE = 0.7
+HISTORY = timedelta(days=90)
+WORDS = (
+    'путешествие город море горы книга фильм музыка кофе утро вечер '
+    'друзья работа проект код ошибка релиз кошка собака погода зима '
+    'лето осень весна дорога поезд самолёт фотография рецепт пирог'
+).split()
+
+
+def zipf_cum_weights(count, exponent=ZIPF_EXPONENT):
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def _text(rng, low, high):
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    return ' '.join(words).capitalize() + '.'
+
+
+def generate(users, groups, posts, comments, follows, seed=0,
+             first_post_id=1, first_comment_id=1, now=None):
+    """Записи (тип, словарь) для загрузки через posts.transfer.
+
+    `follows` — число подписок на пользователя. Id постов и
+    комментариев начинаются с first_post_id и first_comment_id.
+    """
+    rng = random.Random(seed)
+    now = now or timezone.now()
+    usernames = [USERNAME.format(index) for index in range(users)]
+    for username in usernames:
+        yield 'user', {
+            'username': username,
+            'first_name': username.replace('_', ' ').title(),
+            'last_name': '',
+        }
+    slugs = [f'bench-group-{index}' for index in range(groups)]
+    for slug in slugs:
+        yield 'group', {
+            'title': slug.replace('-', ' ').title(),
+            'slug': slug,
+            'description': _text(rng, 5, 20),
+        }
+
+    author_weights = zipf_cum_weights(users)
+    group_weights = zipf_cum_weights(groups) if groups else None
+    step = HISTORY / max(posts, 1)
+    for index in range(posts):
+        group = None
+        if groups and rng.random() < GROUP_SHARE:
+            group = rng.choices(slugs, cum_weights=group_weights)[0]
+        yield 'post', {
+            'id': first_post_id + index,
+            'author': rng.choices(usernames, cum_weights=author_weights)[0],
+            'group': group,
+            'text': _text(rng, 5, 60),
+            'pub_date': (now - HISTORY + step * index).isoformat(),
+            'image': '',
+        }
+
+    # Свежие посты комментируют чаще: ранг 1 у последнего поста.
+    post_weights = zipf_cum_weights(posts)
+    last_post_id = first_post_id + posts - 1
+    for index in range(comments if posts else 0):
+        rank = rng.choices(range(posts), cum_weights=post_weights)[0]
+        yield 'comment', {
+            'id': first_comment_id + index,
+            'post': last_post_id - rank,
+            'author': rng.choice(usernames),
+            'text': _text(rng, 2, 20),
+            'created': (now - step * rank).isoformat(),
+        }
+
+    for username in usernames:
+        authors = set(rng.choices(
+            usernames, cum_weights=author_weights, k=follows
+        ))
+        authors.discard(username)
+        for author in sorted(authors):
+            yield 'follow', {'user': username, 'author': author}
@@ -0,0 +1,142 @@
+import json
+import sys
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.test.utils import (setup_databases, setup_test_environment,
+                               teardown_databases,
+                               teardown_test_environment)
+
+from benchmarks import concurrency, datagen, runner
+from posts import transfer
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт тестовую базу с синтетическими данными и замеряет '
+        'задержки и число запросов страниц ленты. Результат — JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            choices=tuple(datagen.SCALES),
+            default='small'
+        )
+        for name in datagen.SCALES['small']:
+            parser.add_argument(
+                f'--{name}',
+                type=int,
+                help=f'Переопределить «{name}» выбранного масштаба.'
+            )
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--views',
+            nargs='+',
+            choices=runner.VIEWS,
+            default=runner.VIEWS
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Очищать кэш перед каждым запросом.'
+        )
+        parser.add_argument(
+            '--servers',
+            action='store_true',
+            help='Сравнить режимы WSGI и ASGI при медленных клиентах.'
+        )
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--client-delay-ms',
+            type=int,
+            default=50,
+            help='Сколько клиент читает ответ в режимах --servers.'
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для результата; по умолчанию stdout.'
+        )
+        parser.add_argument(
+            '--compare',
+            help='Прежний результат для сравнения.'
+        )
+
+    def _dataset(self, options):
+        dataset = dict(datagen.SCALES[options['scale']])
+        for name in dataset:
+            if options[name] is not None:
+                dataset[name] = options[name]
+        return dataset
+
+    def _load(self, dataset, seed):
+        records = datagen.generate(
+            seed=seed,
+            first_post_id=(Post.objects.aggregate(Max('pk'))['pk__max']
+                           or 0) + 1,
+            first_comment_id=(Comment.objects.aggregate(Max('pk'))['pk__max']
+                              or 0) + 1,
+            **dataset
+        )
+        transfer.import_records(records)
+        for command, kwargs in (
+            ('recount', {}),
+            ('backfill_feed', {}),
+            ('reindex_search', {}),
+            ('decay_scores', {'rebuild': True}),
+        ):
+            call_command(command, stdout=self.stderr, **kwargs)
+
+    def handle(self, *args, **options):
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as stream:
+                    previous = json.load(stream)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Не удалось прочитать {error}')
+        dataset = self._dataset(options)
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self._load(dataset, options['seed'])
+            results = runner.run(
+                requests=options['requests'],
+                warmup=options['warmup'],
+                seed=options['seed'],
+                cold=options['cold'],
+                views=options['views'],
+            )
+            if options['servers']:
+                results.update(concurrency.run(
+                    requests=options['requests'],
+                    concurrency=options['concurrency'],
+                    threads=options['threads'],
+                    client_delay=options['client_delay_ms'] / 1000,
+                    seed=options['seed'],
+                    views=options['views'],
+                ))
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+        report = runner.report(results, dataset, {
+            key: options[key]
+            for key in (
+                'requests', 'warmup', 'seed', 'cold', 'views', 'servers',
+                'concurrency', 'threads', 'client_delay_ms',
+            )
+        })
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.write(output + '\n')
+        else:
+            sys.stdout.write(output + '\n')
+        if previous is not None:
+            for line in runner.compare(previous, report):
+                self.stderr.write(line)
@@ -0,0 +1,164 @@
+"""Замер задержек и числа SQL-запросов страниц через тестовый клиент."""
+import platform
+import random
+import subprocess
+import time
+
+import django
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Max
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post, User, UserStats
+
+VIEWS = ('index', 'group_posts', 'profile', 'post_detail', 'follow_index')
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(values, percent):
+    """Процентиль с линейной интерполяцией между соседними значениями."""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (
+        position - lower
+    )
+
+
+def summarize(timings, queries):
+    summary = {'requests': len(timings)}
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = round(
+            percentile(timings, percent) * 1000, 3
+        )
+    summary['mean_ms'] = round(sum(timings) / len(timings) * 1000, 3)
+    summary['max_ms'] = round(max(timings) * 1000, 3)
+    summary['queries_p50'] = percentile(queries, 50)
+    summary['queries_max'] = max(queries)
+    return summary
+
+
+def _urls(rng, count):
+    """Адреса для каждого представления, выбранные как у живых читателей.
+
+    Представления, которым не из чего выбирать (нет групп, авторов или
+    постов), пропускаются.
+    """
+    max_post = Post.objects.aggregate(Max('pk'))['pk__max'] or 0
+    slugs = list(Group.objects.values_list('slug', flat=True))
+    authors = list(
+        User.objects.filter(stats__posts_count__gt=0)
+        .values_list('username', flat=True)
+    )
+    post_ids = list(
+        Post.objects.filter(pk__gt=max_post - 1000)
+        .values_list('pk', flat=True)
+    )
+    populations = {
+        'group_posts': slugs, 'profile': authors, 'post_detail': post_ids,
+    }
+    choices = {
+        'index': lambda: reverse('posts:index'),
+        'group_posts': lambda: reverse(
+            'posts:group_list', args=[rng.choice(slugs)]
+        ),
+        'profile': lambda: reverse(
+            'posts:profile', args=[rng.choice(authors)]
+        ),
+        'post_detail': lambda: reverse(
+            'posts:post_detail', args=[rng.choice(post_ids)]
+        ),
+        'follow_index': lambda: reverse('posts:follow_index'),
+    }
+    return {
+        view: [choices[view]() for _ in range(count)]
+        for view in VIEWS
+        if populations.get(view, True)
+    }
+
+
+def _reader():
+    """Пользователь с наибольшим числом подписок — самая тяжёлая лента."""
+    stats = UserStats.objects.order_by('-following_count').first()
+    return stats.user if stats else User.objects.first()
+
+
+def run(requests=50, warmup=5, seed=0, cold=False, views=VIEWS):
+    """Замеряет представления; возвращает сводку по каждому.
+
+    Запросы идут от авторизованного читателя, поэтому страницы не
+    берутся из кэша анонимных страниц. С cold=True перед каждым
+    запросом очищается весь кэш.
+    """
+    rng = random.Random(seed)
+    client = Client()
+    client.force_login(_reader())
+    results = {}
+    for view, urls in _urls(rng, warmup + requests).items():
+        if view not in views:
+            continue
+        timings, queries = [], []
+        for index, url in enumerate(urls):
+            if cold:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise RuntimeError(f'{url}: статус {response.status_code}')
+            if index >= warmup:
+                timings.append(elapsed)
+                queries.append(len(captured))
+        results[view] = summarize(timings, queries)
+    return results
+
+
+def _revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results, dataset, options):
+    return {
+        'meta': {
+            'revision': _revision(),
+            'created': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'dataset': dataset,
+            'options': options,
+        },
+        'results': results,
+    }
+
+
+def compare(old, new):
+    """Строки таблицы «метрика: было → стало (изменение)»."""
+    lines = []
+    for view, metrics in new['results'].items():
+        previous = old.get('results', {}).get(view, {})
+        for metric, value in metrics.items():
+            before = previous.get(metric)
+            if metric == 'requests' or before is None:
+                continue
+            change = (
+                f'{(value - before) / before * 100:+.1f}%' if before else '—'
+            )
+            lines.append(
+                f'{view:<14} {metric:<12} {before:>10} → {value:>10} {change}'
+            )
+    return lines
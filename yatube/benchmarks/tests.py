@@ -0,0 +1,84 @@
+from collections import Counter
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from posts import transfer
+
+from . import concurrency, datagen, runner
+
+
+class DatagenTests(TestCase):
+    def generate(self, **kwargs):
+        params = dict(datagen.SCALES['small'], seed=1, **kwargs)
+        return list(datagen.generate(**params))
+
+    def test_generation_is_reproducible(self):
+        """Одинаковое зерно даёт одинаковые данные."""
+        now = timezone.now()
+        self.assertEqual(self.generate(now=now), self.generate(now=now))
+
+    def test_posts_follow_zipf(self):
+        """Самый активный автор пишет заметно больше медианного."""
+        authors = Counter(
+            record['author'] for record_type, record in self.generate()
+            if record_type == 'post'
+        )
+        counts = sorted(authors.values(), reverse=True)
+        self.assertGreater(counts[0], 5 * counts[len(counts) // 2])
+
+
+class RunnerTests(TestCase):
+    def test_percentile(self):
+        self.assertEqual(runner.percentile([3, 1, 2], 50), 2)
+        self.assertEqual(runner.percentile([1, 2], 50), 1.5)
+        self.assertEqual(runner.percentile([1, 2, 3, 4, 5], 100), 5)
+
+    def test_run_measures_every_view(self):
+        """Замер возвращает процентили и число запросов по страницам."""
+        transfer.import_records(datagen.generate(
+            users=10, groups=2, posts=30, comments=20, follows=3
+        ))
+        call_command('recount', stdout=StringIO())
+        call_command('backfill_feed', stdout=StringIO())
+        results = runner.run(requests=3, warmup=1)
+        self.assertEqual(set(results), set(runner.VIEWS))
+        for summary in results.values():
+            self.assertEqual(summary['requests'], 3)
+            self.assertLessEqual(summary['p50_ms'], summary['max_ms'])
+            self.assertGreater(summary['queries_max'], 0)
+
+    def test_empty_populations_are_skipped(self):
+        """Без постов замеряются только страницы, которым они не нужны."""
+        transfer.import_records(datagen.generate(
+            users=3, groups=0, posts=0, comments=0, follows=1
+        ))
+        call_command('recount', stdout=StringIO())
+        results = runner.run(requests=1, warmup=0)
+        self.assertEqual(set(results), {'index', 'follow_index'})
+
+    def test_compare(self):
+        old = {'results': {'index': {'requests': 5, 'p50_ms': 10.0}}}
+        new = {'results': {'index': {'requests': 5, 'p50_ms': 15.0}}}
+        self.assertEqual(len(runner.compare(old, new)), 1)
+        self.assertIn('+50.0%', runner.compare(old, new)[0])
+
+
+class ConcurrencyTests(TransactionTestCase):
+    def test_both_modes_serve_every_request(self):
+        """Оба режима отвечают на все запросы и считают пропускную
+        способность."""
+        transfer.import_records(datagen.generate(
+            users=10, groups=2, posts=30, comments=20, follows=3
+        ))
+        call_command('recount', stdout=StringIO())
+        call_command('backfill_feed', stdout=StringIO())
+        results = concurrency.run(
+            requests=2, concurrency=4, threads=2, client_delay=0.01
+        )
+        self.assertEqual(set(results), set(concurrency.MODES))
+        for summary in results.values():
+            self.assertEqual(summary['requests'], 2 * len(runner.VIEWS))
+            self.assertGreater(summary['throughput_rps'], 0)
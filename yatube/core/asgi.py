@@ -0,0 +1,205 @@
+"""ASGI-приложение поверх WSGI-приложения Django.
+
+Django 2.2 не поддерживает ASGI и асинхронные представления. Адаптер
+выполняет WSGI-приложение в ограниченном пуле из max_workers потоков,
+а чтение тела запроса, отправку ответа медленному клиенту и простаивающие
+keep-alive соединения обслуживает цикл событий, не занимая потоков.
+Потоковый ответ (StreamingHttpResponse) читается и закрывается в том же
+потоке, что его создал: соединения Django с базой привязаны к потоку и
+закрываются по request_finished только в нём. Такой ответ держит поток,
+пока отдаётся клиенту.
+
+    application = WsgiToAsgi(get_wsgi_application(), max_workers=8)
+"""
+import asyncio
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_THREADS = 8
+# Ключ окружения WSGI, по которому запрос узнаёт, что пришёл через ASGI.
+ENVIRON_KEY = 'yatube.asgi'
+_END = object()
+
+
+def build_environ(scope, body):
+    """Окружение WSGI (PEP 3333) для HTTP-запроса ASGI."""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    client = scope.get('client')
+    if client:
+        environ['REMOTE_ADDR'] = client[0]
+        environ['REMOTE_PORT'] = str(client[1])
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        value = value.decode('latin-1')
+        if name in environ:
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = environ[name] + separator + value
+        environ[name] = value
+    return environ
+
+
+async def read_body(receive):
+    """Тело запроса целиком или None, если клиент отключился."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+def encode_headers(headers):
+    return [
+        (name.lower().encode('latin-1'), value.encode('latin-1'))
+        for name, value in headers
+    ]
+
+
+class WsgiToAsgi:
+    """Выполняет WSGI-приложение в пуле потоков по запросам ASGI."""
+
+    def __init__(self, wsgi_application, max_workers=DEFAULT_THREADS):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix='wsgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Не поддерживается: {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _run(self, environ, deliver, credits, cancelled):
+        """Вызывает приложение, читает и закрывает ответ в одном потоке.
+
+        Каждый фрагмент передаётся в цикл событий через deliver вместе со
+        статусом и заголовками. Следующий фрагмент читается только после
+        отправки предыдущего (credits), поэтому обычный ответ Django из
+        одного фрагмента освобождает поток сразу, а потоковый не
+        опережает клиента больше чем на фрагмент.
+        """
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = headers
+
+        try:
+            result = self.wsgi_application(environ, start_response)
+            try:
+                for chunk in result:
+                    credits.acquire()
+                    if cancelled.is_set():
+                        break
+                    deliver(started, chunk)
+            finally:
+                close = getattr(result, 'close', None)
+                if close is not None:
+                    # Django закрывает ответ и соединения с базой по
+                    # сигналу request_finished в close().
+                    close()
+        finally:
+            deliver(started, _END)
+
+    async def _respond(self, send, queue, credits, disconnected):
+        started, chunk = await queue.get()
+        if not started:
+            # Приложение упало до start_response; ошибку поднимет задание.
+            return
+        await send({
+            'type': 'http.response.start',
+            'status': started['status'],
+            'headers': encode_headers(started['headers']),
+        })
+        while chunk is not _END:
+            if disconnected.done():
+                return
+            await send({
+                'type': 'http.response.body',
+                'body': chunk,
+                'more_body': True,
+            })
+            credits.release()
+            _, chunk = await queue.get()
+        if not disconnected.done():
+            await send({'type': 'http.response.body', 'body': b''})
+
+    async def http(self, scope, receive, send):
+        body = await read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        environ = build_environ(scope, body)
+        environ[ENVIRON_KEY] = True
+        queue = asyncio.Queue()
+        credits = threading.Semaphore(1)
+        cancelled = threading.Event()
+
+        def deliver(started, chunk):
+            loop.call_soon_threadsafe(queue.put_nowait, (started, chunk))
+
+        job = loop.run_in_executor(
+            self.executor, self._run, environ, deliver, credits, cancelled
+        )
+        disconnected = asyncio.ensure_future(wait_disconnect(receive))
+        try:
+            await self._respond(send, queue, credits, disconnected)
+        finally:
+            disconnected.cancel()
+            cancelled.set()
+            credits.release()
+            await job
+
+
+class PathRouter:
+    """Отдаёт HTTP-запросы с путями из routes своим приложениям ASGI."""
+
+    def __init__(self, routes, default):
+        self.routes = routes
+        self.default = default
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] in self.routes:
+            await self.routes[scope['path']](scope, receive, send)
+        else:
+            await self.default(scope, receive, send)
@@ -0,0 +1,19 @@
+from django.conf import settings
+
+DEFAULT_TTL = 60
+
+
+class TTLMap(dict):
+    """Время жизни по семействам; для неизвестных — значение 'default'."""
+
+    def __missing__(self, family):
+        return self.get('default', DEFAULT_TTL)
+
+
+def get_ttls():
+    return TTLMap(getattr(settings, 'CACHE_TTL', {}))
+
+
+def get_ttl(family):
+    """Время жизни ключей семейства из settings.CACHE_TTL, в секундах."""
+    return get_ttls()[family]
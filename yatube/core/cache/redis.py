@@ -0,0 +1,301 @@
+"""Бэкенд кэша Django для Redis-совместимого сервера.
+
+Общий для всех процессов и воркеров кэш. Клиент протокола написан
+без сторонних зависимостей и держит пул соединений. Если сервер
+недоступен, чтения возвращают промах, а записи пропускаются с записью
+в журнал core.cache: страницы работают без кэша, а не падают.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.redis.RedisCache',
+            'LOCATION': 'redis://:password@127.0.0.1:6379/0',
+            'OPTIONS': {'MAX_CONNECTIONS': 50, 'SOCKET_TIMEOUT': 1},
+        }
+    }
+"""
+import logging
+import pickle
+import socket
+import threading
+from queue import Empty, LifoQueue
+from urllib.parse import unquote, urlparse
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .resp import ProtocolError, ReplyError, encode_command, read_reply
+
+DEFAULT_PORT = 6379
+# Увеличивает только существующий ключ; проверка и INCRBY атомарны.
+INCR_EXISTING_SCRIPT = (
+    "if redis.call('EXISTS', KEYS[1]) == 1 then "
+    "return redis.call('INCRBY', KEYS[1], ARGV[1]) end "
+    "return false"
+)
+
+logger = logging.getLogger('core.cache')
+
+
+class CacheConnectionError(Exception):
+    """Не удалось получить соединение с сервером кэша."""
+
+
+class Connection:
+    def __init__(self, host, port, db=0, password=None, timeout=None):
+        self.sock = socket.create_connection((host, port), timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stream = self.sock.makefile('rb')
+        if password:
+            self.execute('AUTH', password)
+        if db:
+            self.execute('SELECT', db)
+
+    def execute_many(self, commands):
+        """Отправляет команды одним пакетом и читает все ответы."""
+        self.sock.sendall(b''.join(
+            encode_command(*command) for command in commands
+        ))
+        replies = [read_reply(self.stream) for _ in commands]
+        for reply in replies:
+            if isinstance(reply, ReplyError):
+                raise reply
+        return replies
+
+    def execute(self, *command):
+        return self.execute_many([command])[0]
+
+    def close(self):
+        try:
+            self.stream.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class ConnectionPool:
+    """Пул соединений с ограничением их общего числа."""
+
+    def __init__(self, url, max_connections=50, socket_timeout=None,
+                 wait_timeout=1):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or DEFAULT_PORT
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.socket_timeout = socket_timeout
+        self.wait_timeout = wait_timeout
+        self._idle = LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def _connect(self):
+        return Connection(
+            self.host, self.port, self.db, self.password, self.socket_timeout
+        )
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            try:
+                return self._idle.get(timeout=self.wait_timeout)
+            except Empty:
+                raise CacheConnectionError('Нет свободных соединений в пуле.')
+        try:
+            return self._connect()
+        except OSError as error:
+            self._slots.release()
+            raise CacheConnectionError(str(error)) from error
+
+    def release(self, connection):
+        self._idle.put(connection)
+
+    def discard(self, connection):
+        connection.close()
+        self._slots.release()
+
+    def execute_many(self, commands, retry=True):
+        """Выполняет команды; на разорванном соединении повторяет их один
+        раз, если retry. Неидемпотентные команды (INCRBY) передают
+        retry=False: сервер мог успеть выполнить их до разрыва."""
+        attempts = 2 if retry else 1
+        for attempt in range(1, attempts + 1):
+            connection = self.acquire()
+            try:
+                replies = connection.execute_many(commands)
+            except ReplyError:
+                self.release(connection)
+                raise
+            except (OSError, ProtocolError) as error:
+                self.discard(connection)
+                if attempt == attempts:
+                    raise CacheConnectionError(str(error)) from error
+                continue
+            self.release(connection)
+            return replies
+
+    def execute(self, *command, retry=True):
+        return self.execute_many([command], retry=retry)[0]
+
+    def disconnect(self):
+        while True:
+            try:
+                self.discard(self._idle.get_nowait())
+            except Empty:
+                return
+
+
+class RedisCache(BaseCache):
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        key = (server, tuple(sorted(options.items())))
+        with self._pools_lock:
+            if key not in self._pools:
+                self._pools[key] = ConnectionPool(
+                    server,
+                    max_connections=options.get('MAX_CONNECTIONS', 50),
+                    socket_timeout=options.get('SOCKET_TIMEOUT'),
+                    wait_timeout=options.get('POOL_TIMEOUT', 1),
+                )
+            self.pool = self._pools[key]
+
+    def _key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _ttl_ms(self, timeout):
+        """Время жизни в мс; None — бессрочно, 0 и меньше — сразу истекло."""
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return int(timeout * 1000)
+
+    @staticmethod
+    def _dumps(value):
+        # Целые числа хранятся как есть, чтобы работал INCRBY.
+        if isinstance(value, int) and not isinstance(value, bool):
+            return str(value).encode()
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _loads(data):
+        if data is None:
+            return None
+        try:
+            return int(data)
+        except ValueError:
+            return pickle.loads(data)
+
+    def _execute_many(self, commands):
+        """Ответы сервера или None, если он недоступен."""
+        try:
+            return self.pool.execute_many(commands)
+        except CacheConnectionError as error:
+            logger.warning('Сервер кэша недоступен: %s', error)
+            return None
+
+    def _execute(self, *command):
+        replies = self._execute_many([command])
+        return None if replies is None else replies[0]
+
+    def _set_command(self, key, value, ttl, only_new=False):
+        command = ['SET', key, self._dumps(value)]
+        if ttl is not None:
+            command += ['PX', ttl]
+        if only_new:
+            command.append('NX')
+        return command
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        ttl = self._ttl_ms(timeout)
+        if ttl is not None and ttl <= 0:
+            return False
+        reply = self._execute(
+            *self._set_command(key, value, ttl, only_new=True)
+        )
+        return reply == 'OK'
+
+    def get(self, key, default=None, version=None):
+        data = self._execute('GET', self._key(key, version))
+        return default if data is None else self._loads(data)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        ttl = self._ttl_ms(timeout)
+        if ttl is not None and ttl <= 0:
+            self._execute('DEL', key)
+            return
+        self._execute(*self._set_command(key, value, ttl))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        ttl = self._ttl_ms(timeout)
+        if ttl is None:
+            replies = self._execute_many([('PERSIST', key), ('EXISTS', key)])
+            return bool(replies and replies[1])
+        return bool(self._execute('PEXPIRE', key, max(ttl, 1)))
+
+    def delete(self, key, version=None):
+        self._execute('DEL', self._key(key, version))
+
+    def has_key(self, key, version=None):
+        return bool(self._execute('EXISTS', self._key(key, version)))
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        made = [self._key(key, version) for key in keys]
+        values = self._execute('MGET', *made)
+        if values is None:
+            return {}
+        return {
+            key: self._loads(value)
+            for key, value in zip(keys, values) if value is not None
+        }
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        ttl = self._ttl_ms(timeout)
+        if ttl is not None and ttl <= 0:
+            self.delete_many(data, version=version)
+            return []
+        replies = self._execute_many([
+            self._set_command(self._key(key, version), value, ttl)
+            for key, value in data.items()
+        ])
+        return list(data) if replies is None else []
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self._execute('DEL', *keys)
+
+    def incr(self, key, delta=1, version=None):
+        """Одна команда без повтора; при недоступном сервере —
+        CacheConnectionError: вернуть правдоподобное число нельзя."""
+        key = self._key(key, version)
+        try:
+            value = self.pool.execute(
+                'EVAL', INCR_EXISTING_SCRIPT, 1, key, delta, retry=False
+            )
+        except ReplyError as error:
+            raise ValueError(str(error)) from error
+        if value is None:
+            raise ValueError(f"Key '{key}' not found")
+        return value
+
+    def clear(self):
+        self._execute('FLUSHDB')
+
+    def close(self, **kwargs):
+        # Соединения возвращаются в общий пул процесса и переиспользуются.
+        pass
@@ -0,0 +1,74 @@
+"""Кодирование и разбор протокола RESP (Redis serialization protocol)."""
+
+
+class ProtocolError(Exception):
+    """Некорректные данные протокола."""
+
+
+class ReplyError(Exception):
+    """Сервер вернул ошибку (-ERR ...)."""
+
+
+def _to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode()
+    return str(value).encode()
+
+
+def encode_command(*args):
+    """Команда как массив bulk-строк."""
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        arg = _to_bytes(arg)
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(parts)
+
+
+def encode_reply(value):
+    """Ответ сервера: None, int, bytes/str, list или ReplyError."""
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, ReplyError):
+        return b'-%s\r\n' % _to_bytes(str(value))
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, (list, tuple)):
+        return b'*%d\r\n' % len(value) + b''.join(
+            encode_reply(item) for item in value
+        )
+    if value == 'OK':
+        return b'+OK\r\n'
+    value = _to_bytes(value)
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def read_reply(stream):
+    """Читает один ответ из файлоподобного потока (makefile('rb'))."""
+    line = stream.readline()
+    if not line.endswith(b'\r\n'):
+        raise ProtocolError('Соединение закрыто.')
+    kind, payload = line[:1], line[1:-2]
+    if kind == b'+':
+        return payload.decode()
+    if kind == b'-':
+        return ReplyError(payload.decode())
+    if kind == b':':
+        return int(payload)
+    if kind == b'$':
+        length = int(payload)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        if len(data) != length + 2:
+            raise ProtocolError('Соединение закрыто.')
+        return data[:-2]
+    if kind == b'*':
+        length = int(payload)
+        if length < 0:
+            return None
+        return [read_reply(stream) for _ in range(length)]
+    raise ProtocolError(f'Неизвестный тип ответа: {kind!r}')
@@ -0,0 +1,145 @@
+"""Лёгкий Redis-совместимый сервер кэша для разработки и тестов.
+
+Поддерживает подмножество команд, которое использует RedisCache, и
+позволяет нескольким процессам (воркерам runserver/gunicorn) делить
+один кэш без установленного Redis. Данные хранятся только в памяти.
+"""
+import socketserver
+import threading
+import time
+
+from .redis import INCR_EXISTING_SCRIPT
+from .resp import ProtocolError, ReplyError, encode_reply, read_reply
+
+DATABASES = 16
+
+
+class Store:
+    """Словари ключей с временем истечения, по одному на базу."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.databases = [{} for _ in range(DATABASES)]
+
+    def _alive(self, db, key):
+        item = db.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del db[key]
+            return None
+        return item
+
+    def execute(self, db_index, name, args):
+        db = self.databases[db_index]
+        with self.lock:
+            handler = getattr(self, 'cmd_' + name.lower(), None)
+            if handler is None:
+                return ReplyError(f'ERR unknown command {name!r}')
+            return handler(db, *args)
+
+    def cmd_ping(self, db, *args):
+        return 'PONG'
+
+    def cmd_get(self, db, key):
+        item = self._alive(db, key)
+        return None if item is None else item[0]
+
+    def cmd_mget(self, db, *keys):
+        return [self.cmd_get(db, key) for key in keys]
+
+    def cmd_set(self, db, key, value, *options):
+        options = [option.upper() for option in options]
+        expires = None
+        if b'PX' in options:
+            ttl = int(options[options.index(b'PX') + 1])
+            expires = time.monotonic() + ttl / 1000
+        if b'NX' in options and self._alive(db, key) is not None:
+            return None
+        db[key] = (value, expires)
+        return 'OK'
+
+    def cmd_del(self, db, *keys):
+        return sum(db.pop(key, None) is not None for key in keys)
+
+    def cmd_exists(self, db, *keys):
+        return sum(self._alive(db, key) is not None for key in keys)
+
+    def cmd_incrby(self, db, key, delta):
+        item = self._alive(db, key)
+        value, expires = item if item is not None else (b'0', None)
+        try:
+            value = int(value) + int(delta)
+        except ValueError:
+            return ReplyError('ERR value is not an integer')
+        db[key] = (str(value).encode(), expires)
+        return value
+
+    def cmd_eval(self, db, script, numkeys, *args):
+        """Скрипты Lua не исполняются: поддержан только скрипт incr
+        из RedisCache."""
+        if script.decode() != INCR_EXISTING_SCRIPT or int(numkeys) != 1:
+            return ReplyError('ERR scripting is not supported')
+        key, delta = args
+        if self._alive(db, key) is None:
+            return None
+        return self.cmd_incrby(db, key, delta)
+
+    def cmd_pexpire(self, db, key, ttl):
+        item = self._alive(db, key)
+        if item is None:
+            return 0
+        db[key] = (item[0], time.monotonic() + int(ttl) / 1000)
+        return 1
+
+    def cmd_persist(self, db, key):
+        item = self._alive(db, key)
+        if item is None or item[1] is None:
+            return 0
+        db[key] = (item[0], None)
+        return 1
+
+    def cmd_flushdb(self, db):
+        db.clear()
+        return 'OK'
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        db_index = 0
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except (ProtocolError, ValueError, OSError):
+                return
+            if not isinstance(command, list) or not command:
+                return
+            name = command[0].decode().upper()
+            args = command[1:]
+            if name == 'SELECT':
+                db_index = int(args[0])
+                reply = 'OK'
+            elif name == 'AUTH':
+                reply = 'OK'
+            else:
+                reply = self.server.store.execute(db_index, name, args)
+            try:
+                self.wfile.write(encode_reply(reply))
+            except OSError:
+                return
+
+
+class CacheServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 6379)):
+        super().__init__(address, Handler)
+        self.store = Store()
+
+    def start(self):
+        """Запускает сервер в фоновом потоке."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
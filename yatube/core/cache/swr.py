@@ -0,0 +1,78 @@
+"""Кэш со стратегией stale-while-revalidate и защитой от лавины.
+
+Запись хранит значение, версию и момент, до которого оно свежее.
+Когда запись устарела (истекла или сменилась версия), пересчитывает её
+только один запрос — тот, кто взял блокировку через cache.add, —
+остальные отдают устаревшее значение. Если записи нет совсем, остальные
+ждут пересчёта до COLD_WAIT секунд и только потом считают сами. Время
+свежести случайно растягивается на ±JITTER, чтобы ключи не истекали
+одновременно.
+
+Блокировка хранит случайный токен и снимается, только если в ней всё
+ещё этот токен: медленный запрос, чья блокировка истекла, не снимет
+чужую.
+"""
+import random
+import time
+import uuid
+
+from django.core.cache import cache as default_cache
+
+JITTER = 0.1
+STALE_FACTOR = 10
+LOCK_TIMEOUT = 10
+COLD_WAIT = 2
+COLD_POLL = 0.05
+
+
+def _jittered(ttl):
+    return ttl * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+def _wait_for_fill(cache, key, version):
+    """Значение, записанное держателем блокировки, или None.
+
+    Ожидание кончается, когда блокировка снята (держатель закончил или
+    упал; кэш недоступен — блокировки тоже не видно) или через COLD_WAIT.
+    """
+    lock_key = key + ':lock'
+    deadline = time.monotonic() + COLD_WAIT
+    while True:
+        found = cache.get_many([key, lock_key])
+        entry = found.get(key)
+        if entry is not None and entry[1] == version:
+            return entry
+        if lock_key not in found or time.monotonic() >= deadline:
+            return None
+        time.sleep(COLD_POLL)
+
+
+def get_or_refresh(key, compute, ttl, version=None, cache=None):
+    """Значение по ключу; при устаревании пересчитывает один запрос."""
+    cache = cache or default_cache
+    entry = cache.get(key)
+    now = time.time()
+    if entry is not None:
+        value, entry_version, fresh_until = entry
+        if entry_version == version and now < fresh_until:
+            return value
+    lock_key = key + ':lock'
+    token = uuid.uuid4().hex
+    locked = cache.add(lock_key, token, LOCK_TIMEOUT)
+    if not locked:
+        if entry is not None:
+            return entry[0]
+        filled = _wait_for_fill(cache, key, version)
+        if filled is not None:
+            return filled[0]
+    try:
+        value = compute()
+        cache.set(
+            key,
+            (value, version, time.time() + _jittered(ttl)),
+            ttl * STALE_FACTOR
+        )
+    finally:
+        if locked and cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    return value
@@ -0,0 +1,8 @@
+from core.cache import get_ttls
+
+
+def cache_ttl(request):
+    """Добавляет время жизни кэша по семействам ключей."""
+    return {
+        'cache_ttl': get_ttls(),
+    }
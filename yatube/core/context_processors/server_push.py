@@ -0,0 +1,9 @@
+from core.asgi import ENVIRON_KEY
+
+
+def server_push(request):
+    """Поток событий открывается только под ASGI: под WSGI он держал бы
+    поток сервера, и страница опрашивает сервер."""
+    return {
+        'server_push': request.META.get(ENVIRON_KEY, False),
+    }
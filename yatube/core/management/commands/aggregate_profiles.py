@@ -0,0 +1,67 @@
+import os
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводит стеки профилированных запросов в один файл на '
+        'представление (<каталог>/<представление>.folded) и печатает '
+        'функции, в которых прошло больше всего времени.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir',
+            default=None,
+            help='Каталог профилей; по умолчанию PROFILER_DIR.'
+        )
+        parser.add_argument(
+            '--view',
+            action='append',
+            default=[],
+            help='Имя представления, например posts:profile; '
+                 'можно указать несколько раз.'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Сколько самых затратных функций напечатать.'
+        )
+
+    def handle(self, *args, **options):
+        root = options['dir'] or settings.PROFILER_DIR
+        if not os.path.isdir(root):
+            raise CommandError(f'Каталог профилей не найден: {root}')
+        wanted = {profiling.view_directory(view) for view in options['view']}
+        for view in sorted(os.listdir(root)):
+            directory = os.path.join(root, view)
+            if not os.path.isdir(directory) or (wanted and view not in wanted):
+                continue
+            files = [
+                os.path.join(directory, name)
+                for name in os.listdir(directory)
+                if name.endswith(profiling.SUFFIX)
+            ]
+            stacks = Counter()
+            for path in files:
+                stacks.update(profiling.read_stacks(path))
+            output = os.path.join(root, view + profiling.SUFFIX)
+            profiling.write_stacks(output, stacks)
+            self.report(view, len(files), stacks, options['top'], output)
+
+    def report(self, view, requests, stacks, top, output):
+        total = sum(stacks.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'{view}: запросов {requests}, выборок {total} → {output}'
+        ))
+        leaves = Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        for frame, count in leaves.most_common(top):
+            self.stdout.write(f'  {count / total:6.1%}  {frame}')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.cache.server import CacheServer
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает локальный Redis-совместимый сервер кэша '
+        'для нескольких процессов разработки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=6379)
+
+    def handle(self, *args, **options):
+        server = CacheServer((options['host'], options['port']))
+        self.stdout.write(self.style.SUCCESS(
+            f'Сервер кэша слушает {options["host"]}:{options["port"]}, '
+            f'CACHE_URL=redis://{options["host"]}:{options["port"]}/0'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает подписанное значение заголовка X-Profile: запрос с ним '
+        'профилируется независимо от длительности. Значение действует '
+        'один час.'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(profiling.make_token())
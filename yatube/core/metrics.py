@@ -0,0 +1,345 @@
+"""Реестр метрик в памяти процесса и их выдача в формате Prometheus.
+
+Метрика хранит не больше max_series наборов меток: лишние наборы
+складываются в один с метками OVERFLOW, поэтому память не растёт от
+случайных адресов и имён.
+
+Если задан METRICS_MULTIPROCESS_DIR, каждый процесс периодически
+сохраняет свои значения в файл <pid>-<метка>.json этого каталога, а
+выдача суммирует файлы всех процессов. Метка новая у каждого процесса,
+поэтому повторно выданный pid не затирает файл умершего процесса. Файлы
+умерших процессов при выдаче переносятся в общий итог dead.json и
+удаляются, так что счётчики не уменьшаются после перезапуска воркеров.
+"""
+import atexit
+import fcntl
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+MAX_SERIES = 500
+FLUSH_INTERVAL = 1
+OVERFLOW = '__other__'
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEAD_FILE = 'dead.json'
+LOCK_FILE = '.lock'
+PROCESS_FILE_RE = re.compile(r'^(\d+)-\w+\.json$')
+
+
+def _escape(value):
+    return (
+        value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+    )
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{_escape(str(value))}"' for name, value in pairs
+    ) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(),
+                 max_series=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series or getattr(
+            settings, 'METRICS_MAX_SERIES', MAX_SERIES
+        )
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        if key not in self._values and len(self._values) >= self.max_series:
+            key = (OVERFLOW,) * len(self.labelnames)
+        return key
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        with self._lock:
+            key = self._key(labels)
+            self._values[key] = self._values.get(key, 0) + amount
+
+    @staticmethod
+    def merge(first, second):
+        return first + second
+
+    def expose(self, values):
+        for key, value in sorted(values.items()):
+            yield (
+                f'{self.name}{_labels(self.labelnames, key)} '
+                f'{_number(value)}'
+            )
+
+
+class Histogram(Metric):
+    """Число наблюдений по корзинам; последние два поля — сумма и число."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=LATENCY_BUCKETS, max_series=None):
+        super().__init__(name, documentation, labelnames, max_series)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        with self._lock:
+            key = self._key(labels)
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            counts[-2] += value
+            counts[-1] += 1
+
+    @staticmethod
+    def merge(first, second):
+        return [a + b for a, b in zip(first, second)]
+
+    def expose(self, values):
+        for key, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _labels(self.labelnames, key, [('le', bound)])
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _labels(self.labelnames, key, [('le', '+Inf')])
+            yield f'{self.name}_bucket{labels} {counts[-1]}'
+            labels = _labels(self.labelnames, key)
+            yield f'{self.name}_sum{labels} {_number(counts[-2])}'
+            yield f'{self.name}_count{labels} {counts[-1]}'
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read(path):
+    try:
+        with open(path) as stream:
+            return json.load(stream)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(directory, name, snapshot):
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(descriptor, 'w') as stream:
+        json.dump(snapshot, stream)
+    os.replace(temporary, os.path.join(directory, name))
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self._flushed = 0
+        self._pid = None
+        self._file = None
+
+    def _process_file(self):
+        """Имя файла процесса; после fork у потомка своё."""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._file = f'{self._pid}-{uuid.uuid4().hex[:12]}.json'
+        return self._file
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    @staticmethod
+    def directory():
+        return getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+
+    def snapshot(self):
+        return {
+            name: metric.snapshot() for name, metric in self.metrics.items()
+        }
+
+    def flush(self, force=False):
+        """Сохраняет значения процесса в общий каталог, не чаще раза
+        в FLUSH_INTERVAL секунд."""
+        directory = self.directory()
+        now = time.monotonic()
+        if not directory or (not force and now - self._flushed
+                             < FLUSH_INTERVAL):
+            return
+        self._flushed = now
+        os.makedirs(directory, exist_ok=True)
+        _write(directory, self._process_file(), self.snapshot())
+
+    def _merge(self, merged, snapshot):
+        for name, series in snapshot.items():
+            metric = self.metrics.get(name)
+            if metric is None:
+                continue
+            values = merged.setdefault(name, {})
+            for key, value in series:
+                key = tuple(key)
+                values[key] = (
+                    metric.merge(values[key], value)
+                    if key in values else value
+                )
+        return merged
+
+    def fold_dead(self, directory):
+        """Переносит значения умерших процессов в DEAD_FILE."""
+        dead = [
+            name for name in os.listdir(directory)
+            if PROCESS_FILE_RE.match(name)
+            and not _alive(int(PROCESS_FILE_RE.match(name).group(1)))
+        ]
+        if not dead:
+            return
+        with open(os.path.join(directory, LOCK_FILE), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            merged = self._merge(
+                {}, _read(os.path.join(directory, DEAD_FILE)) or {}
+            )
+            folded = []
+            for name in dead:
+                snapshot = _read(os.path.join(directory, name))
+                if snapshot is not None:
+                    self._merge(merged, snapshot)
+                    folded.append(name)
+            _write(directory, DEAD_FILE, {
+                name: [[list(key), value] for key, value in values.items()]
+                for name, values in merged.items()
+            })
+            for name in folded:
+                os.remove(os.path.join(directory, name))
+
+    def _snapshots(self):
+        directory = self.directory()
+        if not directory:
+            yield self.snapshot()
+            return
+        self.flush(force=True)
+        self.fold_dead(directory)
+        for name in os.listdir(directory):
+            if name == DEAD_FILE or PROCESS_FILE_RE.match(name):
+                snapshot = _read(os.path.join(directory, name))
+                if snapshot is not None:
+                    yield snapshot
+
+    def collect(self):
+        """Значения всех процессов: {имя: {метки: значение}}."""
+        merged = {name: {} for name in self.metrics}
+        for snapshot in self._snapshots():
+            self._merge(merged, snapshot)
+        return merged
+
+    def expose(self):
+        """Текст в формате выдачи Prometheus."""
+        lines = []
+        for name, values in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.expose(values))
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        for metric in self.metrics.values():
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    'yatube_http_request_duration_seconds',
+    'Время ответа по представлениям.', ('view', 'method'),
+)
+REQUESTS = REGISTRY.counter(
+    'yatube_http_requests_total',
+    'Число ответов по представлениям и статусам.', ('view', 'status'),
+)
+# Разбивка по базе и кэшу — только у запросов из выборки
+# REQUEST_TIMING_SAMPLE_RATE; их число — SAMPLED_REQUESTS.
+SAMPLED_REQUESTS = REGISTRY.counter(
+    'yatube_http_requests_sampled_total',
+    'Число замеренных запросов по представлениям.', ('view',),
+)
+DB_QUERIES = REGISTRY.counter(
+    'yatube_db_queries_total',
+    'Число SQL-запросов замеренных запросов.', ('view',),
+)
+DB_DURATION = REGISTRY.counter(
+    'yatube_db_duration_seconds_total',
+    'Время SQL-запросов замеренных запросов.', ('view',),
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    'yatube_cache_requests_total',
+    'Чтения кэша замеренных запросов: попадания и промахи.',
+    ('view', 'result'),
+)
+THUMBNAILS = REGISTRY.counter(
+    'yatube_thumbnail_generations_total',
+    'Подготовка вариантов картинок постов.', ('result',),
+)
+
+
+def record_request(view, method, status, duration, timings=None):
+    """Учитывает завершённый запрос; timings — замер core.timing, если
+    запрос попал в выборку."""
+    view = view or 'none'
+    REQUEST_LATENCY.observe(duration, view=view, method=method)
+    REQUESTS.inc(view=view, status=status)
+    if timings is not None:
+        SAMPLED_REQUESTS.inc(view=view)
+        DB_QUERIES.inc(timings.db_queries, view=view)
+        DB_DURATION.inc(timings.db, view=view)
+        CACHE_REQUESTS.inc(timings.cache_hits, view=view, result='hit')
+        CACHE_REQUESTS.inc(timings.cache_misses, view=view, result='miss')
+    REGISTRY.flush()
+
+
+atexit.register(REGISTRY.flush, force=True)
@@ -0,0 +1,143 @@
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+
+from . import metrics, profiling, timing
+from .queries import REPEAT_THRESHOLD, QueryRecorder, get_budget
+
+logger = logging.getLogger('core.queries')
+timing_logger = logging.getLogger('core.timing')
+
+
+class QueryInspectorMiddleware:
+    """Записывает SQL-запросы запроса и сообщает о N+1 и превышении бюджета.
+
+    Включается настройкой QUERY_INSPECTOR (по умолчанию равна DEBUG).
+    При QUERY_INSPECTOR_STRICT нарушение приводит к исключению, что
+    удобно в тестах и на стендах.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSPECTOR', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.strict = getattr(settings, 'QUERY_INSPECTOR_STRICT', False)
+        self.threshold = getattr(
+            settings, 'QUERY_INSPECTOR_REPEAT_THRESHOLD', REPEAT_THRESHOLD
+        )
+
+    def __call__(self, request):
+        request.query_budget = None
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        response['X-Query-Count'] = str(len(recorder))
+        problems = recorder.problems(request.query_budget, self.threshold)
+        if problems:
+            view_name = getattr(request.resolver_match, 'view_name', None)
+            message = f'{request.method} {request.path} ({view_name}): '
+            message += '; '.join(problems)
+            if self.strict:
+                raise ImproperlyConfigured(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_budget(view_func)
+
+
+class MetricsMiddleware:
+    """Учитывает каждый запрос в реестре core.metrics.
+
+    У каждого запроса записываются время и статус; разбивку по базе,
+    шаблонам и кэшу даёт только замер RequestTimingMiddleware у запросов
+    из его выборки. Отключается настройкой METRICS = False.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        metrics.record_request(
+            getattr(request.resolver_match, 'view_name', None),
+            request.method, response.status_code,
+            time.perf_counter() - started,
+            getattr(request, 'timings', None)
+        )
+        return response
+
+
+class RequestTimingMiddleware:
+    """Замеряет время базы, шаблонов и обращения к кэшу у части запросов.
+
+    Доля замеряемых запросов задаётся REQUEST_TIMING_SAMPLE_RATE.
+    Результат уходит в заголовок Server-Timing, строкой JSON в журнал
+    core.timing и в request.timings для MetricsMiddleware. Отключается
+    настройкой REQUEST_TIMING = False.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_TIMING', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 1)
+        timing.install()
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        with timing.measure() as timings:
+            request.timings = timings
+            response = self.get_response(request)
+        response['Server-Timing'] = timings.server_timing()
+        timing_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': getattr(request.resolver_match, 'view_name', None),
+            'status': response.status_code,
+            **timings.as_dict(),
+        }, ensure_ascii=False))
+        return response
+
+
+class ProfilerMiddleware:
+    """Снимает стеки запроса и сохраняет их, если запрос был медленным.
+
+    Включается настройкой PROFILER. Стеки сохраняются, когда запрос
+    шёл дольше PROFILER_THRESHOLD секунд или пришёл с заголовком
+    X-Profile, подписанным командой profile_token. При
+    PROFILER_THRESHOLD = None профилируются только запросы с заголовком.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILER', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'PROFILER_THRESHOLD', None)
+
+    def __call__(self, request):
+        token = request.META.get('HTTP_X_PROFILE')
+        forced = token is not None and profiling.check_token(token)
+        if not forced and self.threshold is None:
+            return self.get_response(request)
+        sampler = profiling.get_sampler()
+        started = time.perf_counter()
+        stacks = sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        elapsed = time.perf_counter() - started
+        if forced or elapsed >= self.threshold:
+            profiling.save(
+                getattr(request.resolver_match, 'view_name', None),
+                stacks, elapsed
+            )
+        return response
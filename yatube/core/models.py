@@ -10,3 +10,25 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class CountersModel(models.Model):
+    """Абстрактная модель со счётчиками, которые меняются только через F().
+
+    Обычное сохранение существующей записи не перезаписывает поля из
+    `counter_fields`, иначе устаревшее значение в памяти затёрло бы
+    параллельные инкременты.
+    """
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
@@ -0,0 +1,111 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(ValueError):
+    """Курсор не удалось разобрать."""
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (key, pk) без COUNT(*) и OFFSET.
+
+    Курсорная страница выбирается одним диапазонным запросом по индексу,
+    поэтому её стоимость не зависит от глубины. Номерные страницы
+    (`get_page`) остаются доступны для старых ссылок вида ?page=N.
+    У курсорной страницы есть атрибуты `next_cursor` и `previous_cursor`.
+    Элементами могут быть и словари из values(): тогда в них нужны
+    ключи `key` и 'pk'.
+    """
+
+    def __init__(self, object_list, per_page, key='pub_date', **kwargs):
+        self.key = key
+        super().__init__(
+            object_list.order_by(f'-{key}', '-pk'), per_page, **kwargs
+        )
+
+    def _key_field(self):
+        meta = self.object_list.model._meta
+        return meta.pk if self.key == 'pk' else meta.get_field(self.key)
+
+    def encode_cursor(self, direction, item):
+        if isinstance(item, dict):
+            value, pk = item[self.key], item['pk']
+        else:
+            value, pk = getattr(item, self.key), item.pk
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        raw = json.dumps([direction, value, pk], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, value, pk = json.loads(
+                base64.urlsafe_b64decode(padded.encode())
+            )
+            value = self._key_field().to_python(value)
+            pk = int(pk)
+        except (
+            TypeError, ValueError, binascii.Error, ValidationError,
+            FieldDoesNotExist,
+        ) as error:
+            raise InvalidCursor(cursor) from error
+        if direction not in (NEXT, PREVIOUS) or value is None:
+            raise InvalidCursor(cursor)
+        return direction, value, pk
+
+    def get_cursor_page(self, cursor=None):
+        """Страница после (или до) курсора; без курсора — первая."""
+        direction = value = pk = None
+        if cursor:
+            try:
+                direction, value, pk = self.decode_cursor(cursor)
+            except InvalidCursor:
+                pass
+        queryset = self.object_list
+        if direction == PREVIOUS:
+            queryset = (
+                queryset.filter(**{f'{self.key}__gte': value})
+                .filter(Q(**{f'{self.key}__gt': value}) | Q(pk__gt=pk))
+                .reverse()
+            )
+        elif direction == NEXT:
+            queryset = (
+                queryset.filter(**{f'{self.key}__lte': value})
+                .filter(Q(**{f'{self.key}__lt': value}) | Q(pk__lt=pk))
+            )
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if direction == PREVIOUS:
+            items.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, direction == NEXT
+        page = self._get_page(items, None, self)
+        page.next_cursor = (
+            self.encode_cursor(NEXT, items[-1])
+            if has_next and items else None
+        )
+        page.previous_cursor = (
+            self.encode_cursor(PREVIOUS, items[0])
+            if has_previous and items else None
+        )
+        return page
+
+
+def paginate(request, queryset, per_page, key='pub_date'):
+    """Возвращает страницу по ?cursor=, а для ?page=N — номерную."""
+    paginator = CursorPaginator(queryset, per_page, key=key)
+    page_number = request.GET.get('page')
+    if page_number is not None:
+        return paginator.get_page(page_number)
+    return paginator.get_cursor_page(request.GET.get('cursor'))
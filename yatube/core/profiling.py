@@ -0,0 +1,164 @@
+"""Выборочный профилировщик запросов.
+
+Фоновый поток раз в PROFILER_INTERVAL секунд снимает стек каждого
+профилируемого потока через sys._current_frames() и считает одинаковые
+стеки. Стеки пишутся в свёрнутом формате flame graph («кадр;кадр;кадр
+число»), который понимают flamegraph.pl, speedscope и inferno.
+
+Файлы лежат в PROFILER_DIR/<представление>/, по файлу на запрос, и
+хранятся не больше PROFILER_MAX_FILES на представление; команда
+aggregate_profiles сводит их в один файл на представление.
+"""
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+
+SUFFIX = '.folded'
+TOKEN_SALT = 'core.profiling'
+TOKEN_MAX_AGE = 60 * 60
+
+
+@functools.lru_cache(maxsize=4096)
+def _short(filename):
+    """Путь файла относительно ближайшего каталога из sys.path."""
+    for prefix in sorted(sys.path, key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
+
+
+def fold(frame):
+    """Стек от корня к кадру одной строкой через «;»."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({_short(code.co_filename)})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Sampler:
+    """Общий поток выборки; работает, пока есть профилируемые потоки."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._stacks = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, thread_id=None):
+        """Начинает выборку потока; возвращает счётчик его стеков."""
+        stacks = Counter()
+        with self._lock:
+            self._stacks[thread_id or threading.get_ident()] = stacks
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='profiler', daemon=True
+                )
+                self._thread.start()
+        return stacks
+
+    def stop(self, thread_id=None):
+        with self._lock:
+            return self._stacks.pop(thread_id or threading.get_ident())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._stacks:
+                    self._thread = None
+                    return
+                frames = sys._current_frames()
+                for thread_id, stacks in self._stacks.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[fold(frame)] += 1
+
+
+_sampler = None
+
+
+def get_sampler():
+    global _sampler
+    interval = getattr(settings, 'PROFILER_INTERVAL', 0.005)
+    if _sampler is None or _sampler.interval != interval:
+        _sampler = Sampler(interval)
+    return _sampler
+
+
+def make_token():
+    """Подписанное значение заголовка X-Profile."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('profile')
+
+
+def check_token(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def view_directory(view_name):
+    return (view_name or 'none').replace(':', '.')
+
+
+def write_stacks(path, stacks):
+    with open(path, 'w', encoding='utf-8') as stream:
+        for stack, count in stacks.most_common():
+            stream.write(f'{stack} {count}\n')
+
+
+def save(view_name, stacks, elapsed):
+    """Сохраняет стеки запроса в PROFILER_DIR; возвращает путь файла."""
+    directory = os.path.join(
+        settings.PROFILER_DIR, view_directory(view_name)
+    )
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, '{}-{}-{}-{}ms{}'.format(
+        time.strftime('%Y%m%dT%H%M%S'), os.getpid(), threading.get_ident(),
+        round(elapsed * 1000), SUFFIX
+    ))
+    write_stacks(path, stacks)
+    prune(directory, getattr(settings, 'PROFILER_MAX_FILES', None))
+    return path
+
+
+def prune(directory, keep):
+    """Удаляет из каталога самые старые профили сверх keep."""
+    if keep is None:
+        return
+    entries = []
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(SUFFIX):
+            continue
+        try:
+            entries.append((entry.stat().st_mtime, entry.path))
+        except FileNotFoundError:
+            continue
+    entries.sort(reverse=True)
+    for _, path in entries[keep:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Тот же файл удалил соседний процесс.
+            pass
+
+
+def read_stacks(path):
+    stacks = Counter()
+    with open(path, encoding='utf-8') as stream:
+        for line in stream:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack and count.isdigit():
+                stacks[stack] += int(count)
+    return stacks
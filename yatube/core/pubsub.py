@@ -0,0 +1,146 @@
+"""Публикация событий и ожидание новых событий по каналам.
+
+У каждого канала своя возрастающая нумерация событий. Подписчик помнит
+номер последнего полученного события и просит всё, что после него,
+поэтому переподключение (Last-Event-ID в SSE или ?after= в опросе)
+ничего не теряет, пока событие хранится в истории канала. Номер больше
+последнего в канале (история потеряна, например кэш очищен) означает
+«с текущего момента».
+
+Брокер выбирается настройкой PUBSUB_BROKER:
+
+- LocalBroker — в памяти процесса, ожидание без опроса;
+- CacheBroker — через общий кэш (Redis или `manage.py cacheserver`),
+  события видны всем процессам, ожидание опрашивает кэш.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from django.utils.module_loading import import_string
+
+HISTORY = 1000
+EVENT_TTL = 60 * 60
+POLL_INTERVAL = 0.5
+GAP_TIMEOUT = 5
+
+
+class LocalBroker:
+    """События в памяти процесса; подходит для одного процесса.
+
+    Нумерация начинается с текущего времени в микросекундах, поэтому
+    после перезапуска процесса номера продолжают расти и подписчик с
+    Last-Event-ID от прежнего процесса не пропускает новые события.
+    """
+
+    def __init__(self, history=HISTORY):
+        self._events = defaultdict(lambda: deque(maxlen=history))
+        base = time.time_ns() // 1000
+        self._last = defaultdict(lambda: base)
+        self._condition = threading.Condition()
+
+    def publish(self, channel, event):
+        with self._condition:
+            self._last[channel] += 1
+            event_id = self._last[channel]
+            self._events[channel].append((event_id, event))
+            self._condition.notify_all()
+        return event_id
+
+    def last_id(self, channel):
+        with self._condition:
+            return self._last[channel]
+
+    def since(self, channel, after):
+        """События канала с номером больше after: [(номер, событие)]."""
+        with self._condition:
+            return [
+                (event_id, event)
+                for event_id, event in self._events[channel]
+                if event_id > after
+            ]
+
+    def wait(self, channel, after, timeout):
+        """События после after; ждёт их не дольше timeout секунд."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._last[channel] > after, timeout
+            )
+        return self.since(channel, after)
+
+
+class CacheBroker:
+    """События в общем кэше; видны всем процессам.
+
+    Номер события выдаёт cache.incr, событие хранится под своим ключом
+    EVENT_TTL секунд. Для атомарного incr между процессами нужен
+    Redis-совместимый кэш.
+    """
+
+    def __init__(self, history=HISTORY, poll_interval=POLL_INTERVAL,
+                 cache=None):
+        self.history = history
+        self.poll_interval = poll_interval
+        self.cache = cache or default_cache
+
+    @staticmethod
+    def _key(channel, suffix):
+        return f'pubsub:{channel}:{suffix}'
+
+    def publish(self, channel, event):
+        last_key = self._key(channel, 'last')
+        self.cache.add(last_key, 0, None)
+        event_id = self.cache.incr(last_key)
+        self.cache.set(
+            self._key(channel, event_id), (time.time(), event), EVENT_TTL
+        )
+        return event_id
+
+    def last_id(self, channel):
+        return self.cache.get(self._key(channel, 'last')) or 0
+
+    def since(self, channel, after):
+        last = self.last_id(channel)
+        event_ids = range(max(after + 1, last - self.history + 1), last + 1)
+        found = self.cache.get_many(
+            [self._key(channel, event_id) for event_id in event_ids]
+        )
+        events = []
+        gap = False
+        for event_id in event_ids:
+            entry = found.get(self._key(channel, event_id))
+            if entry is None:
+                gap = True
+                continue
+            published, event = entry
+            # Номер выдан, а событие ещё не записано: пропускаем его,
+            # только если более позднее событие записано давно.
+            if gap and time.time() - published < GAP_TIMEOUT:
+                break
+            events.append((event_id, event))
+        return events
+
+    def wait(self, channel, after, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            events = self.since(channel, after)
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                return events
+            time.sleep(min(self.poll_interval, remaining))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Брокер из настройки PUBSUB_BROKER, один на процесс."""
+    global _broker
+    path = getattr(settings, 'PUBSUB_BROKER', 'core.pubsub.LocalBroker')
+    with _broker_lock:
+        if _broker is None or _broker[0] != path:
+            _broker = (path, import_string(path)())
+        return _broker[1]
@@ -0,0 +1,121 @@
+"""Запись SQL-запросов, поиск N+1 и бюджеты числа запросов.
+
+    @query_budget(6)
+    def index(request):
+        ...
+
+Бюджет хранится в атрибуте представления; его проверяют
+QueryInspectorMiddleware и QueryAssertionsMixin в тестах.
+"""
+import re
+import time
+from collections import Counter, namedtuple
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.urls import resolve
+
+REPEAT_THRESHOLD = 3
+
+Query = namedtuple('Query', ('sql', 'duration'))
+
+_IN_LIST = re.compile(r'\bIN \((?:\s*%s\s*,)*\s*%s\s*\)', re.IGNORECASE)
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+
+def query_budget(max_queries):
+    """Объявляет, сколько SQL-запросов разрешено представлению."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def get_budget(view):
+    return getattr(view, 'query_budget', None)
+
+
+def normalize(sql):
+    """Форма запроса: без литералов и с любым числом параметров в IN."""
+    sql = _STRING.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _NUMBER.sub('?', sql)
+
+
+class QueryRecorder:
+    """Записывает запросы всех соединений, пока открыт контекст.
+
+    Использует execute_wrapper и не требует DEBUG = True.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(Query(sql, time.perf_counter() - started))
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def __len__(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(query.duration for query in self.queries)
+
+    def repeated(self, threshold=REPEAT_THRESHOLD):
+        """Формы запросов, выполненные не меньше threshold раз."""
+        shapes = Counter(normalize(query.sql) for query in self.queries)
+        return [
+            (shape, count) for shape, count in shapes.most_common()
+            if count >= threshold
+        ]
+
+    def problems(self, budget=None, threshold=REPEAT_THRESHOLD):
+        """Описания превышения бюджета и повторяющихся запросов."""
+        problems = []
+        if budget is not None and len(self) > budget:
+            problems.append(
+                f'{len(self)} SQL-запросов при бюджете {budget}'
+            )
+        problems.extend(
+            f'N+1: {count} одинаковых запросов: {shape}'
+            for shape, count in self.repeated(threshold)
+        )
+        return problems
+
+
+class QueryAssertionsMixin:
+    """Проверки числа запросов для TestCase."""
+
+    @contextmanager
+    def assertMaxQueries(self, budget, threshold=REPEAT_THRESHOLD):
+        with QueryRecorder() as recorder:
+            yield recorder
+        problems = recorder.problems(budget, threshold)
+        if problems:
+            self.fail('\n'.join(
+                problems + [query.sql for query in recorder.queries]
+            ))
+
+    def assertWithinBudget(self, url, threshold=REPEAT_THRESHOLD, **extra):
+        """GET по url укладывается в бюджет представления и без N+1."""
+        budget = get_budget(resolve(url.split('?')[0]).func)
+        if budget is None:
+            self.fail(f'У представления {url} не объявлен query_budget')
+        with self.assertMaxQueries(budget, threshold):
+            response = self.client.get(url, **extra)
+        return response
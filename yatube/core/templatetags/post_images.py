@@ -0,0 +1,29 @@
+# core/templatetags/post_images.py
+from django import template
+
+from posts.images import THUMBNAIL_HEIGHT, THUMBNAIL_WIDTH, resolve_images
+
+register = template.Library()
+
+# Колонка с постом на широких экранах занимает 3/4 ширины страницы.
+IMAGE_SIZES = '(min-width: 768px) 75vw, 100vw'
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, loading='lazy'):
+    """Картинка поста с srcset из готовых миниатюр.
+
+    Представления заранее проставляют `image_data` всем постам страницы
+    (resolve_images); иначе сведения собираются здесь для одного поста.
+    Размеры заданы всегда, чтобы место под картинку резервировалось
+    до её загрузки.
+    """
+    if not hasattr(post, 'image_data'):
+        resolve_images([post])
+    return {
+        'image': post.image_data,
+        'sizes': IMAGE_SIZES,
+        'width': THUMBNAIL_WIDTH,
+        'height': THUMBNAIL_HEIGHT,
+        'loading': loading,
+    }
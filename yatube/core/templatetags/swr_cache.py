@@ -0,0 +1,62 @@
+# core/templatetags/swr_cache.py
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from core.cache.swr import get_or_refresh
+
+register = template.Library()
+
+
+class SWRCacheNode(template.Node):
+    def __init__(self, nodelist, ttl, fragment_name, vary_on, version):
+        self.nodelist = nodelist
+        self.ttl = ttl
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+        self.version = version
+
+    def render(self, context):
+        ttl = self.ttl.resolve(context)
+        try:
+            ttl = int(ttl)
+        except (ValueError, TypeError):
+            raise template.TemplateSyntaxError(
+                f'"swrcache" tag got a non-integer timeout value: {ttl!r}'
+            )
+        key = make_template_fragment_key(
+            'swr.' + self.fragment_name,
+            [var.resolve(context) for var in self.vary_on]
+        )
+        version = self.version.resolve(context) if self.version else None
+        return get_or_refresh(
+            key, lambda: self.nodelist.render(context), ttl, version
+        )
+
+
+@register.tag('swrcache')
+def do_swrcache(parser, token):
+    """Кэширует фрагмент, отдавая устаревшую копию во время пересчёта.
+
+        {% swrcache <ttl> <имя> [vary_on ...] [version=<версия>] %}
+        ...
+        {% endswrcache %}
+
+    Смена версии делает фрагмент устаревшим без смены ключа.
+    """
+    nodelist = parser.parse(('endswrcache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{tokens[0]}' tag requires at least 2 arguments."
+        )
+    version = None
+    if tokens[-1].startswith('version='):
+        version = parser.compile_filter(tokens.pop()[len('version='):])
+    return SWRCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+        version,
+    )
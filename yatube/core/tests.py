@@ -1,4 +1,31 @@
-from django.test import Client, TestCase
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+
+from posts import views
+
+from . import asgi, metrics, profiling, pubsub, timing
+from .cache import get_ttl, swr
+from .cache.redis import CacheConnectionError, RedisCache
+from .cache.server import CacheServer
+from .cache.swr import get_or_refresh
+from .queries import QueryRecorder, normalize
 
 
 class ViewTestClass(TestCase):
@@ -15,3 +42,626 @@ class ViewTestClass(TestCase):
         """Несуществующая страница(404) использует правильный шаблон"""
         response = self.client.get('/nonexist-page/')
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class RedisCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = CacheServer(('127.0.0.1', 0))
+        cls.server.start()
+        host, port = cls.server.server_address
+        cls.cache = RedisCache(
+            f'redis://{host}:{port}/1',
+            {'OPTIONS': {'MAX_CONNECTIONS': 2}}
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.cache.pool.disconnect()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.cache.clear()
+
+    def test_get_set_delete(self):
+        """Значения любых типов сохраняются и удаляются."""
+        self.cache.set('key', {'a': [1, 2]})
+        self.assertEqual(self.cache.get('key'), {'a': [1, 2]})
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(self.cache.get('key', 'default'), 'default')
+
+    def test_add_and_incr(self):
+        """add не перезаписывает ключ, incr работает с целыми."""
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertFalse(self.cache.add('counter', 5))
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        self.assertEqual(self.cache.get('counter'), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_many(self):
+        """Пакетные операции выполняются за одно обращение."""
+        self.cache.set_many({'a': 1, 'b': 'two'})
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'c']),
+            {'a': 1, 'b': 'two'}
+        )
+        self.cache.delete_many(['a', 'b'])
+        self.assertEqual(self.cache.get_many(['a', 'b']), {})
+
+    def test_timeout(self):
+        """Ключ с истёкшим временем жизни не возвращается."""
+        self.cache.set('short', 'value', 0.05)
+        self.cache.set('zero', 'value', 0)
+        self.assertIsNone(self.cache.get('zero'))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('short'))
+
+    def test_unavailable_server_is_a_miss(self):
+        """Недоступный сервер даёт промахи, а не исключения."""
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        down = RedisCache(f'redis://127.0.0.1:{port}/2', {})
+        with self.assertLogs('core.cache', 'WARNING'):
+            down.set('key', 'value')
+            self.assertEqual(down.get('key', 'default'), 'default')
+            self.assertEqual(down.get_many(['key']), {})
+            self.assertFalse(down.add('key', 'value'))
+            self.assertEqual(down.set_many({'key': 1}), ['key'])
+        with self.assertRaises(CacheConnectionError):
+            down.incr('key')
+
+    def test_pool_is_bounded_and_reused(self):
+        """Пул не открывает больше MAX_CONNECTIONS соединений."""
+        for _ in range(20):
+            self.cache.get('key')
+        self.assertLessEqual(self.cache.pool._idle.qsize(), 2)
+
+
+class CacheTTLTests(TestCase):
+    @override_settings(CACHE_TTL={'default': 30, 'index_page': 5})
+    def test_ttl_by_family(self):
+        """Время жизни берётся по семейству, иначе — по умолчанию."""
+        self.assertEqual(get_ttl('index_page'), 5)
+        self.assertEqual(get_ttl('unknown'), 30)
+
+
+class StaleWhileRevalidateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return f'value {self.calls}'
+
+    def test_fresh_value_is_reused(self):
+        """Свежее значение не пересчитывается."""
+        self.assertEqual(get_or_refresh('k', self.compute, 60), 'value 1')
+        self.assertEqual(get_or_refresh('k', self.compute, 60), 'value 1')
+        self.assertEqual(self.calls, 1)
+
+    def test_new_version_is_recomputed(self):
+        """Смена версии пересчитывает значение."""
+        get_or_refresh('k', self.compute, 60, version=1)
+        self.assertEqual(
+            get_or_refresh('k', self.compute, 60, version=2), 'value 2'
+        )
+
+    def test_stale_value_served_while_locked(self):
+        """Пока другой запрос пересчитывает, отдаётся устаревшее значение."""
+        get_or_refresh('k', self.compute, 60, version=1)
+        cache.add('k:lock', 1)
+        self.assertEqual(
+            get_or_refresh('k', self.compute, 60, version=2), 'value 1'
+        )
+        self.assertEqual(self.calls, 1)
+
+    def test_cold_miss_waits_for_lock_holder(self):
+        """Без записи запрос ждёт того, кто взял блокировку."""
+        cache.add('k:lock', 'other')
+        timer = threading.Timer(
+            0.1, cache.set, args=('k', ('filled', None, time.time() + 60))
+        )
+        timer.start()
+        self.addCleanup(timer.cancel)
+        self.assertEqual(get_or_refresh('k', self.compute, 60), 'filled')
+        self.assertEqual(self.calls, 0)
+
+    def test_cold_miss_without_cache_does_not_wait(self):
+        """Если кэш недоступен, холодный промах считается сразу."""
+        down = mock.Mock()
+        down.get.return_value = None
+        down.add.return_value = False
+        down.get_many.return_value = {}
+        started = time.monotonic()
+        self.assertEqual(
+            get_or_refresh('k', self.compute, 60, cache=down), 'value 1'
+        )
+        self.assertLess(time.monotonic() - started, swr.COLD_WAIT)
+
+    def test_foreign_lock_is_kept(self):
+        """Блокировку, взятую другим запросом после истечения своей,
+        пересчёт не снимает."""
+        def compute():
+            cache.set('k:lock', 'other')
+            return self.compute()
+
+        get_or_refresh('k', compute, 60)
+        self.assertEqual(cache.get('k:lock'), 'other')
+        cache.delete('k:lock')
+        get_or_refresh('k', self.compute, 60, version=2)
+        self.assertIsNone(cache.get('k:lock'))
+
+    def test_template_tag(self):
+        """Тег swrcache кэширует фрагмент по vary_on и версии."""
+        source = Template(
+            '{% load swr_cache %}'
+            '{% swrcache 60 fragment page version=version %}'
+            '{{ value }}{% endswrcache %}'
+        )
+        render = source.render
+        self.assertEqual(
+            render(Context({'page': 1, 'version': 1, 'value': 'a'})), 'a'
+        )
+        self.assertEqual(
+            render(Context({'page': 1, 'version': 1, 'value': 'b'})), 'a'
+        )
+        self.assertEqual(
+            render(Context({'page': 2, 'version': 1, 'value': 'b'})), 'b'
+        )
+        self.assertEqual(
+            render(Context({'page': 1, 'version': 2, 'value': 'c'})), 'c'
+        )
+
+
+class QueryInspectorTests(TestCase):
+    def test_normalize_collapses_literals(self):
+        """Запросы, различающиеся параметрами, имеют одну форму."""
+        self.assertEqual(
+            normalize('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 21'),
+            normalize("SELECT * FROM t WHERE id IN (%s) LIMIT 10")
+        )
+
+    def test_recorder_finds_repeated_queries(self):
+        """Одинаковые запросы в цикле распознаются как N+1."""
+        User = get_user_model()
+        with QueryRecorder() as recorder:
+            for pk in range(4):
+                User.objects.filter(pk=pk).exists()
+        self.assertEqual(len(recorder), 4)
+        self.assertEqual(len(recorder.repeated()), 1)
+        self.assertTrue(recorder.problems(budget=10))
+
+    @override_settings(QUERY_INSPECTOR=True, QUERY_INSPECTOR_STRICT=True)
+    def test_middleware_reports_query_count(self):
+        """Промежуточный слой сообщает число запросов страницы."""
+        response = Client().get('/about/author/')
+        self.assertEqual(response['X-Query-Count'], '0')
+
+    @override_settings(QUERY_INSPECTOR=True, QUERY_INSPECTOR_STRICT=True)
+    def test_middleware_enforces_budget(self):
+        """В строгом режиме превышение бюджета вызывает ошибку."""
+        cache.clear()
+        budget = views.index.query_budget
+        views.index.query_budget = 0
+        try:
+            with self.assertRaises(ImproperlyConfigured):
+                Client().get('/')
+        finally:
+            views.index.query_budget = budget
+
+
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=1)
+    def test_server_timing_header(self):
+        """Замеренный запрос получает Server-Timing и строку журнала."""
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            response = Client().get('/')
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['db_queries'], 0)
+        self.assertGreater(record['template_ms'], 0)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_request(self):
+        """Запрос вне выборки не замеряется."""
+        response = Client().get('/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_cache_hits_and_misses(self):
+        """Чтения кэша считаются один раз, в том числе через get_many."""
+        timing.install()
+        cache.set('present', 1)
+        with timing.measure() as timings:
+            cache.get('present')
+            cache.get('absent')
+            self.assertEqual(cache.get('absent', 'default'), 'default')
+            cache.get_many(['present', 'absent'])
+        self.assertEqual(timings.cache_hits, 2)
+        self.assertEqual(timings.cache_misses, 3)
+
+    def test_cache_reads_inside_templates(self):
+        """Чтения кэша во время рендеринга шаблона тоже учитываются."""
+        timing.install()
+        cache.set('present', 1)
+        template = Template('{{ value }}')
+        with timing.measure() as timings:
+            template.render(Context({'value': lambda: cache.get('present')}))
+        self.assertEqual(timings.cache_hits, 1)
+        self.assertGreater(timings.template, 0)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.REGISTRY.clear()
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=1)
+    def test_requests_are_exposed(self):
+        """Запросы к представлениям видны на /metrics/."""
+        client = Client()
+        client.get('/')
+        client.get('/')
+        body = client.get('/metrics/').content.decode()
+        self.assertIn(
+            'yatube_http_requests_total{view="posts:index",status="200"} 2',
+            body
+        )
+        self.assertIn(
+            'yatube_http_request_duration_seconds_count'
+            '{view="posts:index",method="GET"} 2',
+            body
+        )
+        self.assertIn('yatube_db_queries_total{view="posts:index"}', body)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_breakdown_only_for_sampled_requests(self):
+        """Запрос вне выборки учитывается без замера базы и кэша."""
+        Client().get('/')
+        body = metrics.REGISTRY.expose()
+        self.assertIn(
+            'yatube_http_requests_total{view="posts:index",status="200"} 1',
+            body
+        )
+        self.assertNotIn('yatube_db_queries_total{', body)
+
+    def test_forbidden_for_other_addresses(self):
+        """Метрики закрыты для адресов вне METRICS_ALLOWED_IPS."""
+        response = Client(REMOTE_ADDR='10.0.0.1').get('/metrics/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_series_are_bounded(self):
+        """Наборы меток сверх max_series складываются в один."""
+        counter = metrics.Counter('test_total', 'Тест', ('key',), 2)
+        for key in 'abcd':
+            counter.inc(key=key)
+        self.assertEqual(
+            {tuple(key): value for key, value in counter.snapshot()},
+            {('a',): 1, ('b',): 1, (metrics.OVERFLOW,): 2}
+        )
+
+    def test_processes_are_summed(self):
+        """В многопроцессном режиме значения процессов складываются."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        metrics.THUMBNAILS.inc(result='ok')
+        name = f'{os.getpid()}-other.json'
+        with open(os.path.join(directory, name), 'w') as stream:
+            json.dump({
+                metrics.THUMBNAILS.name: [[['ok'], 2], [['error'], 1]],
+                'unknown_total': [[[], 5]],
+            }, stream)
+        with override_settings(METRICS_MULTIPROCESS_DIR=directory):
+            body = metrics.REGISTRY.expose()
+        self.assertIn(
+            'yatube_thumbnail_generations_total{result="ok"} 3', body
+        )
+        self.assertIn(
+            'yatube_thumbnail_generations_total{result="error"} 1', body
+        )
+        self.assertNotIn('unknown_total', body)
+
+    def test_dead_processes_are_folded(self):
+        """Значения умершего процесса сохраняются в общем итоге."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        process = subprocess.Popen(['true'])
+        process.wait()
+        name = f'{process.pid}-dead.json'
+        with open(os.path.join(directory, name), 'w') as stream:
+            json.dump({metrics.THUMBNAILS.name: [[['ok'], 2]]}, stream)
+        with override_settings(METRICS_MULTIPROCESS_DIR=directory):
+            metrics.REGISTRY.expose()
+            body = metrics.REGISTRY.expose()
+        self.assertFalse(os.path.exists(os.path.join(directory, name)))
+        self.assertIn(
+            'yatube_thumbnail_generations_total{result="ok"} 2', body
+        )
+
+
+class ProfilerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def profiles(self, view):
+        directory = os.path.join(self.directory, view)
+        if not os.path.isdir(directory):
+            return []
+        return os.listdir(directory)
+
+    def test_sampler_collects_stacks(self):
+        """Выборка находит функцию, в которой поток проводит время."""
+        sampler = profiling.Sampler(0.001)
+        stacks = sampler.start()
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        self.assertIs(sampler.stop(), stacks)
+        self.assertTrue(stacks)
+        self.assertTrue(all(
+            'test_sampler_collects_stacks (' in stack for stack in stacks
+        ))
+
+    def test_slow_requests_are_saved(self):
+        """Запрос дольше порога сохраняется в каталог представления."""
+        with override_settings(PROFILER=True, PROFILER_THRESHOLD=0,
+                               PROFILER_DIR=self.directory):
+            Client().get('/')
+        self.assertEqual(len(self.profiles('posts.index')), 1)
+
+    def test_signed_header(self):
+        """Без порога сохраняются только запросы с подписанным заголовком."""
+        with override_settings(PROFILER=True, PROFILER_THRESHOLD=None,
+                               PROFILER_DIR=self.directory):
+            client = Client()
+            client.get('/', HTTP_X_PROFILE='forged')
+            self.assertEqual(self.profiles('posts.index'), [])
+            client.get('/', HTTP_X_PROFILE=profiling.make_token())
+        self.assertEqual(len(self.profiles('posts.index')), 1)
+
+    def test_old_profiles_are_pruned(self):
+        """Сверх PROFILER_MAX_FILES удаляются самые старые профили."""
+        directory = os.path.join(self.directory, 'posts.index')
+        os.makedirs(directory)
+        for age in range(3):
+            path = os.path.join(directory, f'old-{age}.folded')
+            with open(path, 'w') as stream:
+                stream.write('main (m.py) 1\n')
+            stamp = time.time() - 100 * (age + 1)
+            os.utime(path, (stamp, stamp))
+        with override_settings(PROFILER=True, PROFILER_THRESHOLD=0,
+                               PROFILER_DIR=self.directory,
+                               PROFILER_MAX_FILES=2):
+            Client().get('/')
+        profiles = self.profiles('posts.index')
+        self.assertEqual(len(profiles), 2)
+        self.assertIn('old-0.folded', profiles)
+
+    def test_aggregate_profiles(self):
+        """Команда складывает стеки всех запросов представления."""
+        directory = os.path.join(self.directory, 'posts.profile')
+        os.makedirs(directory)
+        for name, count in (('a', 2), ('b', 3)):
+            with open(os.path.join(directory, name + '.folded'), 'w') as f:
+                f.write(f'main (m.py);render (t.py) {count}\n')
+                f.write('main (m.py);query (q.py) 1\n')
+        out = StringIO()
+        call_command('aggregate_profiles', dir=self.directory, stdout=out)
+        merged = profiling.read_stacks(
+            os.path.join(self.directory, 'posts.profile.folded')
+        )
+        self.assertEqual(merged, {
+            'main (m.py);render (t.py)': 5,
+            'main (m.py);query (q.py)': 2,
+        })
+        self.assertIn('render (t.py)', out.getvalue())
+
+
+class PubSubTests(TestCase):
+    def test_local_broker_wakes_waiting_reader(self):
+        """Ожидающий подписчик получает событие сразу после публикации."""
+        broker = pubsub.LocalBroker()
+        first = broker.publish('channel', 'first')
+        timer = threading.Timer(
+            0.05, broker.publish, args=('channel', 'second')
+        )
+        timer.start()
+        self.assertEqual(
+            broker.wait('channel', first, timeout=5), [(first + 1, 'second')]
+        )
+        self.assertEqual(
+            broker.wait('channel', first + 1, timeout=0.01), []
+        )
+
+    def test_local_numbering_survives_restart(self):
+        """Номера нового процесса больше номеров прежнего."""
+        old = pubsub.LocalBroker()
+        old.publish('channel', 'a')
+        last = old.publish('channel', 'b')
+        self.assertGreater(pubsub.LocalBroker().publish('channel', 'c'), last)
+
+    def test_cache_broker(self):
+        """Через кэш события читаются по порядку после номера."""
+        cache.clear()
+        broker = pubsub.CacheBroker(poll_interval=0.01)
+        self.assertEqual(broker.publish('channel', 'a'), 1)
+        self.assertEqual(broker.publish('channel', 'b'), 2)
+        self.assertEqual(broker.since('channel', 1), [(2, 'b')])
+        self.assertEqual(broker.wait('channel', 2, timeout=0.05), [])
+
+    def test_cache_broker_waits_for_unwritten_event(self):
+        """Событие с выданным, но не записанным номером не теряется."""
+        cache.clear()
+        broker = pubsub.CacheBroker()
+        broker.publish('channel', 'a')
+        cache.incr('pubsub:channel:last')
+        broker.publish('channel', 'c')
+        self.assertEqual(broker.since('channel', 0), [(1, 'a')])
+        cache.set('pubsub:channel:2', (time.time(), 'b'))
+        self.assertEqual(
+            broker.since('channel', 1), [(2, 'b'), (3, 'c')]
+        )
+
+    def test_cache_broker_skips_lost_event(self):
+        """Номер без события пропускается, когда следующие давно записаны."""
+        cache.clear()
+        broker = pubsub.CacheBroker()
+        cache.set('pubsub:channel:last', 2, None)
+        cache.set(
+            'pubsub:channel:2', (time.time() - pubsub.GAP_TIMEOUT - 1, 'b')
+        )
+        self.assertEqual(broker.since('channel', 0), [(2, 'b')])
+
+
+def echo_app(environ, start_response):
+    """WSGI-приложение, отвечающее методом, путём и телом запроса."""
+    body = environ['wsgi.input'].read()
+    start_response('201 Created', [('Content-Type', 'text/plain')])
+    yield f'{environ["REQUEST_METHOD"]} {environ["PATH_INFO"]} '.encode(
+        'latin-1'
+    )
+    yield body
+
+
+async def call_asgi(application, scope, messages):
+    """Отправленные приложением сообщения; после messages — отключение."""
+    incoming = list(messages)
+    sent = []
+
+    async def receive():
+        if incoming:
+            return incoming.pop(0)
+        await asyncio.sleep(0.05)
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await application(scope, receive, send)
+    return sent
+
+
+class AsgiTests(TestCase):
+    def setUp(self):
+        self.application = asgi.WsgiToAsgi(echo_app, max_workers=2)
+        self.addCleanup(self.application.executor.shutdown)
+
+    def test_request_runs_in_pool(self):
+        """Тело запроса по частям доходит до WSGI, ответ — до клиента."""
+        sent = asyncio.run(call_asgi(self.application, {
+            'type': 'http',
+            'method': 'POST',
+            'path': '/путь/',
+            'headers': [(b'content-type', b'text/plain')],
+        }, [
+            {'type': 'http.request', 'body': b'a', 'more_body': True},
+            {'type': 'http.request', 'body': b'b'},
+        ]))
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertEqual(
+            sent[0]['headers'], [(b'content-type', b'text/plain')]
+        )
+        body = b''.join(message['body'] for message in sent[1:])
+        self.assertEqual(body.decode(), 'POST /путь/ ab')
+        self.assertFalse(sent[-1].get('more_body', False))
+
+    def test_streaming_response_stays_on_one_thread(self):
+        """Фрагменты потокового ответа и close() выполняются в потоке,
+        который вызвал приложение, даже когда ответов несколько."""
+        threads = defaultdict(list)
+
+        class Response:
+            def __init__(self, path):
+                self.path = path
+
+            def __iter__(self):
+                for number in range(5):
+                    threads[self.path].append(threading.get_ident())
+                    time.sleep(0.005)
+                    yield str(number).encode()
+
+            def close(self):
+                threads[self.path].append(threading.get_ident())
+
+        def streaming_app(environ, start_response):
+            threads[environ['PATH_INFO']].append(threading.get_ident())
+            start_response('200 OK', [])
+            return Response(environ['PATH_INFO'])
+
+        application = asgi.WsgiToAsgi(streaming_app, max_workers=4)
+        self.addCleanup(application.executor.shutdown)
+
+        async def main():
+            return await asyncio.gather(*(
+                call_asgi(application, {
+                    'type': 'http', 'method': 'GET', 'path': f'/{number}/',
+                }, [{'type': 'http.request'}])
+                for number in range(3)
+            ))
+
+        for sent in asyncio.run(main()):
+            body = b''.join(message.get('body', b'') for message in sent[1:])
+            self.assertEqual(body, b'01234')
+        self.assertEqual(len(threads), 3)
+        for path, idents in threads.items():
+            self.assertEqual(len(idents), 7, path)
+            self.assertEqual(len(set(idents)), 1, path)
+
+    def test_application_error_is_raised(self):
+        """Ошибка приложения до start_response доходит до сервера."""
+        def broken_app(environ, start_response):
+            raise RuntimeError('сбой')
+
+        application = asgi.WsgiToAsgi(broken_app, max_workers=1)
+        self.addCleanup(application.executor.shutdown)
+        with self.assertRaises(RuntimeError):
+            asyncio.run(call_asgi(application, {
+                'type': 'http', 'method': 'GET', 'path': '/',
+            }, [{'type': 'http.request'}]))
+
+    def test_environ_headers(self):
+        environ = asgi.build_environ({
+            'method': 'GET',
+            'path': '/',
+            'query_string': b'a=1',
+            'headers': [
+                (b'cookie', b'a=1'), (b'cookie', b'b=2'),
+                (b'content-length', b'0'), (b'x-forwarded-for', b'1.2.3.4'),
+            ],
+            'client': ('127.0.0.1', 5000),
+        }, b'')
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+        self.assertEqual(environ['CONTENT_LENGTH'], '0')
+        self.assertEqual(environ['HTTP_X_FORWARDED_FOR'], '1.2.3.4')
+        self.assertEqual(environ['QUERY_STRING'], 'a=1')
+        self.assertEqual(environ['REMOTE_ADDR'], '127.0.0.1')
+
+    def test_lifespan(self):
+        sent = asyncio.run(call_asgi(self.application, {'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'},
+        ]))
+        self.assertEqual([message['type'] for message in sent], [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete',
+        ])
+
+    def test_router(self):
+        """Пути из routes уходят своему приложению, остальные — default."""
+        router = asgi.PathRouter({'/other/': self.application}, None)
+        sent = asyncio.run(call_asgi(router, {
+            'type': 'http', 'method': 'GET', 'path': '/other/',
+        }, [{'type': 'http.request'}]))
+        self.assertEqual(sent[0]['status'], 201)
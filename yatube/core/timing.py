@@ -0,0 +1,156 @@
+"""Замер времени запроса: база данных, шаблоны и кэш.
+
+Хуки на рендеринг шаблонов и чтение кэша ставятся один раз и ничего
+не делают, пока в потоке нет активного замера, поэтому запросы, не
+попавшие в выборку, почти ничего не теряют.
+
+    with timing.measure() as timings:
+        ...
+
+Вложенный measure() возвращает уже идущий замер.
+"""
+import functools
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template.base import Template
+
+_local = threading.local()
+_installed = False
+_MISSING = object()
+
+
+class Timings:
+    """Показатели одного запроса; время в секундах."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.template = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.db_queries = 0
+        self.db = 0.0
+        # Глубина вложенных вызовов по видам хуков: чтения кэша внутри
+        # рендеринга шаблона тоже учитываются.
+        self._depth = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.db_queries += 1
+
+    @property
+    def total(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing."""
+        return ', '.join((
+            f'db;dur={self.db * 1000:.1f};desc="{self.db_queries} queries"',
+            f'tpl;dur={self.template * 1000:.1f}',
+            f'cache;desc="{self.cache_hits} hits, '
+            f'{self.cache_misses} misses"',
+            f'total;dur={self.total * 1000:.1f}',
+        ))
+
+    def as_dict(self):
+        return {
+            'duration_ms': round(self.total * 1000, 3),
+            'db_ms': round(self.db * 1000, 3),
+            'db_queries': self.db_queries,
+            'template_ms': round(self.template * 1000, 3),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def current():
+    """Замер, идущий в этом потоке, или None."""
+    return getattr(_local, 'timings', None)
+
+
+@contextmanager
+def measure():
+    """Замеряет код внутри блока; запросы к базе — всех соединений."""
+    timings = current()
+    if timings is not None:
+        yield timings
+        return
+    timings = _local.timings = Timings()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timings))
+            yield timings
+    finally:
+        timings.finished = time.perf_counter()
+        _local.timings = None
+
+
+def _outermost(method, account, kind):
+    """Учитывает только внешний вызов своего вида kind: вложенные include
+    и get_many, вызывающий get, не считаются дважды."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        timings = current()
+        if timings is None or timings._depth.get(kind):
+            return method(self, *args, **kwargs)
+        timings._depth[kind] = 1
+        try:
+            return account(timings, method, self, *args, **kwargs)
+        finally:
+            timings._depth[kind] = 0
+    wrapper.timed = True
+    return wrapper
+
+
+def _render(timings, method, template, *args, **kwargs):
+    started = time.perf_counter()
+    try:
+        return method(template, *args, **kwargs)
+    finally:
+        timings.template += time.perf_counter() - started
+
+
+def _get(timings, method, cache, key, default=None, *args, **kwargs):
+    value = method(cache, key, _MISSING, *args, **kwargs)
+    if value is _MISSING:
+        timings.cache_misses += 1
+        return default
+    timings.cache_hits += 1
+    return value
+
+
+def _get_many(timings, method, cache, keys, *args, **kwargs):
+    keys = list(keys)
+    values = method(cache, keys, *args, **kwargs)
+    timings.cache_hits += len(values)
+    timings.cache_misses += len(keys) - len(values)
+    return values
+
+
+def _patch(cls, name, account, kind):
+    method = getattr(cls, name)
+    if not getattr(method, 'timed', False):
+        setattr(cls, name, _outermost(method, account, kind))
+
+
+def install():
+    """Ставит хуки на Template.render и на бэкенды кэшей из CACHES."""
+    global _installed
+    if _installed:
+        return
+    _patch(Template, 'render', _render, 'template')
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        _patch(backend, 'get', _get, 'cache')
+        _patch(backend, 'get_many', _get_many, 'cache')
+    _installed = True
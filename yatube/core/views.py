@@ -1,5 +1,10 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from . import metrics as registry
+
 
 def page_not_found(request, exception):
     return render(
@@ -18,3 +23,13 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+def metrics(request):
+    """Метрики всех процессов в текстовом формате Prometheus."""
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', None)
+    if allowed is not None and request.META.get('REMOTE_ADDR') not in allowed:
+        raise PermissionDenied
+    return HttpResponse(
+        registry.REGISTRY.expose(), content_type=registry.CONTENT_TYPE
+    )
@@ -0,0 +1,85 @@
+"""Поток событий /events/ как собственное приложение ASGI.
+
+Под WSGI каждое открытое соединение EventSource держит поток сервера до
+SSE_MAX_DURATION секунд. Здесь соединение живёт в цикле событий, а поток
+из пула берётся только на короткий опрос брокера; поэтому поток можно не
+закрывать по таймеру.
+"""
+import asyncio
+import time
+from urllib.parse import parse_qs
+
+from django.conf import settings
+
+from core.asgi import read_body, wait_disconnect
+
+from . import events
+
+POLL_INTERVAL = 0.5
+HEADERS = [
+    (b'content-type', b'text/event-stream'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+]
+
+
+def _params(scope):
+    """Пост из ?post= и номер последнего полученного события."""
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    headers = dict(scope.get('headers', ()))
+    post_id = query.get('post', [None])[0]
+    after = (
+        headers.get(b'last-event-id', b'').decode('latin-1')
+        or query.get('after', [None])[0]
+    )
+    post_id = int(post_id) if post_id else None
+    after = int(after) if after else None
+    return post_id, after
+
+
+async def _send_text(send, text):
+    await send({
+        'type': 'http.response.body',
+        'body': text.encode(),
+        'more_body': True,
+    })
+
+
+async def event_stream(scope, receive, send):
+    """Server-Sent Events о новых постах и комментариях к ?post=."""
+    if await read_body(receive) is None:
+        return
+    try:
+        post_id, after = _params(scope)
+    except ValueError:
+        await send({'type': 'http.response.start', 'status': 400})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    loop = asyncio.get_running_loop()
+    if after is None:
+        after = await loop.run_in_executor(None, events.last_id)
+    heartbeat = getattr(settings, 'SSE_HEARTBEAT', events.HEARTBEAT)
+    interval = getattr(settings, 'ASGI_EVENTS_POLL_INTERVAL', POLL_INTERVAL)
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start', 'status': 200, 'headers': HEADERS,
+        })
+        await _send_text(send, f'retry: {events.RETRY_MS}\n\n')
+        quiet_since = time.monotonic()
+        while not disconnected.done():
+            after, found = await loop.run_in_executor(
+                None, events.poll, after, post_id
+            )
+            if found:
+                await _send_text(send, ''.join(
+                    events.format_event(event_id, event)
+                    for event_id, event in found
+                ))
+                quiet_since = time.monotonic()
+            elif time.monotonic() - quiet_since >= heartbeat:
+                await _send_text(send, ': keep-alive\n\n')
+                quiet_since = time.monotonic()
+            await asyncio.wait((disconnected,), timeout=interval)
+    finally:
+        disconnected.cancel()
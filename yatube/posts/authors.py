@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.db.models.functions import Upper
+from django.http import Http404
+
+from .models import User
+
+USERNAME_CACHE_SIZE = 4096
+
+
+class UsernameCache:
+    """LRU-кэш соответствия username → id пользователя в памяти процесса.
+
+    Обратное соответствие id → имена позволяет сбросить записи
+    пользователя без обхода всего кэша.
+    """
+
+    def __init__(self, maxsize=USERNAME_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._names = {}
+        self._lock = Lock()
+
+    def get(self, username):
+        with self._lock:
+            pk = self._data.get(username)
+            if pk is not None:
+                self._data.move_to_end(username)
+            return pk
+
+    def _pop(self, username):
+        pk = self._data.pop(username, None)
+        if pk is not None:
+            names = self._names[pk]
+            names.discard(username)
+            if not names:
+                del self._names[pk]
+
+    def set(self, username, pk):
+        with self._lock:
+            self._pop(username)
+            self._data[username] = pk
+            self._names.setdefault(pk, set()).add(username)
+            while len(self._data) > self.maxsize:
+                self._pop(next(iter(self._data)))
+
+    def discard(self, username):
+        with self._lock:
+            self._pop(username)
+
+    def discard_user(self, pk):
+        """Убирает все имена, указывающие на пользователя pk."""
+        with self._lock:
+            for username in self._names.pop(pk, ()):
+                del self._data[username]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._names.clear()
+
+
+username_cache = UsernameCache()
+
+
+def case_insensitive():
+    return getattr(settings, 'POSTS_USERNAME_CASE_INSENSITIVE', False)
+
+
+def _cache_key(username):
+    return username.upper() if case_insensitive() else username
+
+
+def _matches(user, username):
+    if case_insensitive():
+        return user.username.upper() == username.upper()
+    return user.username == username
+
+
+def resolve_username(username, queryset):
+    """Пользователь по точному имени (или без учёта регистра)."""
+    if not case_insensitive():
+        users = queryset.filter(username=username)
+    else:
+        users = queryset.annotate(
+            username_upper=Upper('username')
+        ).filter(username_upper=username.upper()).order_by('pk')
+    candidates = list(users)
+    for user in candidates:
+        if user.username == username:
+            return user
+    if not candidates:
+        raise Http404('Пользователь не найден.')
+    return candidates[0]
+
+
+def get_author_or_404(username, queryset=None):
+    """Пользователь по имени из URL; имя → id кэшируется в процессе."""
+    if queryset is None:
+        queryset = User.objects.all()
+    key = _cache_key(username)
+    pk = username_cache.get(key)
+    if pk is not None:
+        user = queryset.filter(pk=pk).first()
+        if user is not None and _matches(user, username):
+            return user
+        username_cache.discard(key)
+    user = resolve_username(username, queryset)
+    username_cache.set(key, user.pk)
+    return user
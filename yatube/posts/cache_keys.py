@@ -0,0 +1,77 @@
+"""Версионированные ключи кэша.
+
+Каждая область данных (вся лента, автор, группа, пост, лента подписок
+пользователя) имеет счётчик поколения. Кэшированные фрагменты включают
+поколения своих областей в ключ, а запись данных повышает поколение
+только затронутых областей вместо полной очистки кэша.
+"""
+from time import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+ALL_POSTS = ('posts',)
+HOT = ('hot',)
+
+
+def author(author_id):
+    return ('author', author_id)
+
+
+def group(group_id):
+    return ('group', group_id)
+
+
+def post(post_id):
+    return ('post', post_id)
+
+
+def feed(user_id):
+    return ('feed', user_id)
+
+
+def _key(scope):
+    return 'gen:' + ':'.join(str(part) for part in scope)
+
+
+def _now():
+    # Поколение — время изменения в микросекундах: после вытеснения
+    # из кэша значение не повторится.
+    return int(time() * 1_000_000)
+
+
+def get_generations(*scopes):
+    """Текущие поколения областей одним запросом к кэшу."""
+    keys = [_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _now(), None)
+            found[key] = cache.get(key) or _now()
+    return [found[key] for key in keys]
+
+
+def cache_version(*scopes):
+    """Строка версии для ключа фрагмента кэша."""
+    return '.'.join(str(generation) for generation in get_generations(
+        *scopes
+    ))
+
+
+def _set(keys):
+    now = _now()
+    cache.set_many({key: now for key in keys}, None)
+
+
+def bump(*scopes):
+    """Повышает поколения областей.
+
+    Внутри транзакции поколение повышается ещё раз после коммита, чтобы
+    сбросить фрагменты, закэшированные параллельными запросами до него.
+    """
+    keys = [_key(scope) for scope in scopes if scope[-1] is not None]
+    if not keys:
+        return
+    _set(keys)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _set(keys))
@@ -0,0 +1,106 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def _change(queryset, field, delta):
+    """Атомарно меняет счётчик, не опуская его ниже нуля."""
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def change_user(user_id, field, delta):
+    """Меняет счётчик пользователя; недостающую запись пересчитывает."""
+    updated = _change(UserStats.objects.filter(pk=user_id), field, delta)
+    if not updated and delta > 0:
+        recount_user(user_id)
+
+
+def change_group(group_id, delta):
+    if group_id is not None:
+        _change(Group.objects.filter(pk=group_id), 'posts_count', delta)
+
+
+def change_post(post_id, delta):
+    _change(Post.objects.filter(pk=post_id), 'comments_count', delta)
+
+
+def get_stats(user):
+    """Счётчики пользователя; отсутствующие создаются пересчётом."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        recount_user(user.pk)
+        return UserStats.objects.get(pk=user.pk)
+
+
+def recount_user(user_id):
+    """Пересчитывает счётчики одного пользователя по исходным таблицам."""
+    counts = {
+        'posts_count': Post.objects.filter(author_id=user_id).count(),
+        'followers_count': Follow.objects.filter(author_id=user_id).count(),
+        'following_count': Follow.objects.filter(user_id=user_id).count(),
+    }
+    try:
+        with transaction.atomic():
+            UserStats.objects.update_or_create(
+                user_id=user_id,
+                defaults=counts
+            )
+    except IntegrityError:
+        pass
+
+
+def _count_of(model, field):
+    """Подзапрос с количеством строк model, ссылающихся на запись."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')}).order_by()
+            .values(field).annotate(total=Count('pk')).values('total')
+        ),
+        0
+    )
+
+
+def _repair(queryset, field, actual):
+    """Исправляет записи, где счётчик разошёлся с фактом."""
+    return (
+        queryset.annotate(actual=actual)
+        .exclude(**{field: F('actual')})
+        .update(**{field: actual})
+    )
+
+
+def recount_all(batch_size=1000):
+    """Пересчитывает все счётчики пачками; возвращает число исправлений."""
+    users = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True
+    )
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk) for pk in users.iterator()),
+        batch_size=batch_size,
+        ignore_conflicts=True
+    )
+    return {
+        'group.posts_count': _repair(
+            Group.objects.all(), 'posts_count', _count_of(Post, 'group')
+        ),
+        'post.comments_count': _repair(
+            Post.objects.all(), 'comments_count', _count_of(Comment, 'post')
+        ),
+        'user.posts_count': _repair(
+            UserStats.objects.all(), 'posts_count',
+            _count_of(Post, 'author')
+        ),
+        'user.followers_count': _repair(
+            UserStats.objects.all(), 'followers_count',
+            _count_of(Follow, 'author')
+        ),
+        'user.following_count': _repair(
+            UserStats.objects.all(), 'following_count',
+            _count_of(Follow, 'user')
+        ),
+    }
@@ -0,0 +1,77 @@
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from core.asgi import ENVIRON_KEY
+from core.cache import get_ttl
+
+from . import cache_keys
+
+PAGE_TTL_FAMILY = 'page'
+CACHED_HEADERS = ('Content-Type', 'Content-Language', 'Vary')
+
+
+def _page_key(request, generations):
+    # Под ASGI страница открывает поток событий, под WSGI — опрос.
+    server_push = request.META.get(ENVIRON_KEY, False)
+    raw = f'{request.get_full_path()}|{generations}|{server_push}'
+    return 'page:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def cache_anonymous_page(get_scopes):
+    """Кэширует страницу целиком для анонимных читателей.
+
+    `get_scopes(request, **kwargs)` возвращает области данных страницы
+    (см. cache_keys). Их поколения входят в ключ кэша и в ETag, а самое
+    позднее изменение даёт Last-Modified. Запись поста или комментария
+    повышает поколения, так что кэш сбрасывается сигналами. Условные
+    GET-запросы получают 304 без обращения к представлению.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            generations = cache_keys.get_generations(
+                *get_scopes(request, **kwargs)
+            )
+            key = _page_key(request, generations)
+            etag = quote_etag(key[len('page:'):])
+            last_modified = max(generations) // 1_000_000
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                return response
+            cached = cache.get(key)
+            if cached is not None:
+                content, headers = cached
+                response = HttpResponse(content)
+                for header, value in headers.items():
+                    response[header] = value
+            else:
+                response = view(request, *args, **kwargs)
+                if (response.status_code != 200 or response.streaming
+                        or response.cookies
+                        or request.META.get('CSRF_COOKIE_USED')):
+                    return response
+                headers = {
+                    header: response[header]
+                    for header in CACHED_HEADERS if response.has_header(header)
+                }
+                cache.set(
+                    key,
+                    (response.content, headers),
+                    get_ttl(PAGE_TTL_FAMILY)
+                )
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,117 @@
+"""Лёгкие события о новых постах и комментариях для читателей.
+
+События публикуются после коммита в канал CHANNEL брокера core.pubsub
+и несут только номера: клиент сам решает, перезагрузить ли ленту или
+комментарии. Отдаются потоком Server-Sent Events или опросом.
+"""
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from core.pubsub import get_broker
+
+CHANNEL = 'posts'
+HEARTBEAT = 15
+MAX_DURATION = 5 * 60
+RETRY_MS = 5000
+
+logger = logging.getLogger(__name__)
+
+
+def _send(event):
+    """Публикует событие; сбой брокера не должен ронять запрос, который
+    уже сохранил пост, поэтому он только записывается в журнал."""
+    try:
+        get_broker().publish(CHANNEL, event)
+    except Exception:
+        logger.exception('Не удалось опубликовать событие %s', event)
+
+
+def _publish(event):
+    transaction.on_commit(lambda: _send(event))
+
+
+def post_created(post):
+    _publish({
+        'type': 'post',
+        'post': post.pk,
+        'author': post.author_id,
+        'group': post.group_id,
+    })
+
+
+def comment_created(comment):
+    _publish({
+        'type': 'comment',
+        'post': comment.post_id,
+        'comment': comment.pk,
+    })
+
+
+def matches(event, post_id=None):
+    """Событие нужно подписчику: новые посты всем, комментарии —
+    только подписчикам своего поста."""
+    return event['type'] == 'post' or event['post'] == post_id
+
+
+def last_id():
+    return get_broker().last_id(CHANNEL)
+
+
+def resume_point(after):
+    """after, а если канал начал нумерацию заново — его последний номер."""
+    return min(after, last_id())
+
+
+def poll(after, post_id=None):
+    """Номер последнего просмотренного события и нужные события после
+    after: [(номер, событие)]."""
+    after = resume_point(after)
+    found = get_broker().since(CHANNEL, after)
+    last = found[-1][0] if found else after
+    return last, [
+        (event_id, event) for event_id, event in found
+        if matches(event, post_id)
+    ]
+
+
+def format_event(event_id, event):
+    return (
+        f'id: {event_id}\n'
+        f'event: {event["type"]}\n'
+        f'data: {json.dumps(event)}\n\n'
+    )
+
+
+def stream(after, post_id=None):
+    """Строки SSE после события after.
+
+    Поток закрывается через SSE_MAX_DURATION секунд, браузер сам
+    переподключается с Last-Event-ID; так соединение не держит поток
+    WSGI-сервера бесконечно.
+    """
+    broker = get_broker()
+    after = resume_point(after)
+    heartbeat = getattr(settings, 'SSE_HEARTBEAT', HEARTBEAT)
+    deadline = time.monotonic() + getattr(
+        settings, 'SSE_MAX_DURATION', MAX_DURATION
+    )
+    yield f'retry: {RETRY_MS}\n\n'
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events = broker.wait(CHANNEL, after, min(heartbeat, remaining))
+        if not events:
+            yield ': keep-alive\n\n'
+            continue
+        after = events[-1][0]
+        chunk = ''.join(
+            format_event(event_id, event)
+            for event_id, event in events if matches(event, post_id)
+        )
+        if chunk:
+            yield chunk
@@ -0,0 +1,58 @@
+from itertools import islice
+
+from .models import FeedItem, Follow, Post
+
+FEED_BATCH_SIZE = 500
+
+
+def _bulk_insert(items):
+    """Вставляет записи ленты пачками, пропуская уже существующие."""
+    items = iter(items)
+    while True:
+        batch = list(islice(items, FEED_BATCH_SIZE))
+        if not batch:
+            break
+        FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def follower_ids(author_id):
+    """Id подписчиков автора."""
+    return list(
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True)
+    )
+
+
+def fan_out_post(post, followers):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    _bulk_insert(
+        FeedItem(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date
+        )
+        for user_id in followers
+    )
+
+
+def add_author_to_feed(user_id, author_id):
+    """Добавляет все посты автора в ленту подписчика."""
+    posts = (
+        Post.objects.filter(author_id=author_id).order_by()
+        .values_list('pk', 'pub_date').iterator()
+    )
+    _bulk_insert(
+        FeedItem(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date
+        )
+        for post_id, pub_date in posts
+    )
+
+
+def remove_author_from_feed(user_id, author_id):
+    """Убирает посты автора из ленты бывшего подписчика."""
+    FeedItem.objects.filter(user_id=user_id, author_id=author_id).delete()
@@ -0,0 +1,254 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+После сохранения поста с новой картинкой миниатюры нужных размеров и
+форматов создаются в пуле потоков и записываются в PostImageVariant,
+поэтому при отрисовке ленты Pillow не вызывается, а карточки получают
+готовый srcset. Сведения о картинках всей страницы читаются из кэша
+одним запросом (resolve_images).
+"""
+import hashlib
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import features
+from sorl.thumbnail import get_thumbnail
+
+from core import metrics
+from core.cache import get_ttl
+
+from . import cache_keys
+from .models import Post, PostImageVariant
+
+logger = logging.getLogger(__name__)
+
+# Должны совпадать с параметрами {% thumbnail %} в шаблонах.
+THUMBNAIL_WIDTH = 960
+THUMBNAIL_HEIGHT = 339
+THUMBNAIL_GEOMETRY = f'{THUMBNAIL_WIDTH}x{THUMBNAIL_HEIGHT}'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+VARIANT_WIDTHS = (320, 640, THUMBNAIL_WIDTH)
+BASE_FORMAT = 'JPEG'
+# Браузер берёт первый поддерживаемый формат, поэтому AVIF — первым.
+MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+}
+IMAGE_TTL_FAMILY = 'image'
+
+_executor = None
+_executor_lock = Lock()
+_pending = set()
+
+
+def _supported(module):
+    try:
+        return features.check_module(module)
+    except ValueError:
+        return False
+
+
+def extra_formats():
+    """Дополнительные форматы, которые умеет сохранять Pillow."""
+    return [
+        image_format for image_format, module in (
+            ('WEBP', 'webp'),
+            ('AVIF', 'avif'),
+        ) if _supported(module)
+    ]
+
+
+def variant_geometry(width):
+    return f'{width}x{round(width * THUMBNAIL_HEIGHT / THUMBNAIL_WIDTH)}'
+
+
+def _build_variants(post_id, image_name):
+    for image_format in [BASE_FORMAT] + extra_formats():
+        for width in VARIANT_WIDTHS:
+            thumbnail = get_thumbnail(
+                image_name,
+                variant_geometry(width),
+                format=image_format,
+                **THUMBNAIL_OPTIONS
+            )
+            yield PostImageVariant(
+                post_id=post_id,
+                name=thumbnail.name,
+                url=thumbnail.url,
+                width=thumbnail.width,
+                height=thumbnail.height,
+                format=image_format,
+                size=thumbnail.storage.size(thumbnail.name)
+            )
+
+
+def generate_variants(post_id, image_name):
+    """Создаёт миниатюры всех ширин и форматов и сохраняет их описание."""
+    try:
+        if not default_storage.exists(image_name):
+            return []
+        variants = list(_build_variants(post_id, image_name))
+    except Exception:
+        logger.exception('Не удалось подготовить миниатюры %s', image_name)
+        metrics.THUMBNAILS.inc(result='error')
+        return []
+    with transaction.atomic():
+        # Картинку могли заменить, пока миниатюры готовились.
+        post = Post.objects.filter(pk=post_id, image=image_name).values_list(
+            'author_id', 'group_id'
+        ).first()
+        if post is None:
+            return []
+        PostImageVariant.objects.filter(post_id=post_id).delete()
+        PostImageVariant.objects.bulk_create(variants)
+    metrics.THUMBNAILS.inc(result='ok')
+    cache.delete(image_cache_key(post_id, image_name))
+    author_id, group_id = post
+    cache_keys.bump(
+        cache_keys.ALL_POSTS,
+        cache_keys.post(post_id),
+        cache_keys.author(author_id),
+        cache_keys.group(group_id),
+    )
+    return variants
+
+
+def image_cache_key(post_id, image_name):
+    digest = hashlib.md5(image_name.encode()).hexdigest()
+    return f'post_image:{post_id}:{digest}'
+
+
+def describe_variants(variants):
+    """Адрес, srcset и источники <picture> по готовым миниатюрам."""
+    srcsets = defaultdict(list)
+    src = None
+    for variant in sorted(variants, key=lambda variant: variant.width):
+        srcsets[variant.format].append(f'{variant.url} {variant.width}w')
+        if variant.format == BASE_FORMAT:
+            src = variant.url
+    if src is None:
+        return None
+    return {
+        'src': src,
+        'srcset': ', '.join(srcsets[BASE_FORMAT]),
+        'sources': [
+            {'type': mime_type, 'srcset': ', '.join(srcsets[image_format])}
+            for image_format, mime_type in MIME_TYPES.items()
+            if image_format != BASE_FORMAT and image_format in srcsets
+        ],
+    }
+
+
+def _fallback_image(image_name):
+    """Одна миниатюра 960x339 для картинок без подготовленных вариантов."""
+    thumbnail = get_thumbnail(
+        image_name, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS
+    )
+    return {'src': thumbnail.url, 'srcset': '', 'sources': []}
+
+
+def resolve_image_names(names):
+    """Сведения о картинках по словарю {id поста: имя файла}.
+
+    Сведения читаются из кэша одним get_many, промахи добираются одним
+    запросом к PostImageVariant и сохраняются одним set_many. Для
+    картинок без вариантов используется sorl, и его миниатюра кэшируется
+    так же; generate_variants сбрасывает её, когда варианты готовы. Посты
+    без картинки в результат не попадают.
+    """
+    keys = {
+        post_id: image_cache_key(post_id, name)
+        for post_id, name in names.items() if name
+    }
+    found = cache.get_many(keys.values())
+    missing_ids = [
+        post_id for post_id, key in keys.items() if key not in found
+    ]
+    if missing_ids:
+        variants = defaultdict(list)
+        for variant in PostImageVariant.objects.filter(
+            post_id__in=missing_ids
+        ):
+            variants[variant.post_id].append(variant)
+        resolved = {
+            keys[post_id]: (
+                describe_variants(variants[post_id])
+                or _fallback_image(names[post_id])
+            )
+            for post_id in missing_ids
+        }
+        cache.set_many(resolved, get_ttl(IMAGE_TTL_FAMILY))
+        found.update(resolved)
+    return {post_id: found[key] for post_id, key in keys.items()}
+
+
+def resolve_images(posts):
+    """Проставляет постам `image_data` для отрисовки картинок.
+
+    Все посты страницы обходятся одним resolve_image_names.
+    Возвращает список постов.
+    """
+    posts = list(posts)
+    resolved = resolve_image_names(
+        {post.pk: post.image.name for post in posts}
+    )
+    for post in posts:
+        post.image_data = resolved.get(post.pk)
+    return posts
+
+
+def _run_in_worker(post_id, image_name):
+    try:
+        generate_variants(post_id, image_name)
+    finally:
+        connections.close_all()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_PIPELINE_WORKERS', 2),
+                thread_name_prefix='thumbnails'
+            )
+        return _executor
+
+
+def _forget(future):
+    with _executor_lock:
+        _pending.discard(future)
+
+
+def wait(timeout=None):
+    """Ждёт подготовки всех поставленных в очередь миниатюр.
+
+    Нужна тестам: фоновый поток не должен писать в базу и MEDIA_ROOT
+    одновременно с тестом или после его очистки.
+    """
+    with _executor_lock:
+        pending = set(_pending)
+    wait_futures(pending, timeout)
+
+
+def schedule(post):
+    """Ставит подготовку миниатюр в очередь после коммита транзакции."""
+    post_id, image_name = post.pk, post.image.name
+
+    def submit():
+        if getattr(settings, 'IMAGE_PIPELINE_ASYNC', True):
+            future = get_executor().submit(
+                _run_in_worker, post_id, image_name
+            )
+            with _executor_lock:
+                _pending.add(future)
+            future.add_done_callback(_forget)
+        else:
+            generate_variants(post_id, image_name)
+    transaction.on_commit(submit)
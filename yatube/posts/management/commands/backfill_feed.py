@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.feed import add_author_to_feed
+from posts.models import FeedItem, Follow
+
+
+class Command(BaseCommand):
+    help = 'Заполняет материализованные ленты подписок по таблице Follow.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Заполнить ленту только указанного пользователя.'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Предварительно удалить существующие записи лент.'
+        )
+
+    def handle(self, *args, **options):
+        follows = Follow.objects.order_by('pk')
+        items = FeedItem.objects.all()
+        if options['user']:
+            follows = follows.filter(user__username=options['user'])
+            items = items.filter(user__username=options['user'])
+        if options['clear']:
+            items.delete()
+        pairs = follows.values_list('user_id', 'author_id').distinct()
+        total = 0
+        for user_id, author_id in pairs.iterator():
+            with transaction.atomic():
+                add_author_to_feed(user_id, author_id)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано подписок: {total}, записей в лентах: '
+            f'{FeedItem.objects.count()}'
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from posts import ranking
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит эпоху рейтинга популярности на текущий момент и '
+        'масштабирует рейтинги постов. Запускается периодически, '
+        'например раз в сутки из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Пересчитать рейтинги всех постов с нуля.'
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            total = ranking.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f'Пересчитано рейтингов: {total}'
+            ))
+            return
+        factor = ranking.decay()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинги уменьшены в {factor:.3g} раз'
+        ))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from posts.models import Comment, FeedItem, Follow, Group, Post, User
+
+
+class Command(BaseCommand):
+    help = 'Выводит планы выполнения горячих запросов posts.views.'
+
+    def queries(self):
+        author = User.objects.order_by('pk').first()
+        group = Group.objects.order_by('pk').first()
+        post = Post.objects.order_by('pk').first()
+        author_id = author.pk if author else 0
+        yield 'index', Post.objects.order_by('-pub_date', '-pk')[:11]
+        yield 'profile', (
+            Post.objects.filter(author_id=author_id)
+            .order_by('-pub_date', '-pk')[:11]
+        )
+        yield 'group_posts', (
+            Post.objects.filter(group_id=group.pk if group else 0)
+            .order_by('-pub_date', '-pk')[:11]
+        )
+        if post:
+            yield 'profile (cursor)', (
+                Post.objects.filter(
+                    author_id=author_id,
+                    pub_date__lte=post.pub_date
+                )
+                .filter(Q(pub_date__lt=post.pub_date) | Q(pk__lt=post.pk))
+                .order_by('-pub_date', '-pk')[:11]
+            )
+        yield 'post_detail comments', (
+            Comment.objects.filter(post_id=post.pk if post else 0)
+            .order_by('-created')
+        )
+        yield 'follow_index', (
+            FeedItem.objects.filter(user_id=author_id)
+            .order_by('-pub_date', '-pk')[:11]
+        )
+        yield 'profile_follow', Follow.objects.filter(
+            user_id=author_id,
+            author_id=author_id
+        )
+
+    def handle(self, *args, **options):
+        for name, queryset in self.queries():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(queryset.explain())
+            self.stdout.write('')
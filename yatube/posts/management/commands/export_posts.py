@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, посты, комментарии и подписки '
+        'в JSON Lines (один файл) или CSV (каталог с файлом на тип).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл .jsonl, «-» для stdout или каталог для CSV.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=('jsonl', 'csv'),
+            default='jsonl'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=transfer.CHUNK_SIZE,
+            help='Сколько строк читать из базы за один запрос.'
+        )
+
+    def handle(self, *args, **options):
+        records = transfer.export_records(options['chunk_size'])
+        path = options['path']
+        if options['format'] == 'csv':
+            total = transfer.write_csv(records, path)
+        elif path == '-':
+            total = transfer.write_jsonl(records, sys.stdout)
+        else:
+            with open(path, 'w', encoding='utf-8') as stream:
+                total = transfer.write_jsonl(records, stream)
+        self.stderr.write(f'Выгружено записей: {total}')
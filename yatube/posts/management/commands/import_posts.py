@@ -0,0 +1,79 @@
+import os
+import sys
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection
+
+from posts import cache_keys, transfer
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает данные, выгруженные export_posts, пачками bulk_create '
+        'и пересчитывает счётчики, ленты, поиск и рейтинги.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл .jsonl, «-» для stdin или каталог с CSV.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=transfer.CHUNK_SIZE,
+            help='Сколько записей сохранять в одной транзакции.'
+        )
+        parser.add_argument(
+            '--keep-ids',
+            action='store_true',
+            help='Сохранить id постов и комментариев из файла. Строка с '
+                 'тем же id и автором пропускается, с другим — ошибка.'
+        )
+        parser.add_argument(
+            '--skip-derived',
+            action='store_true',
+            help='Не пересчитывать счётчики, ленты, поиск и рейтинги.'
+        )
+
+    def _records(self, path):
+        if os.path.isdir(path):
+            yield from transfer.read_csv(path)
+        elif path == '-':
+            yield from transfer.read_jsonl(sys.stdin)
+        else:
+            with open(path, encoding='utf-8') as stream:
+                yield from transfer.read_jsonl(stream)
+
+    def handle(self, *args, **options):
+        try:
+            counts = transfer.import_records(
+                self._records(options['path']), options['batch_size'],
+                keep_ids=options['keep_ids']
+            )
+        except (transfer.TransferError, IntegrityError, KeyError) as error:
+            raise CommandError(f'Загрузка прервана: {error!r}')
+        for record_type, count in counts.items():
+            self.stdout.write(f'{record_type}: {count}')
+
+        # С --keep-ids, а на SQLite и MySQL всегда, id вставлены явно.
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [Post, Comment]
+            ):
+                cursor.execute(sql)
+        if not options['skip_derived']:
+            for command, kwargs in (
+                ('recount', {}),
+                ('backfill_feed', {}),
+                ('reindex_search', {}),
+                ('decay_scores', {'rebuild': True}),
+            ):
+                call_command(command, stdout=self.stdout, **kwargs)
+        cache_keys.bump(cache_keys.ALL_POSTS, cache_keys.HOT)
+        self.stdout.write(self.style.SUCCESS(
+            'Загрузка завершена. Миниатюры готовит warm_thumbnails.'
+        ))
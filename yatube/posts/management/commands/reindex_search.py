@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.search import get_backend, reindex_all
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс постов и комментариев.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = reindex_all()
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {total} '
+            f'({type(get_backend()).__name__})'
+        ))
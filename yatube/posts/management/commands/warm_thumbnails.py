@@ -0,0 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.images import generate_variants, resolve_images
+from posts.models import Post
+
+BATCH_SIZE = 500
+
+
+def _generate(post_id, image_name):
+    try:
+        return len(generate_variants(post_id, image_name))
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Готовит миниатюры картинок всех постов в несколько потоков '
+        'и прогревает кэш сведений о картинках.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=getattr(settings, 'IMAGE_PIPELINE_WORKERS', 2),
+            help='Число потоков подготовки миниатюр; 1 — в текущем потоке.'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать миниатюры и у постов, где они уже есть.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').order_by('pk')
+        pending = posts
+        if not options['force']:
+            pending = pending.filter(image_variants__isnull=True)
+        jobs = pending.values_list('pk', 'image').iterator()
+        if options['workers'] > 1:
+            created = 0
+            with ThreadPoolExecutor(options['workers']) as executor:
+                # map ставит в очередь все задания сразу, поэтому они
+                # подаются пачками по BATCH_SIZE.
+                while True:
+                    chunk = list(islice(jobs, BATCH_SIZE))
+                    if not chunk:
+                        break
+                    created += sum(
+                        executor.map(lambda job: _generate(*job), chunk)
+                    )
+        else:
+            created = sum(len(generate_variants(*job)) for job in jobs)
+        warmed = 0
+        batch = []
+        for post in posts.iterator():
+            batch.append(post)
+            if len(batch) == BATCH_SIZE:
+                warmed += len(resolve_images(batch))
+                batch = []
+        warmed += len(resolve_images(batch))
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано миниатюр: {created}, прогрето картинок: {warmed}'
+        ))
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:58
+
+from django.conf import settings
+from django.db import migrations
+
+INDEX_NAME = 'posts_username_upper_idx'
+
+
+def user_table(apps):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    return User._meta.db_table
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    quote = schema_editor.quote_name
+    schema_editor.execute(
+        f'CREATE INDEX {quote(INDEX_NAME)} ON {quote(user_table(apps))} '
+        f'(UPPER({quote("username")}))'
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    schema_editor.execute(
+        f'DROP INDEX IF EXISTS {schema_editor.quote_name(INDEX_NAME)}'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:41
+
+import re
+
+from django.db import migrations
+
+from posts.stemmer import stem
+
+TABLE_NAME = 'posts_search'
+
+
+def build_document(text, comments):
+    words = re.findall(r'\w+', ' '.join([text, *comments]))
+    return ' '.join(dict.fromkeys(stem(word) for word in words))
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {TABLE_NAME} USING fts5(body)'
+    )
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    comments = {}
+    for post_id, text in Comment.objects.values_list('post_id', 'text'):
+        comments.setdefault(post_id, []).append(text)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {TABLE_NAME} (rowid, body) VALUES (%s, %s)',
+            [
+                (post_id, build_document(text, comments.get(post_id, ())))
+                for post_id, text in Post.objects.values_list('pk', 'text')
+            ]
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_postimagevariant'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:12
+
+from django.db import migrations, models
+from django.utils import timezone
+
+HALF_LIFE = 12 * 60 * 60
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+FOLLOWER_WEIGHT = 0.1
+BATCH = 1000
+
+
+def fill_hot_scores(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    RankingEpoch = apps.get_model('posts', 'RankingEpoch')
+    now = timezone.now()
+    RankingEpoch.objects.create(pk=1, started=now)
+    last_pk = 0
+    while True:
+        rows = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', 'pub_date', 'comments_count',
+                'author__stats__followers_count'
+            )[:BATCH]
+        )
+        if not rows:
+            break
+        Post.objects.bulk_update([
+            Post(pk=post_id, hot_score=(
+                POST_WEIGHT
+                + FOLLOWER_WEIGHT * (followers or 0)
+                + COMMENT_WEIGHT * comments
+            ) * 2 ** ((pub_date - now).total_seconds() / HALF_LIFE))
+            for post_id, pub_date, comments, followers in rows
+        ], ['hot_score'])
+        last_pk = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingEpoch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started', models.DateTimeField(verbose_name='Начало отсчёта')),
+            ],
+            options={
+                'verbose_name': 'Эпоха рейтинга',
+                'verbose_name_plural': 'Эпохи рейтинга',
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-hot_score', '-id'], name='post_hot_score_idx'),
+        ),
+        migrations.RunPython(fill_hot_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+import re
+
+from django.db import migrations
+
+from posts.stemmer import stem
+
+POSTS_TABLE = 'posts_search'
+COMMENTS_TABLE = 'posts_comment_search'
+
+
+def build_document(text, comments=()):
+    words = re.findall(r'\w+', ' '.join([text, *comments]))
+    return ' '.join(dict.fromkeys(stem(word) for word in words))
+
+
+def _fill(schema_editor, posts, comments):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {POSTS_TABLE}')
+        cursor.executemany(
+            f'INSERT INTO {POSTS_TABLE} (rowid, body) VALUES (%s, %s)',
+            posts
+        )
+        cursor.executemany(
+            f'INSERT INTO {COMMENTS_TABLE} (rowid, post_id, body) '
+            f'VALUES (%s, %s, %s)',
+            comments
+        )
+
+
+def split_comment_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {COMMENTS_TABLE} '
+        f'USING fts5(post_id UNINDEXED, body)'
+    )
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    _fill(
+        schema_editor,
+        [
+            (post_id, build_document(text))
+            for post_id, text in Post.objects.values_list('pk', 'text')
+        ],
+        [
+            (comment_id, post_id, build_document(text))
+            for comment_id, post_id, text in Comment.objects.values_list(
+                'pk', 'post_id', 'text'
+            )
+        ]
+    )
+
+
+def join_comment_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {COMMENTS_TABLE}')
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    comments = {}
+    for post_id, text in Comment.objects.values_list('post_id', 'text'):
+        comments.setdefault(post_id, []).append(text)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {POSTS_TABLE}')
+        cursor.executemany(
+            f'INSERT INTO {POSTS_TABLE} (rowid, body) VALUES (%s, %s)',
+            [
+                (post_id, build_document(text, comments.get(post_id, ())))
+                for post_id, text in Post.objects.values_list('pk', 'text')
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_hot_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_comment_index, join_comment_index),
+    ]
@@ -1,21 +1,28 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
-from core.models import CreatedModel
+from core.models import CountersModel, CreatedModel
 
 User = get_user_model()
 TRIM_LINE = 15
 
 
-class Group(models.Model):
+class Group(CountersModel):
     """Класс описывает поля таблицы Group и переопределяет метод __str__."""
 
+    counter_fields = ('posts_count',)
+
     title = models.CharField('Заголовок', max_length=200)
     slug = models.SlugField('Имя ссылки', unique=True)
     description = models.TextField(
         'Описание',
         help_text='Описание группы'
     )
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Группа'
@@ -25,9 +32,11 @@ class Group(models.Model):
         return self.title
 
 
-class Post(models.Model):
+class Post(CountersModel):
     """Класс описывает поля таблицы Post и её связи."""
 
+    counter_fields = ('comments_count', 'hot_score')
+
     text = models.TextField(
         'Текст поста',
         help_text='Введите текст поста'
@@ -57,11 +66,39 @@ class Post(models.Model):
         blank=True,
         help_text='Картинка для привлечения внимания'
     )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
+    hot_score = models.FloatField(
+        'Популярность',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=('-hot_score', '-id'),
+                name='post_hot_score_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:TRIM_LINE]
@@ -92,6 +129,12 @@ class Comment(CreatedModel):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('-created',)
+        indexes = (
+            models.Index(
+                fields=('post', '-created', '-id'),
+                name='comment_post_created_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text
@@ -115,3 +158,125 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='prevent_self_follow'
+            ),
+        )
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, поддерживаемые сигналами."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Количество постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0
+    )
+    following_count = models.PositiveIntegerField(
+        'Количество подписок',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+
+class FeedItem(models.Model):
+    """Материализованная лента подписок: строка на пост для подписчика."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        ordering = ('-pub_date',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_feed_item'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-id'),
+                name='feed_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='feed_user_author_idx'
+            ),
+        )
+
+
+class PostImageVariant(models.Model):
+    """Готовая миниатюра картинки поста определённой ширины и формата."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_variants',
+        verbose_name='Пост'
+    )
+    name = models.CharField('Файл', max_length=255)
+    url = models.CharField('Адрес', max_length=255)
+    width = models.PositiveIntegerField('Ширина')
+    height = models.PositiveIntegerField('Высота')
+    format = models.CharField('Формат', max_length=10)
+    size = models.PositiveIntegerField('Размер, байт', default=0)
+
+    class Meta:
+        verbose_name = 'Вариант картинки'
+        verbose_name_plural = 'Варианты картинок'
+        ordering = ('width',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'format', 'width'),
+                name='unique_post_image_variant'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} ({self.format} {self.width}x{self.height})'
+
+
+class RankingEpoch(models.Model):
+    """Точка отсчёта, относительно которой растут веса событий рейтинга."""
+
+    started = models.DateTimeField('Начало отсчёта')
+
+    class Meta:
+        verbose_name = 'Эпоха рейтинга'
+        verbose_name_plural = 'Эпохи рейтинга'
+
+    def __str__(self):
+        return f'{self.started:%Y-%m-%d %H:%M}'
@@ -0,0 +1,177 @@
+"""Рейтинг популярности постов с затуханием по времени.
+
+Вместо пересчёта всех рейтингов с течением времени растёт вес новых
+событий: событие в момент t добавляет weight * 2 ** ((t - эпоха) / T),
+где T — период полураспада. Порядок постов при этом такой же, как если
+бы старые вклады затухали. Команда decay_scores периодически переносит
+эпоху вперёд и делит все рейтинги на общий множитель, чтобы числа не
+росли без предела; ничтожно малые рейтинги обнуляются. Если команда
+давно не запускалась и показатель степени превысил MAX_EXPONENT, эпоху
+переносит само событие, иначе множитель переполнил бы float.
+
+Рейтинг хранится в Post.hot_score с индексом (-hot_score, -id), по
+которому лента «Популярное» выбирается номерными страницами.
+
+Эпоха читается из базы при каждом событии: локальный кэш процесса не
+узнал бы, что decay_scores в другом процессе перенёс её, и веса событий
+оказались бы завышены в множитель затухания.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import cache_keys
+from .models import Post, RankingEpoch
+
+REBUILD_BATCH = 1000
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+FOLLOWER_WEIGHT = 0.1
+# Новый подписчик повышает охват только недавних постов автора.
+REACH_WINDOW = timedelta(days=3)
+MIN_SCORE = 1e-6
+# 2 ** 1024 уже не помещается в float; запас оставлен на сумму вкладов.
+MAX_EXPONENT = 512
+
+
+def half_life():
+    return getattr(settings, 'POSTS_HOT_HALF_LIFE', 12 * 60 * 60)
+
+
+def get_epoch():
+    return RankingEpoch.objects.get_or_create(
+        pk=1, defaults={'started': timezone.now()}
+    )[0].started
+
+
+def _exponent(moment, epoch):
+    return (moment - epoch).total_seconds() / half_life()
+
+
+def growth(moment, epoch=None):
+    """Множитель веса события, случившегося в момент moment."""
+    epoch = epoch or get_epoch()
+    return 2 ** _exponent(moment, epoch)
+
+
+def current_growth(moment):
+    """Как growth, но сначала переносит слишком старую эпоху."""
+    now = timezone.now()
+    epoch = get_epoch()
+    if _exponent(max(moment, now), epoch) > MAX_EXPONENT:
+        decay(now)
+        epoch = now
+    return growth(moment, epoch)
+
+
+def initial_score(followers_count, moment=None):
+    return (
+        (POST_WEIGHT + FOLLOWER_WEIGHT * followers_count)
+        * current_growth(moment or timezone.now())
+    )
+
+
+def _add(queryset, weight):
+    """Добавляет вклад события; отрицательный не опускает рейтинг ниже 0."""
+    queryset.update(hot_score=Greatest(
+        F('hot_score') + weight * current_growth(timezone.now()), Value(0.0)
+    ))
+    cache_keys.bump(cache_keys.HOT)
+
+
+def post_created(post, followers_count):
+    Post.objects.filter(pk=post.pk).update(
+        hot_score=initial_score(followers_count, post.pub_date)
+    )
+    cache_keys.bump(cache_keys.HOT)
+
+
+def comment_created(post_id):
+    _add(Post.objects.filter(pk=post_id), COMMENT_WEIGHT)
+
+
+def follower_added(author_id):
+    _add(
+        Post.objects.filter(
+            author_id=author_id,
+            pub_date__gte=timezone.now() - REACH_WINDOW
+        ),
+        FOLLOWER_WEIGHT
+    )
+
+
+def follower_removed(author_id):
+    """Отписка снимает вклад подписчика с тех же недавних постов."""
+    _add(
+        Post.objects.filter(
+            author_id=author_id,
+            pub_date__gte=timezone.now() - REACH_WINDOW
+        ),
+        -FOLLOWER_WEIGHT
+    )
+
+
+def decay(now=None):
+    """Переносит эпоху на now и масштабирует рейтинги; возвращает делитель."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        epoch = RankingEpoch.objects.select_for_update().get_or_create(
+            pk=1, defaults={'started': now}
+        )[0]
+        exponent = _exponent(now, epoch.started)
+        scored = Post.objects.filter(hot_score__gt=0)
+        if exponent >= 2 * MAX_EXPONENT:
+            # Делитель не помещается во float, а рейтинги не больше
+            # 2 ** MAX_EXPONENT: после деления все они ничтожно малы.
+            factor = float('inf')
+            scored.update(hot_score=0)
+        else:
+            factor = 2 ** exponent
+            scored.update(hot_score=F('hot_score') / factor)
+            scored.filter(hot_score__lt=MIN_SCORE).update(hot_score=0)
+        epoch.started = now
+        epoch.save(update_fields=('started',))
+        cache_keys.bump(cache_keys.HOT)
+    return factor
+
+
+def rebuild(now=None):
+    """Пересчитывает рейтинги всех постов с нуля от эпохи now.
+
+    Используются дата поста, число комментариев и текущее число
+    подписчиков автора; время отдельных комментариев не учитывается.
+    Посты читаются и записываются пачками по REBUILD_BATCH.
+    """
+    now = now or timezone.now()
+    total = 0
+    last_pk = 0
+    with transaction.atomic():
+        RankingEpoch.objects.update_or_create(
+            pk=1, defaults={'started': now}
+        )
+        while True:
+            rows = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list(
+                    'pk', 'pub_date', 'comments_count',
+                    'author__stats__followers_count'
+                )[:REBUILD_BATCH]
+            )
+            if not rows:
+                break
+            Post.objects.bulk_update([
+                Post(pk=post_id, hot_score=(
+                    POST_WEIGHT
+                    + FOLLOWER_WEIGHT * (followers or 0)
+                    + COMMENT_WEIGHT * comments
+                ) * growth(pub_date, now))
+                for post_id, pub_date, comments, followers in rows
+            ], ['hot_score'])
+            total += len(rows)
+            last_pk = rows[-1][0]
+        cache_keys.bump(cache_keys.HOT)
+    return total
@@ -0,0 +1,233 @@
+"""Полнотекстовый поиск по постам и комментариям к ним.
+
+Для каждого поста и каждого комментария хранится свой документ из
+основ слов текста; пост находится, если каждое слово запроса есть в нём
+или в одном из его комментариев. Основы получает стеммер Snowball,
+поэтому запрос «книги» находит «книгой». Документы обновляются сигналами
+при записи постов и комментариев — запись комментария трогает только
+его документ; полностью индекс пересобирает команда reindex_search.
+
+Хранилище выбирается по СУБД: на SQLite — виртуальная таблица FTS5,
+на остальных — построчный поиск (ScanBackend). Другой бэкенд задаётся
+путём к классу в settings.POSTS_SEARCH_BACKEND.
+"""
+import re
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Comment, Post
+from .stemmer import stem
+
+WORD_RE = re.compile(r'\w+')
+MAX_QUERY_TERMS = 10
+REINDEX_BATCH_SIZE = 500
+
+
+def terms(text):
+    """Основы слов текста в порядке появления, без повторов."""
+    return list(dict.fromkeys(
+        stem(word) for word in WORD_RE.findall(text or '')
+    ))
+
+
+def build_document(text, comments=()):
+    return ' '.join(terms(' '.join([text, *comments])))
+
+
+class SearchBackend:
+    """Хранилище документов поиска."""
+
+    def index_many(self, documents):
+        """Сохраняет документы, заданные парами (id поста, текст)."""
+        raise NotImplementedError
+
+    def index_comments(self, documents):
+        """Сохраняет документы комментариев: (id, id поста, текст)."""
+        raise NotImplementedError
+
+    def remove(self, post_id):
+        """Удаляет документ поста и документы его комментариев."""
+        raise NotImplementedError
+
+    def remove_comment(self, comment_id):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def filter(self, queryset, query_terms):
+        """Оставляет в queryset посты, содержащие все основы запроса."""
+        raise NotImplementedError
+
+
+class SqliteFTS5Backend(SearchBackend):
+    """Инвертированные индексы SQLite FTS5; rowid документа — id поста
+    или комментария."""
+
+    table = 'posts_search'
+    comments_table = 'posts_comment_search'
+
+    def index_many(self, documents):
+        documents = list(documents)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(post_id,) for post_id, _ in documents]
+            )
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, body) VALUES (%s, %s)',
+                documents
+            )
+
+    def index_comments(self, documents):
+        documents = list(documents)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.comments_table} WHERE rowid = %s',
+                [(comment_id,) for comment_id, _, _ in documents]
+            )
+            cursor.executemany(
+                f'INSERT INTO {self.comments_table} (rowid, post_id, body) '
+                f'VALUES (%s, %s, %s)',
+                documents
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [post_id]
+            )
+            cursor.execute(
+                f'DELETE FROM {self.comments_table} WHERE post_id = %s',
+                [post_id]
+            )
+
+    def remove_comment(self, comment_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.comments_table} WHERE rowid = %s',
+                [comment_id]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(f'DELETE FROM {self.comments_table}')
+
+    def filter(self, queryset, query_terms):
+        # RawSQL в pk__in оборачивается в скалярный подзапрос, поэтому
+        # условие добавляется через extra(). Каждое слово ищется и в
+        # постах, и в комментариях.
+        column = '{}.{}'.format(
+            connection.ops.quote_name(queryset.model._meta.db_table),
+            connection.ops.quote_name(queryset.model._meta.pk.column)
+        )
+        return queryset.extra(
+            where=[
+                f'{column} IN (SELECT rowid FROM {self.table} '
+                f'WHERE {self.table} MATCH %s '
+                f'UNION SELECT post_id FROM {self.comments_table} '
+                f'WHERE {self.comments_table} MATCH %s)'
+            ] * len(query_terms),
+            params=[
+                f'"{term}"' for term in query_terms for _ in range(2)
+            ]
+        )
+
+
+class ScanBackend(SearchBackend):
+    """Запасной вариант без индекса: поиск основ подстрокой в текстах."""
+
+    def index_many(self, documents):
+        pass
+
+    def index_comments(self, documents):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def remove_comment(self, comment_id):
+        pass
+
+    def clear(self):
+        pass
+
+    def filter(self, queryset, query_terms):
+        for term in query_terms:
+            queryset = queryset.filter(
+                pk__in=Post.objects.filter(
+                    Q(text__icontains=term) | Q(comments__text__icontains=term)
+                ).values('pk')
+            )
+        return queryset
+
+
+def get_backend():
+    path = getattr(settings, 'POSTS_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SqliteFTS5Backend()
+    return ScanBackend()
+
+
+def search(queryset, query):
+    """Посты queryset, найденные по запросу; пустой запрос — ничего."""
+    query_terms = terms(query)[:MAX_QUERY_TERMS]
+    if not query_terms:
+        return queryset.none()
+    return get_backend().filter(queryset, query_terms)
+
+
+def index_post(post):
+    """Обновляет документ одного поста; комментарии не перечитываются."""
+    get_backend().index_many([(post.pk, build_document(post.text))])
+
+
+def remove_post(post_id):
+    get_backend().remove(post_id)
+
+
+def index_comment(comment):
+    get_backend().index_comments(
+        [(comment.pk, comment.post_id, build_document(comment.text))]
+    )
+
+
+def remove_comment(comment_id):
+    get_backend().remove_comment(comment_id)
+
+
+def _batches(queryset):
+    """Строки values_list с pk первым полем, пачками по pk."""
+    last_pk = 0
+    queryset = queryset.order_by('pk')
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:REINDEX_BATCH_SIZE])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1][0]
+
+
+def reindex_all():
+    """Пересобирает индекс пачками; возвращает число постов."""
+    backend = get_backend()
+    backend.clear()
+    total = 0
+    for batch in _batches(Post.objects.values_list('pk', 'text')):
+        backend.index_many(
+            (post_id, build_document(text)) for post_id, text in batch
+        )
+        total += len(batch)
+    for batch in _batches(
+        Comment.objects.values_list('pk', 'post_id', 'text')
+    ):
+        backend.index_comments(
+            (comment_id, post_id, build_document(text))
+            for comment_id, post_id, text in batch
+        )
+    return total
@@ -0,0 +1,129 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import cache_keys, counters, events, feed, images, ranking, search
+from .authors import username_cache
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user_id=instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        cache_keys.bump(cache_keys.group(instance.pk))
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    instance._loaded_group_id = instance.group_id
+    instance._loaded_image = instance.image.name
+
+
+def _post_scopes(post, followers):
+    return (
+        cache_keys.ALL_POSTS,
+        cache_keys.author(post.author_id),
+        cache_keys.group(post.group_id),
+        cache_keys.post(post.pk),
+        *(cache_keys.feed(user_id) for user_id in followers),
+    )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Правка поста не меняет состав лент подписчиков, а их фрагменты
+    # зависят и от поколений постов страницы; рассылать нужно только новый.
+    followers = feed.follower_ids(instance.author_id) if created else ()
+    with transaction.atomic():
+        if created:
+            counters.change_user(instance.author_id, 'posts_count', 1)
+            counters.change_group(instance.group_id, 1)
+            feed.fan_out_post(instance, followers)
+            ranking.post_created(instance, len(followers))
+            events.post_created(instance)
+        elif instance._loaded_group_id != instance.group_id:
+            counters.change_group(instance._loaded_group_id, -1)
+            counters.change_group(instance.group_id, 1)
+        search.index_post(instance)
+        cache_keys.bump(
+            cache_keys.group(instance._loaded_group_id),
+            *_post_scopes(instance, followers)
+        )
+    if instance.image and (
+            created or instance.image.name != instance._loaded_image):
+        images.schedule(instance)
+    instance._loaded_group_id = instance.group_id
+    instance._loaded_image = instance.image.name
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    followers = feed.follower_ids(instance.author_id)
+    with transaction.atomic():
+        counters.change_user(instance.author_id, 'posts_count', -1)
+        counters.change_group(instance.group_id, -1)
+        search.remove_post(instance.pk)
+        cache_keys.bump(*_post_scopes(instance, followers))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.change_post(instance.post_id, 1)
+        ranking.comment_created(instance.post_id)
+        cache_keys.bump(cache_keys.post(instance.post_id))
+        events.comment_created(instance)
+    search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_post(instance.post_id, -1)
+    search.remove_comment(instance.pk)
+    cache_keys.bump(cache_keys.post(instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        with transaction.atomic():
+            counters.change_user(instance.user_id, 'following_count', 1)
+            counters.change_user(instance.author_id, 'followers_count', 1)
+            feed.add_author_to_feed(instance.user_id, instance.author_id)
+            ranking.follower_added(instance.author_id)
+            cache_keys.bump(
+                cache_keys.feed(instance.user_id),
+                cache_keys.author(instance.author_id)
+            )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    with transaction.atomic():
+        counters.change_user(instance.user_id, 'following_count', -1)
+        counters.change_user(instance.author_id, 'followers_count', -1)
+        feed.remove_author_from_feed(instance.user_id, instance.author_id)
+        ranking.follower_removed(instance.author_id)
+        cache_keys.bump(
+            cache_keys.feed(instance.user_id),
+            cache_keys.author(instance.author_id)
+        )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Вход обновляет только last_login; имя от этого не меняется.
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    username_cache.discard_user(instance.pk)
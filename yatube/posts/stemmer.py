@@ -0,0 +1,121 @@
+"""Стеммер Snowball для русского языка.
+
+Реализация алгоритма http://snowball.tartarus.org/algorithms/russian/
+stemmer.html без сторонних зависимостей: слово приводится к основе,
+чтобы «книга», «книги» и «книгой» находились одним запросом.
+"""
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('вшись', 'вши', 'в'),
+    ('ившись', 'ывшись', 'ивши', 'ывши', 'ив', 'ыв'),
+)
+ADJECTIVE = (
+    (),
+    ('ими', 'ыми', 'его', 'ого', 'ему', 'ому', 'ее', 'ие', 'ые', 'ое',
+     'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом', 'их', 'ых', 'ую',
+     'юю', 'ая', 'яя', 'ою', 'ею'),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    ('ете', 'йте', 'ешь', 'нно', 'ла', 'на', 'ли', 'ем', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'й', 'л', 'н'),
+    ('ейте', 'уйте', 'ила', 'ыла', 'ена', 'ите', 'или', 'ыли', 'ило',
+     'ыло', 'ено', 'ует', 'уют', 'ены', 'ить', 'ыть', 'ишь', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ят', 'ит', 'ыт', 'ую', 'ю'),
+)
+NOUN = (
+    (),
+    ('иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях', 'ев', 'ов', 'ие',
+     'ье', 'еи', 'ии', 'ей', 'ой', 'ий', 'ям', 'ем', 'ам', 'ом', 'ах',
+     'ях', 'ию', 'ью', 'ия', 'ья', 'а', 'е', 'и', 'й', 'о', 'у', 'ы', 'ь',
+     'ю', 'я'),
+)
+SUPERLATIVE = ((), ('ейше', 'ейш'))
+DERIVATIONAL = ((), ('ость', 'ост'))
+
+
+def _regions(word):
+    """Начала областей RV и R2 по правилам Snowball."""
+    rv = r1 = r2 = len(word)
+    for index, char in enumerate(word):
+        if char in VOWELS:
+            rv = index + 1
+            break
+    for index in range(1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            r1 = index + 1
+            break
+    for index in range(r1 + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            r2 = index + 1
+            break
+    return rv, r2
+
+
+def _remove(word, start, groups):
+    """Отрезает самое длинное окончание из групп внутри word[start:].
+
+    Окончания первой группы допустимы только после «а» или «я».
+    Возвращает укороченное слово или None, если ничего не подошло.
+    """
+    region = word[start:]
+    candidates = sorted(
+        ((ending, index == 0)
+         for index, endings in enumerate(groups) for ending in endings),
+        key=lambda candidate: -len(candidate[0])
+    )
+    for ending, after_a in candidates:
+        if not region.endswith(ending):
+            continue
+        rest = region[:-len(ending)]
+        if after_a and not rest.endswith(('а', 'я')):
+            continue
+        return word[:len(word) - len(ending)]
+    return None
+
+
+def _remove_adjectival(word, rv):
+    stripped = _remove(word, rv, ADJECTIVE)
+    if stripped is None:
+        return None
+    return _remove(stripped, rv, PARTICIPLE) or stripped
+
+
+def stem(word):
+    """Основа русского слова; прочие слова возвращаются в нижнем регистре."""
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    if rv >= len(word):
+        return word
+
+    stripped = _remove(word, rv, PERFECTIVE_GERUND)
+    if stripped is None:
+        word = _remove(word, rv, REFLEXIVE) or word
+        stripped = (
+            _remove_adjectival(word, rv)
+            or _remove(word, rv, VERB)
+            or _remove(word, rv, NOUN)
+        )
+    word = stripped or word
+
+    if word[rv:].endswith('и'):
+        word = word[:-1]
+
+    word = _remove(word, max(r2, rv), DERIVATIONAL) or word
+
+    if word[rv:].endswith('нн'):
+        return word[:-1]
+    superlative = _remove(word, rv, SUPERLATIVE)
+    if superlative is not None:
+        word = superlative
+        if word[rv:].endswith('нн'):
+            word = word[:-1]
+        return word
+    if word[rv:].endswith('ь'):
+        word = word[:-1]
+    return word
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.test import TestCase, override_settings
+
+from ..authors import UsernameCache, get_author_or_404, username_cache
+
+User = get_user_model()
+
+
+class AuthorLookupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='auth_other')
+
+    def setUp(self):
+        username_cache.clear()
+
+    def test_exact_match_only(self):
+        """Профиль ищется по точному имени, а не по вхождению."""
+        self.assertEqual(get_author_or_404('auth'), AuthorLookupTests.user)
+        with self.assertRaises(Http404):
+            get_author_or_404('aut')
+        response = self.client.get('/profile/aut/')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(POSTS_USERNAME_CASE_INSENSITIVE=True)
+    def test_case_insensitive_lookup(self):
+        """При включённой настройке регистр имени не важен."""
+        self.assertEqual(get_author_or_404('AUTH'), AuthorLookupTests.user)
+
+    def test_cached_name_is_invalidated_on_rename(self):
+        """Переименование пользователя сбрасывает кэш имён."""
+        user = User.objects.create_user(username='renamed')
+        self.assertEqual(get_author_or_404('renamed'), user)
+        user.username = 'new_name'
+        user.save()
+        with self.assertRaises(Http404):
+            get_author_or_404('renamed')
+        self.assertEqual(get_author_or_404('new_name'), user)
+
+    def test_cached_lookup_uses_primary_key(self):
+        """Повторный поиск по имени выполняется по первичному ключу."""
+        get_author_or_404('auth')
+        with self.assertNumQueries(1) as queries:
+            get_author_or_404('auth')
+        where = queries.captured_queries[0]['sql'].split('WHERE')[1]
+        self.assertNotIn('username', where)
+
+    def test_login_keeps_cached_name(self):
+        """Вход (сохранение last_login) не сбрасывает кэш имён."""
+        get_author_or_404('auth')
+        self.client.force_login(AuthorLookupTests.user)
+        self.assertEqual(username_cache.get('auth'), AuthorLookupTests.user.pk)
+
+    def test_eviction_keeps_reverse_map(self):
+        """Вытесненное имя не остаётся в обратном соответствии."""
+        cache = UsernameCache(maxsize=1)
+        cache.set('first', 1)
+        cache.set('second', 2)
+        self.assertIsNone(cache.get('first'))
+        cache.discard_user(2)
+        self.assertIsNone(cache.get('second'))
+        self.assertEqual(cache._names, {})
@@ -0,0 +1,164 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import cache_keys
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class CacheKeysTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(CacheKeysTests.reader)
+
+    def generations(self, *scopes):
+        return cache_keys.get_generations(*scopes)
+
+    def test_follow_bumps_only_follower_feed(self):
+        """Подписка меняет поколение ленты подписчика, но не общей ленты."""
+        scopes = (
+            cache_keys.ALL_POSTS,
+            cache_keys.feed(CacheKeysTests.reader.pk),
+            cache_keys.feed(CacheKeysTests.other.pk),
+        )
+        before = self.generations(*scopes)
+        Follow.objects.create(
+            user=CacheKeysTests.reader,
+            author=CacheKeysTests.author
+        )
+        after = self.generations(*scopes)
+        self.assertEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+        self.assertEqual(after[2], before[2])
+
+    def test_new_post_bumps_followers_feeds(self):
+        """Новый пост меняет поколения общей ленты и лент подписчиков."""
+        Follow.objects.create(
+            user=CacheKeysTests.reader,
+            author=CacheKeysTests.author
+        )
+        scopes = (
+            cache_keys.ALL_POSTS,
+            cache_keys.feed(CacheKeysTests.reader.pk),
+            cache_keys.feed(CacheKeysTests.other.pk),
+        )
+        before = self.generations(*scopes)
+        Post.objects.create(author=CacheKeysTests.author, text='Пост')
+        after = self.generations(*scopes)
+        self.assertNotEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+        self.assertEqual(after[2], before[2])
+
+    def test_edit_does_not_touch_followers_feeds(self):
+        """Правка поста не трогает ленты подписчиков, но видна в них."""
+        Follow.objects.create(
+            user=CacheKeysTests.reader,
+            author=CacheKeysTests.author
+        )
+        post = Post.objects.create(author=CacheKeysTests.author, text='Было')
+        self.assertContains(
+            self.client.get(reverse('posts:follow_index')), 'Было'
+        )
+        scope = cache_keys.feed(CacheKeysTests.reader.pk)
+        before = self.generations(scope)
+        post.text = 'Стало'
+        post.save()
+        self.assertEqual(self.generations(scope), before)
+        self.assertContains(
+            self.client.get(reverse('posts:follow_index')), 'Стало'
+        )
+
+    def test_comment_bumps_only_its_post(self):
+        """Комментарий меняет только поколение своего поста."""
+        post = Post.objects.create(author=CacheKeysTests.author, text='Пост')
+        scopes = (cache_keys.ALL_POSTS, cache_keys.post(post.pk))
+        before = self.generations(*scopes)
+        Comment.objects.create(
+            post=post,
+            author=CacheKeysTests.reader,
+            text='Комментарий'
+        )
+        after = self.generations(*scopes)
+        self.assertEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+
+    def test_follow_feed_fragment_refreshes_after_follow(self):
+        """Фрагмент ленты подписок обновляется сразу после подписки."""
+        Post.objects.create(author=CacheKeysTests.author, text='Новинка')
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertNotContains(response, 'Новинка')
+        self.client.get(reverse(
+            'posts:profile_follow',
+            kwargs={'username': CacheKeysTests.author.username}
+        ))
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Новинка')
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_repeated_request_is_served_from_cache(self):
+        """Повторный анонимный запрос отдаётся из кэша без запросов к БД."""
+        first = self.guest_client.get(reverse('posts:index'))
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_conditional_get_returns_304(self):
+        """Совпавший ETag даёт 304 без тела."""
+        url = reverse(
+            'posts:post_detail',
+            kwargs={'post_id': AnonymousPageCacheTests.post.pk}
+        )
+        response = self.guest_client.get(url)
+        self.assertIn('Last-Modified', response)
+        response = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_comment_invalidates_post_page(self):
+        """Новый комментарий сбрасывает кэш страницы поста."""
+        url = reverse(
+            'posts:post_detail',
+            kwargs={'post_id': AnonymousPageCacheTests.post.pk}
+        )
+        etag = self.guest_client.get(url)['ETag']
+        Comment.objects.create(
+            post=AnonymousPageCacheTests.post,
+            author=AnonymousPageCacheTests.author,
+            text='Свежий комментарий'
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Свежий комментарий')
+
+    def test_authorized_requests_are_not_cached(self):
+        """Страницы для авторизованных не берутся из кэша."""
+        client = Client()
+        client.force_login(AnonymousPageCacheTests.author)
+        client.get(reverse('posts:index'))
+        response = client.get(reverse('posts:index'))
+        self.assertIsNotNone(response.context)
+        self.assertNotIn('ETag', response)
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..views import COMMENTS_ON_PAGE
+
+User = get_user_model()
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {index}'
+            )
+            for index in range(COMMENTS_ON_PAGE + 5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_detail_shows_first_page(self):
+        """На странице поста только первая страница, новые первыми."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_ON_PAGE)
+        self.assertEqual(comments[0], self.comments[-1])
+        self.assertContains(response, 'Показать ещё')
+
+    def test_fragment_continues_from_cursor(self):
+        """Фрагмент по курсору отдаёт оставшиеся комментарии."""
+        first = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        ).context['comments']
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.pk]),
+            {'cursor': first.next_cursor}
+        )
+        self.assertEqual(
+            list(response.context['comments']),
+            list(reversed(self.comments[:5]))
+        )
+        self.assertNotContains(response, 'Показать ещё')
+
+    def test_unknown_post(self):
+        for name in ('posts:post_comments', 'posts:post_comments_stream'):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name, args=[0]))
+                self.assertEqual(response.status_code, 404)
+
+    def test_stream_contains_all_comments(self):
+        """Поток отдаёт все комментарии по странице за запрос к базе."""
+        url = reverse('posts:post_comments_stream', args=[self.post.pk])
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        with self.assertNumQueries(2):
+            content = b''.join(response.streaming_content).decode()
+        for comment in self.comments:
+            self.assertIn(comment.text + '\n', content)
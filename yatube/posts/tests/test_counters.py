@@ -0,0 +1,110 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Другое описание',
+        )
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_post_counters(self):
+        """Создание и удаление поста меняет счётчики автора и группы."""
+        post = Post.objects.create(
+            author=CountersTests.user,
+            text='Тестовый пост',
+            group=CountersTests.group
+        )
+        self.assertEqual(self.stats(CountersTests.user).posts_count, 1)
+        CountersTests.group.refresh_from_db()
+        self.assertEqual(CountersTests.group.posts_count, 1)
+        post.delete()
+        self.assertEqual(self.stats(CountersTests.user).posts_count, 0)
+        CountersTests.group.refresh_from_db()
+        self.assertEqual(CountersTests.group.posts_count, 0)
+
+    def test_group_change_moves_count(self):
+        """Перенос поста в другую группу переносит счётчик."""
+        post = Post.objects.create(
+            author=CountersTests.user,
+            text='Тестовый пост',
+            group=CountersTests.group
+        )
+        post = Post.objects.get(pk=post.pk)
+        post.group = CountersTests.other_group
+        post.save()
+        self.assertEqual(
+            Group.objects.get(pk=CountersTests.group.pk).posts_count, 0
+        )
+        self.assertEqual(
+            Group.objects.get(pk=CountersTests.other_group.pk).posts_count, 1
+        )
+
+    def test_comment_counter_survives_post_edit(self):
+        """Редактирование поста не затирает счётчик комментариев."""
+        post = Post.objects.create(
+            author=CountersTests.user,
+            text='Тестовый пост'
+        )
+        Comment.objects.create(
+            post=post,
+            author=CountersTests.reader,
+            text='Комментарий'
+        )
+        post.text = 'Исправленный пост'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_follow_counters(self):
+        """Подписка и отписка меняют счётчики обеих сторон."""
+        follow = Follow.objects.create(
+            user=CountersTests.reader,
+            author=CountersTests.user
+        )
+        self.assertEqual(self.stats(CountersTests.reader).following_count, 1)
+        self.assertEqual(self.stats(CountersTests.user).followers_count, 1)
+        follow.delete()
+        self.assertEqual(self.stats(CountersTests.reader).following_count, 0)
+        self.assertEqual(self.stats(CountersTests.user).followers_count, 0)
+
+    def test_recount_repairs_drift(self):
+        """Команда recount исправляет разошедшиеся счётчики."""
+        post = Post.objects.create(
+            author=CountersTests.user,
+            text='Тестовый пост',
+            group=CountersTests.group
+        )
+        UserStats.objects.update(posts_count=7)
+        Group.objects.update(posts_count=3)
+        Post.objects.update(comments_count=5)
+        UserStats.objects.filter(user=CountersTests.reader).delete()
+        call_command('recount', stdout=StringIO())
+        self.assertEqual(self.stats(CountersTests.user).posts_count, 1)
+        self.assertEqual(self.stats(CountersTests.reader).posts_count, 0)
+        self.assertEqual(
+            Group.objects.get(pk=CountersTests.group.pk).posts_count, 1
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
@@ -0,0 +1,139 @@
+import asyncio
+import socket
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.asgi import ENVIRON_KEY
+from core.cache.redis import RedisCache
+from core.pubsub import CacheBroker, get_broker
+from core.tests import call_asgi
+
+from .. import asgi, events
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class EventPublishingTests(TransactionTestCase):
+    def test_new_post_and_comment_are_published(self):
+        """После коммита поста и комментария публикуются события."""
+        after = events.last_id()
+        user = User.objects.create_user(username='author')
+        post = Post.objects.create(author=user, text='Пост')
+        comment = Comment.objects.create(post=post, author=user, text='Да')
+        last, found = events.poll(after, post.pk)
+        self.assertEqual(last, after + 2)
+        self.assertEqual([event for _, event in found], [
+            {
+                'type': 'post', 'post': post.pk,
+                'author': user.pk, 'group': None,
+            },
+            {'type': 'comment', 'post': post.pk, 'comment': comment.pk},
+        ])
+
+    def test_broker_outage_keeps_the_post(self):
+        """Недоступный брокер не превращает сохранённый пост в ошибку."""
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        broker = CacheBroker(
+            cache=RedisCache(f'redis://127.0.0.1:{port}/2', {})
+        )
+        user = User.objects.create_user(username='author')
+        self.client.force_login(user)
+        with mock.patch.object(events, 'get_broker', return_value=broker), \
+                self.assertLogs('posts.events', 'ERROR'):
+            response = self.client.post(
+                reverse('posts:post_create'), {'text': 'Пост'}
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Post.objects.filter(text='Пост').exists())
+
+
+class EventViewTests(TestCase):
+    def publish(self, event):
+        return get_broker().publish(events.CHANNEL, event)
+
+    def test_poll(self):
+        """Опрос отдаёт новые посты и комментарии только своего поста."""
+        url = reverse('posts:events_poll')
+        after = self.client.get(url).json()['last']
+        self.publish({'type': 'comment', 'post': 1, 'comment': 1})
+        self.publish({'type': 'comment', 'post': 2, 'comment': 2})
+        last = self.publish({'type': 'post', 'post': 3})
+        data = self.client.get(url, {'after': after, 'post': 1}).json()
+        self.assertEqual(data['last'], last)
+        self.assertEqual(
+            [event['type'] for event in data['events']],
+            ['comment', 'post']
+        )
+        response = self.client.get(url, {'after': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_stream_only_under_asgi(self):
+        """Под WSGI страница опрашивает сервер, под ASGI открывает поток."""
+        stream = f'data-stream="{reverse("posts:events")}'
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, stream)
+        self.assertContains(response, 'data-poll=')
+        response = self.client.get(
+            reverse('posts:index'), **{ENVIRON_KEY: True}
+        )
+        self.assertContains(response, stream)
+
+    def test_poll_after_lost_history(self):
+        """Номер из будущего канала означает «с текущего момента»."""
+        url = reverse('posts:events_poll')
+        last = self.client.get(url).json()['last']
+        data = self.client.get(url, {'after': last + 1000}).json()
+        self.assertEqual(data['last'], last)
+        event_id = self.publish({'type': 'post', 'post': 1})
+        data = self.client.get(url, {'after': data['last']}).json()
+        self.assertEqual(data['last'], event_id)
+        self.assertEqual(len(data['events']), 1)
+
+    @override_settings(SSE_HEARTBEAT=0.01, SSE_MAX_DURATION=0.05)
+    def test_stream(self):
+        """Поток отдаёт события после Last-Event-ID и закрывается сам."""
+        after = self.publish({'type': 'post', 'post': 1})
+        event_id = self.publish({'type': 'post', 'post': 2})
+        response = self.client.get(
+            reverse('posts:events'), HTTP_LAST_EVENT_ID=str(after)
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn(
+            f'id: {event_id}\nevent: post\ndata: {{"type": "post", '
+            f'"post": 2}}\n\n',
+            content
+        )
+        self.assertNotIn('"post": 1}', content)
+        self.assertIn(': keep-alive', content)
+
+    @override_settings(SSE_HEARTBEAT=0.01, ASGI_EVENTS_POLL_INTERVAL=0.01)
+    def test_asgi_stream(self):
+        """В ASGI поток отдаёт события, пока клиент не отключится."""
+        after = self.publish({'type': 'comment', 'post': 1, 'comment': 1})
+        event_id = self.publish({'type': 'comment', 'post': 2, 'comment': 2})
+        sent = asyncio.run(call_asgi(asgi.event_stream, {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/events/',
+            'query_string': b'post=2',
+            'headers': [(b'last-event-id', str(after).encode())],
+        }, [{'type': 'http.request'}]))
+        self.assertEqual(sent[0]['status'], 200)
+        content = b''.join(
+            message.get('body', b'') for message in sent[1:]
+        ).decode()
+        self.assertIn(f'id: {event_id}\nevent: comment\n', content)
+        self.assertNotIn('"post": 1', content)
+        self.assertIn(': keep-alive', content)
+        sent = asyncio.run(call_asgi(asgi.event_stream, {
+            'type': 'http', 'method': 'GET', 'path': '/events/',
+            'query_string': b'after=x',
+        }, [{'type': 'http.request'}]))
+        self.assertEqual(sent[0]['status'], 400)
@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import FeedItem, Follow, Post
+
+User = get_user_model()
+
+
+class FeedItemTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Старый пост')
+
+    def feed_posts(self):
+        return list(
+            FeedItem.objects.filter(user=FeedItemTests.reader)
+            .values_list('post_id', flat=True)
+        )
+
+    def test_follow_adds_existing_posts(self):
+        """Подписка добавляет в ленту уже опубликованные посты автора."""
+        Follow.objects.create(
+            user=FeedItemTests.reader,
+            author=FeedItemTests.author
+        )
+        self.assertEqual(self.feed_posts(), [FeedItemTests.post.pk])
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков."""
+        Follow.objects.create(
+            user=FeedItemTests.reader,
+            author=FeedItemTests.author
+        )
+        post = Post.objects.create(
+            author=FeedItemTests.author,
+            text='Новый пост'
+        )
+        self.assertEqual(
+            self.feed_posts(),
+            [post.pk, FeedItemTests.post.pk]
+        )
+
+    def test_unfollow_removes_posts(self):
+        """Отписка убирает посты автора из ленты."""
+        follow = Follow.objects.create(
+            user=FeedItemTests.reader,
+            author=FeedItemTests.author
+        )
+        follow.delete()
+        self.assertEqual(self.feed_posts(), [])
+
+    def test_backfill_command_rebuilds_feed(self):
+        """Команда backfill_feed восстанавливает ленты по подпискам."""
+        Follow.objects.create(
+            user=FeedItemTests.reader,
+            author=FeedItemTests.author
+        )
+        FeedItem.objects.all().delete()
+        call_command('backfill_feed', stdout=StringIO())
+        self.assertEqual(self.feed_posts(), [FeedItemTests.post.pk])
@@ -0,0 +1,191 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .. import images
+from ..models import Post, PostImageVariant
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_PIPELINE_ASYNC=False)
+class ImagePipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=SMALL_GIF,
+                content_type='image/gif'
+            )
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_variants_are_generated_in_all_widths_and_formats(self):
+        """Миниатюры создаются во всех ширинах и форматах и сохраняются."""
+        post = ImagePipelineTests.post
+        variants = images.generate_variants(post.pk, post.image.name)
+        formats = [images.BASE_FORMAT] + images.extra_formats()
+        self.assertEqual(
+            len(variants), len(formats) * len(images.VARIANT_WIDTHS)
+        )
+        stored = PostImageVariant.objects.filter(post=post)
+        self.assertEqual(stored.count(), len(variants))
+        for variant in stored:
+            self.assertTrue(default_storage.exists(variant.name))
+            self.assertIn(variant.width, images.VARIANT_WIDTHS)
+            self.assertEqual(
+                f'{variant.width}x{variant.height}',
+                images.variant_geometry(variant.width)
+            )
+            self.assertGreater(variant.size, 0)
+
+    def test_variants_are_replaced_on_regeneration(self):
+        """Повторная подготовка не плодит записи о миниатюрах."""
+        post = ImagePipelineTests.post
+        first = images.generate_variants(post.pk, post.image.name)
+        images.generate_variants(post.pk, post.image.name)
+        self.assertEqual(
+            PostImageVariant.objects.filter(post=post).count(), len(first)
+        )
+
+    def test_outdated_image_is_not_stored(self):
+        """Миниатюры заменённой картинки не сохраняются."""
+        post = ImagePipelineTests.post
+        self.assertEqual(
+            images.generate_variants(post.pk, 'posts/other.gif'), []
+        )
+        self.assertFalse(PostImageVariant.objects.filter(post=post).exists())
+
+    def test_card_renders_srcset(self):
+        """Карточка поста получает srcset, размеры и ленивую загрузку."""
+        post = ImagePipelineTests.post
+        variants = images.generate_variants(post.pk, post.image.name)
+        with mock.patch(
+            'sorl.thumbnail.engines.pil_engine.Engine.get_image',
+            side_effect=AssertionError('Pillow вызван при отрисовке')
+        ):
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+        for variant in variants:
+            self.assertContains(response, f'{variant.url} {variant.width}w')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'width="960" height="339"')
+
+    def test_card_without_variants_falls_back_to_thumbnail(self):
+        """Без подготовленных миниатюр выводится одна картинка 960x339."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'srcset=')
+        self.assertContains(response, 'width="960"')
+
+    def test_resolver_reads_cached_images_without_queries(self):
+        """Сведения о картинках страницы берутся из кэша без запросов."""
+        post = ImagePipelineTests.post
+        images.generate_variants(post.pk, post.image.name)
+        images.resolve_images([post])
+        self.assertIn('320w', post.image_data['srcset'])
+        fresh = Post.objects.get(pk=post.pk)
+        with self.assertNumQueries(0):
+            images.resolve_images([fresh])
+        self.assertEqual(fresh.image_data, post.image_data)
+
+    def test_fallback_is_cached(self):
+        """Миниатюра sorl для поста без вариантов тоже берётся из кэша."""
+        post = ImagePipelineTests.post
+        images.resolve_images([post])
+        fresh = Post.objects.get(pk=post.pk)
+        with mock.patch.object(images, 'get_thumbnail') as thumbnail, \
+                self.assertNumQueries(0):
+            images.resolve_images([fresh])
+        thumbnail.assert_not_called()
+        self.assertEqual(fresh.image_data, post.image_data)
+
+    def test_resolver_cache_is_dropped_on_regeneration(self):
+        """Повторная подготовка миниатюр сбрасывает сведения в кэше."""
+        post = ImagePipelineTests.post
+        images.generate_variants(post.pk, post.image.name)
+        images.resolve_images([post])
+        key = images.image_cache_key(post.pk, post.image.name)
+        self.assertIsNotNone(cache.get(key))
+        images.generate_variants(post.pk, post.image.name)
+        self.assertIsNone(cache.get(key))
+
+    def test_warm_thumbnails_command(self):
+        """Команда готовит миниатюры и прогревает кэш."""
+        post = ImagePipelineTests.post
+        call_command('warm_thumbnails', workers=1, stdout=StringIO())
+        self.assertTrue(PostImageVariant.objects.filter(post=post).exists())
+        self.assertIsNotNone(
+            cache.get(images.image_cache_key(post.pk, post.image.name))
+        )
+
+    def test_warm_thumbnails_in_threads(self):
+        """Задания уходят в пул потоков пачками."""
+        command = 'posts.management.commands.warm_thumbnails'
+        with mock.patch(f'{command}.BATCH_SIZE', 1), \
+                mock.patch(f'{command}._generate', return_value=3) as job:
+            out = StringIO()
+            call_command('warm_thumbnails', workers=2, stdout=out)
+        post = ImagePipelineTests.post
+        job.assert_called_once_with(post.pk, post.image.name)
+        self.assertIn('Создано миниатюр: 3', out.getvalue())
+
+    def test_missing_image_is_skipped(self):
+        """Отсутствующий файл картинки пропускается без ошибок."""
+        self.assertEqual(
+            images.generate_variants(
+                ImagePipelineTests.post.pk, 'posts/missing.jpg'
+            ),
+            []
+        )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_PIPELINE_ASYNC=True)
+class ImagePipelineAsyncTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_variants_are_ready_after_wait(self):
+        """images.wait() дожидается миниатюр, поставленных в очередь."""
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(
+            author=user,
+            text='Пост',
+            image=SimpleUploadedFile(
+                name='async.gif', content=SMALL_GIF, content_type='image/gif'
+            )
+        )
+        images.wait()
+        self.assertTrue(PostImageVariant.objects.filter(post=post).exists())
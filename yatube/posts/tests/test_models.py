@@ -1,7 +1,8 @@
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import Follow, Group, Post
 
 User = get_user_model()
 
@@ -86,3 +87,25 @@ class PostModelTest(TestCase):
                     post._meta.get_field(field).help_text,
                     expected_value
                 )
+
+
+class FollowModelTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+
+    def test_follow_is_unique(self):
+        """Повторная подписка на автора запрещена на уровне БД."""
+        Follow.objects.create(user=FollowModelTest.user,
+                              author=FollowModelTest.author)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=FollowModelTest.user,
+                                  author=FollowModelTest.author)
+
+    def test_self_follow_is_forbidden(self):
+        """Подписка на самого себя запрещена на уровне БД."""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=FollowModelTest.user,
+                                  author=FollowModelTest.user)
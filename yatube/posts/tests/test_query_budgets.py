@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.queries import QueryAssertionsMixin
+
+from ..models import Comment, Follow, Group, Post
+from ..views import POSTS_ON_PAGE
+
+User = get_user_model()
+
+
+class QueryBudgetTests(QueryAssertionsMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for index in range(POSTS_ON_PAGE + 5):
+            cls.post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Погода {index}'
+            )
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text='Комментарий'
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def urls(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:hot'),
+            reverse('posts:group_list', args=[QueryBudgetTests.group.slug]),
+            reverse('posts:profile', args=[QueryBudgetTests.author]),
+            reverse('posts:post_detail', args=[QueryBudgetTests.post.pk]),
+            reverse('posts:post_comments', args=[QueryBudgetTests.post.pk]),
+            reverse('posts:search') + '?q=погода',
+        )
+
+    def test_anonymous_pages_within_budget(self):
+        """Страницы для гостя укладываются в бюджет запросов без N+1."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                cache.clear()
+                self.assertWithinBudget(url)
+
+    def test_authorized_pages_within_budget(self):
+        """Страницы для пользователя укладываются в бюджет без N+1."""
+        self.client.force_login(QueryBudgetTests.reader)
+        for url in self.urls() + (reverse('posts:follow_index'),):
+            with self.subTest(url=url):
+                cache.clear()
+                self.assertWithinBudget(url)
@@ -0,0 +1,160 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import ranking
+from ..models import Comment, Follow, Post, RankingEpoch
+
+User = get_user_model()
+
+
+class RankingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.old = Post.objects.create(author=RankingTests.author, text='1')
+        self.new = Post.objects.create(author=RankingTests.author, text='2')
+
+    def scores(self):
+        return dict(Post.objects.values_list('pk', 'hot_score'))
+
+    def test_new_post_gets_score(self):
+        """Новый пост сразу получает положительный рейтинг."""
+        self.assertGreater(self.scores()[self.new.pk], 0)
+
+    def test_comment_raises_score(self):
+        """Комментарий повышает рейтинг поста."""
+        before = self.scores()
+        Comment.objects.create(
+            post=self.old, author=RankingTests.reader, text='Комментарий'
+        )
+        after = self.scores()
+        self.assertGreater(after[self.old.pk], before[self.old.pk])
+        self.assertEqual(after[self.new.pk], before[self.new.pk])
+
+    def test_follow_raises_recent_posts(self):
+        """Новый подписчик повышает рейтинг недавних постов автора."""
+        Post.objects.filter(pk=self.old.pk).update(
+            pub_date=timezone.now() - ranking.REACH_WINDOW - timedelta(days=1)
+        )
+        before = self.scores()
+        Follow.objects.create(
+            user=RankingTests.reader, author=RankingTests.author
+        )
+        after = self.scores()
+        self.assertEqual(after[self.old.pk], before[self.old.pk])
+        self.assertGreater(after[self.new.pk], before[self.new.pk])
+
+    def test_unfollow_takes_reach_back(self):
+        """Подписка и отписка не накручивают рейтинг."""
+        before = self.scores()[self.new.pk]
+        for _ in range(5):
+            Follow.objects.create(
+                user=RankingTests.reader, author=RankingTests.author
+            ).delete()
+        self.assertAlmostEqual(self.scores()[self.new.pk], before, places=3)
+
+    def test_older_events_weigh_less(self):
+        """Событие в прошлом весит меньше такого же события сейчас."""
+        now = timezone.now()
+        self.assertLess(
+            ranking.growth(now - timedelta(seconds=ranking.half_life())),
+            ranking.growth(now)
+        )
+        self.assertAlmostEqual(
+            ranking.growth(now - timedelta(seconds=ranking.half_life()))
+            * 2,
+            ranking.growth(now)
+        )
+
+    def test_decay_keeps_order(self):
+        """Перенос эпохи уменьшает рейтинги, не меняя их порядок."""
+        Comment.objects.create(
+            post=self.old, author=RankingTests.reader, text='Комментарий'
+        )
+        order = list(Post.objects.order_by('-hot_score').values_list(
+            'pk', flat=True
+        ))
+        before = self.scores()
+        call_command('decay_scores', stdout=StringIO())
+        after = self.scores()
+        self.assertEqual(order, list(
+            Post.objects.order_by('-hot_score').values_list('pk', flat=True)
+        ))
+        for post_id, score in after.items():
+            self.assertLessEqual(score, before[post_id])
+
+    def test_stale_epoch_is_moved_forward(self):
+        """Без decay_scores эпоха переносится до переполнения множителя."""
+        stale = timezone.now() - timedelta(
+            seconds=ranking.half_life() * (2 * ranking.MAX_EXPONENT + 1)
+        )
+        RankingEpoch.objects.update_or_create(
+            pk=1, defaults={'started': stale}
+        )
+        post = Post.objects.create(author=RankingTests.author, text='3')
+        Comment.objects.create(
+            post=post, author=RankingTests.reader, text='Комментарий'
+        )
+        self.assertGreater(ranking.get_epoch(), stale)
+        scores = self.scores()
+        self.assertGreater(scores[post.pk], 0)
+        self.assertEqual(scores[self.old.pk], 0)
+
+    def test_rebuild(self):
+        """Пересчёт с нуля учитывает комментарии."""
+        Comment.objects.create(
+            post=self.old, author=RankingTests.reader, text='Комментарий'
+        )
+        Post.objects.update(hot_score=0)
+        call_command('decay_scores', rebuild=True, stdout=StringIO())
+        scores = self.scores()
+        self.assertGreater(scores[self.old.pk], scores[self.new.pk])
+
+    def test_epoch_moved_elsewhere_is_seen(self):
+        """Эпоху, перенесённую другим процессом, видно без сброса кэша."""
+        ranking.get_epoch()
+        moved = timezone.now() + timedelta(hours=1)
+        RankingEpoch.objects.filter(pk=1).update(started=moved)
+        self.assertEqual(ranking.get_epoch(), moved)
+
+    def test_rebuild_in_batches(self):
+        """Пересчёт пачками проходит все посты."""
+        Post.objects.update(hot_score=0)
+        with mock.patch.object(ranking, 'REBUILD_BATCH', 1):
+            self.assertEqual(ranking.rebuild(), 2)
+        self.assertTrue(all(score > 0 for score in self.scores().values()))
+
+    def test_hot_page_orders_by_score(self):
+        """Страница «Популярное» выводит посты по рейтингу."""
+        Comment.objects.create(
+            post=self.old, author=RankingTests.reader, text='Комментарий'
+        )
+        response = self.client.get(reverse('posts:hot'))
+        self.assertTemplateUsed(response, 'posts/index.html')
+        self.assertEqual(
+            list(response.context['page_obj']), [self.old, self.new]
+        )
+
+    def test_hot_pages_are_numbered(self):
+        """Рейтинг меняется между страницами, поэтому они номерные."""
+        Post.objects.bulk_create(
+            Post(author=RankingTests.author, text=str(number))
+            for number in range(10)
+        )
+        response = self.client.get(reverse('posts:hot'), {'page': 2})
+        self.assertEqual(response.context['page_obj'].number, 2)
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertContains(response, '?page=1')
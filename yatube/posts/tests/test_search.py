@@ -0,0 +1,149 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Post
+from ..stemmer import stem
+
+User = get_user_model()
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_share_stem(self):
+        """Формы одного слова приводятся к одной основе."""
+        forms = {
+            'книг': ('книга', 'книги', 'книгой', 'книгам', 'Книгах'),
+            'красив': ('красивый', 'красивейшая', 'красивого'),
+            'ежик': ('ёжик', 'ежики', 'ёжиками'),
+        }
+        for expected, words in forms.items():
+            for word in words:
+                with self.subTest(word=word):
+                    self.assertEqual(stem(word), expected)
+
+    def test_other_words_are_lowercased(self):
+        """Слова не на русском только приводятся к нижнему регистру."""
+        self.assertEqual(stem('Django'), 'django')
+        self.assertEqual(stem('2022'), '2022')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Прочитал интересную книгу о путешествиях'
+        )
+        cls.other = Post.objects.create(
+            author=cls.user,
+            text='Фотографии с прогулки по набережной'
+        )
+
+    def found(self, query):
+        return list(search.search(Post.objects.all(), query))
+
+    def test_search_uses_stems(self):
+        """Запрос находит другие формы слов."""
+        self.assertEqual(self.found('книги'), [SearchTests.post])
+        self.assertEqual(self.found('путешествие книга'), [SearchTests.post])
+        self.assertEqual(self.found('книга набережная'), [])
+
+    def test_empty_query_finds_nothing(self):
+        """Запрос без слов ничего не находит."""
+        self.assertEqual(self.found(' ?! '), [])
+
+    def test_index_follows_post_changes(self):
+        """Правка и удаление поста обновляют индекс."""
+        post = SearchTests.other
+        post.text = 'Рецепт пирога с яблоками'
+        post.save()
+        self.assertEqual(self.found('пироги'), [post])
+        self.assertEqual(self.found('набережная'), [])
+        post.delete()
+        self.assertEqual(self.found('пироги'), [])
+
+    def test_comments_are_indexed(self):
+        """Пост находится по словам из комментариев."""
+        comment = Comment.objects.create(
+            post=SearchTests.other,
+            author=SearchTests.user,
+            text='Какие чудесные закаты'
+        )
+        self.assertEqual(self.found('закат'), [SearchTests.other])
+        self.assertEqual(
+            self.found('закаты прогулка'), [SearchTests.other]
+        )
+        comment.delete()
+        self.assertEqual(self.found('закат'), [])
+
+    def test_comment_indexing_does_not_reread_thread(self):
+        """Запись комментария не перечитывает остальные комментарии."""
+        for index in range(3):
+            Comment.objects.create(
+                post=SearchTests.post, author=SearchTests.user,
+                text=f'Комментарий {index}'
+            )
+        comment = Comment(
+            post=SearchTests.post, author=SearchTests.user, text='Чудесно'
+        )
+        with CaptureQueriesContext(connection) as captured:
+            comment.save()
+        self.assertFalse(any(
+            'FROM "posts_comment"' in query['sql']
+            for query in captured
+        ))
+        self.assertEqual(self.found('чудесно книга'), [SearchTests.post])
+
+    def test_reindex_command(self):
+        """Команда пересобирает индекс целиком."""
+        search.get_backend().clear()
+        self.assertEqual(self.found('книга'), [])
+        call_command('reindex_search', stdout=StringIO())
+        self.assertEqual(self.found('книга'), [SearchTests.post])
+
+    @override_settings(POSTS_SEARCH_BACKEND='posts.search.ScanBackend')
+    def test_scan_backend(self):
+        """Запасной бэкенд ищет по основам без индекса."""
+        self.assertEqual(self.found('книгу путешествий'), [SearchTests.post])
+
+
+class SearchViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Заметка о погоде {index}')
+            for index in range(12)
+        )
+        search.reindex_all()
+
+    def test_search_page_is_paginated_by_cursor(self):
+        """Результаты выводятся курсорными страницами с запросом в ссылках."""
+        response = self.client.get(reverse('posts:search'), {'q': 'погода'})
+        self.assertTemplateUsed(response, 'posts/search.html')
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 10)
+        self.assertContains(
+            response, f'?q=%D0%BF%D0%BE%D0%B3%D0%BE%D0%B4%D0%B0&amp;cursor='
+            f'{page_obj.next_cursor}'
+        )
+        response = self.client.get(
+            reverse('posts:search'),
+            {'q': 'погода', 'cursor': page_obj.next_cursor}
+        )
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_search_page_without_query(self):
+        """Без запроса выводится только форма поиска."""
+        response = self.client.get(reverse('posts:search'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['page_obj'])
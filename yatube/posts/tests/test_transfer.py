@@ -0,0 +1,148 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import search
+from ..counters import get_stats
+from ..models import Comment, FeedItem, Follow, Group, Post
+
+User = get_user_model()
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        author = User.objects.create_user(
+            username='author', first_name='Лев', password='secret'
+        )
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.post = Post.objects.create(
+            author=author, group=group, text='Пост о путешествиях'
+        )
+        self.pub_date = timezone.now() - timedelta(days=30)
+        Post.objects.filter(pk=self.post.pk).update(pub_date=self.pub_date)
+        Post.objects.create(author=reader, text='Пост без группы')
+        Comment.objects.create(post=self.post, author=reader, text='Спасибо')
+        Follow.objects.create(user=reader, author=author)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def clear(self):
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+    def assert_restored(self):
+        author = User.objects.get(username='author')
+        reader = User.objects.get(username='reader')
+        self.assertEqual(author.first_name, 'Лев')
+        self.assertFalse(author.has_usable_password())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.author, author)
+        self.assertEqual(post.group.slug, 'group')
+        self.assertEqual(post.pub_date, self.pub_date)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(
+            list(post.comments.values_list('author', 'text')),
+            [(reader.pk, 'Спасибо')]
+        )
+        self.assertTrue(
+            Follow.objects.filter(user=reader, author=author).exists()
+        )
+        self.assertEqual(get_stats(author).followers_count, 1)
+        self.assertEqual(post.comments_count, 1)
+        self.assertTrue(
+            FeedItem.objects.filter(user=reader, post=post).exists()
+        )
+        self.assertEqual(
+            list(search.search(Post.objects.all(), 'путешествие')), [post]
+        )
+
+    def test_jsonl_round_trip(self):
+        """Выгрузка в JSON Lines загружается обратно без потерь."""
+        path = os.path.join(self.directory, 'dump.jsonl')
+        call_command('export_posts', path, stderr=StringIO())
+        with open(path, encoding='utf-8') as stream:
+            types = [json.loads(line)['type'] for line in stream]
+        self.assertEqual(
+            types,
+            ['user', 'user', 'group', 'post', 'post', 'comment', 'follow']
+        )
+        self.clear()
+        call_command(
+            'import_posts', path, batch_size=1, keep_ids=True,
+            stdout=StringIO()
+        )
+        self.assert_restored()
+
+    def test_csv_round_trip(self):
+        """Выгрузка в CSV загружается обратно без потерь."""
+        call_command(
+            'export_posts', self.directory, format='csv', stderr=StringIO()
+        )
+        self.clear()
+        call_command(
+            'import_posts', self.directory, keep_ids=True, stdout=StringIO()
+        )
+        self.assert_restored()
+
+    def test_import_is_repeatable(self):
+        """Повторная загрузка не создаёт дубликатов."""
+        path = os.path.join(self.directory, 'dump.jsonl')
+        call_command('export_posts', path, stderr=StringIO())
+        call_command('import_posts', path, keep_ids=True, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_import_into_filled_database_remaps_ids(self):
+        """Без --keep-ids посты получают новые id, комментарии — к ним."""
+        path = os.path.join(self.directory, 'dump.jsonl')
+        call_command('export_posts', path, stderr=StringIO())
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 4)
+        copy = Post.objects.exclude(pk=self.post.pk).get(
+            text=self.post.text
+        )
+        self.assertEqual(copy.pub_date, self.pub_date)
+        self.assertEqual(
+            list(copy.comments.values_list('text', flat=True)), ['Спасибо']
+        )
+        self.assertEqual(self.post.comments.count(), 1)
+
+    def test_conflicting_ids_stop_import(self):
+        """С --keep-ids чужой пост с тем же id прерывает загрузку."""
+        path = os.path.join(self.directory, 'dump.jsonl')
+        call_command('export_posts', path, stderr=StringIO())
+        Post.objects.filter(pk=self.post.pk).update(
+            author=User.objects.get(username='reader')
+        )
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_posts', path, keep_ids=True, stdout=StringIO()
+            )
+
+    def test_unknown_author_stops_import(self):
+        """Пост с неизвестным автором прерывает загрузку."""
+        path = os.path.join(self.directory, 'bad.jsonl')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(json.dumps({
+                'type': 'post', 'id': 100, 'author': 'nobody', 'group': None,
+                'text': 'Текст', 'pub_date': timezone.now().isoformat(),
+                'image': '',
+            }))
+        with self.assertRaises(CommandError):
+            call_command('import_posts', path, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(pk=100).exists())
@@ -4,7 +4,9 @@ import tempfile
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.cache import cache
 
@@ -381,3 +383,57 @@ class PostPagesTests(TestCase):
         )
         follow_posts_count = len(response.context['page_obj'])
         self.assertIs(follow_posts_count, 1)
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Тестовый пост {i}')
+            for i in range(POSTS_ON_PAGE * 2 + POSTS_ON_LAST_PAGE)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cursor_pages_cover_all_posts_in_order(self):
+        """Переход по курсорам выдаёт все посты по порядку без повторов."""
+        expected = list(Post.objects.order_by('-pub_date', '-pk'))
+        received = []
+        url = reverse('posts:index')
+        while url:
+            response = self.client.get(url)
+            page_obj = response.context['page_obj']
+            received.extend(page_obj.object_list)
+            url = (
+                reverse('posts:index') + f'?cursor={page_obj.next_cursor}'
+                if page_obj.next_cursor else None
+            )
+        self.assertEqual(received, expected)
+
+    def test_previous_cursor_returns_previous_page(self):
+        """Курсор назад возвращает предыдущую страницу."""
+        first = self.client.get(reverse('posts:index')).context['page_obj']
+        self.assertIsNone(first.previous_cursor)
+        second = self.client.get(
+            reverse('posts:index') + f'?cursor={first.next_cursor}'
+        ).context['page_obj']
+        back = self.client.get(
+            reverse('posts:index') + f'?cursor={second.previous_cursor}'
+        ).context['page_obj']
+        self.assertEqual(list(back.object_list), list(first.object_list))
+
+    def test_cursor_page_does_not_count(self):
+        """Курсорная страница не выполняет COUNT(*)."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index') + '?cursor=')
+        self.assertFalse(
+            [q for q in queries if 'COUNT(' in q['sql'].upper()]
+        )
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Испорченный курсор даёт первую страницу."""
+        response = self.client.get(reverse('posts:index') + '?cursor=xyz')
+        self.assertEqual(len(response.context['page_obj']), POSTS_ON_PAGE)
@@ -0,0 +1,333 @@
+"""Потоковые выгрузка и загрузка постов, комментариев и подписок.
+
+Данные передаются записями вида (тип, словарь) в порядке зависимостей:
+пользователи, группы, посты, комментарии, подписки. Пользователи и
+группы ссылаются друг на друга по username и slug, комментарии — на
+посты по id. Пароли и адреса почты не выгружаются: загруженные
+пользователи получают непригодный пароль.
+
+По умолчанию посты и комментарии получают новые id от базы, а ссылки
+комментариев переводятся по соответствию старых id постов новым, так
+что загрузка в непустую базу ничего не перепутает. С keep_ids=True id
+сохраняются: строка с тем же id и тем же автором считается уже
+загруженной (повторная загрузка файла ничего не дублирует), а с другим
+автором прерывает загрузку.
+
+Выгрузка читает таблицы через iterator(chunk_size=...), загрузка пишет
+пачками bulk_create, каждая пачка — в своей транзакции, поэтому память
+растёт только на соответствие id постов.
+"""
+import csv
+import json
+import os
+from itertools import groupby, islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Group, Post, User
+
+CHUNK_SIZE = 1000
+FIELDS = {
+    'user': ('username', 'first_name', 'last_name'),
+    'group': ('title', 'slug', 'description'),
+    'post': ('id', 'author', 'group', 'text', 'pub_date', 'image'),
+    'comment': ('id', 'post', 'author', 'text', 'created'),
+    'follow': ('user', 'author'),
+}
+
+
+OWNER_FIELDS = {
+    Post: ('author_id',),
+    Comment: ('post_id', 'author_id'),
+}
+
+
+class TransferError(ValueError):
+    """Запись ссылается на отсутствующие данные или имеет неверный тип."""
+
+
+def _export_querysets():
+    return {
+        'user': User.objects.order_by('pk').values_list(*FIELDS['user']),
+        'group': Group.objects.order_by('pk').values_list(*FIELDS['group']),
+        'post': Post.objects.order_by('pk').values_list(
+            'pk', 'author__username', 'group__slug', 'text', 'pub_date',
+            'image'
+        ),
+        'comment': Comment.objects.order_by('pk').values_list(
+            'pk', 'post_id', 'author__username', 'text', 'created'
+        ),
+        'follow': Follow.objects.order_by('pk').values_list(
+            'user__username', 'author__username'
+        ),
+    }
+
+
+def export_records(chunk_size=CHUNK_SIZE):
+    """Все данные записями (тип, словарь) в порядке зависимостей."""
+    for record_type, queryset in _export_querysets().items():
+        for row in queryset.iterator(chunk_size=chunk_size):
+            record = dict(zip(FIELDS[record_type], row))
+            for field in ('pub_date', 'created'):
+                if field in record:
+                    record[field] = record[field].isoformat()
+            yield record_type, record
+
+
+def write_jsonl(records, stream):
+    total = 0
+    for record_type, record in records:
+        stream.write(json.dumps(
+            {'type': record_type, **record}, ensure_ascii=False
+        ))
+        stream.write('\n')
+        total += 1
+    return total
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if line.strip():
+            record = json.loads(line)
+            yield record.pop('type', None), record
+
+
+def write_csv(records, directory):
+    """Пишет по файлу <тип>.csv на каждый тип записей."""
+    os.makedirs(directory, exist_ok=True)
+    total = 0
+    for record_type, group in groupby(records, key=lambda item: item[0]):
+        path = os.path.join(directory, f'{record_type}.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as stream:
+            writer = csv.DictWriter(stream, fieldnames=FIELDS[record_type])
+            writer.writeheader()
+            for _, record in group:
+                writer.writerow(record)
+                total += 1
+    return total
+
+
+def read_csv(directory):
+    for record_type in FIELDS:
+        path = os.path.join(directory, f'{record_type}.csv')
+        if not os.path.exists(path):
+            continue
+        with open(path, newline='', encoding='utf-8') as stream:
+            for record in csv.DictReader(stream):
+                # В CSV нет null: пустая строка означает отсутствие значения.
+                yield record_type, {
+                    key: value if value != '' else None
+                    for key, value in record.items()
+                }
+
+
+def _ids(model, field, values):
+    values = {value for value in values if value}
+    return dict(
+        model.objects.filter(**{f'{field}__in': values})
+        .values_list(field, 'pk')
+    )
+
+
+def _lookup(ids, value, what):
+    try:
+        return ids[value]
+    except KeyError:
+        raise TransferError(f'Не найден {what}: {value!r}')
+
+
+def _import_users(batch, state):
+    password = make_password(None)
+    User.objects.bulk_create(
+        (
+            User(
+                username=record['username'],
+                first_name=record.get('first_name') or '',
+                last_name=record.get('last_name') or '',
+                password=password,
+            )
+            for record in batch
+        ),
+        ignore_conflicts=True
+    )
+
+
+def _import_groups(batch, state):
+    Group.objects.bulk_create(
+        (
+            Group(
+                title=record['title'],
+                slug=record['slug'],
+                description=record.get('description') or '',
+            )
+            for record in batch
+        ),
+        ignore_conflicts=True
+    )
+
+
+def _new_rows(model, batch, state, owner):
+    """Записи пачки, которые нужно вставить, и их id в базе.
+
+    owner(record) — значения, по которым строка с тем же id считается
+    той же самой; сравниваются с полями OWNER_FIELDS[model].
+    """
+    if not state['keep_ids']:
+        return [(None, record) for record in batch]
+    ids = [int(record['id']) for record in batch]
+    existing = {
+        row[0]: row[1:]
+        for row in model.objects.filter(pk__in=ids).values_list(
+            'pk', *OWNER_FIELDS[model]
+        )
+    }
+    rows = []
+    for record_id, record in zip(ids, batch):
+        if record_id not in existing:
+            rows.append((record_id, record))
+        elif existing[record_id] != owner(record):
+            raise TransferError(
+                f'{model._meta.verbose_name} с id {record_id} уже есть '
+                f'в базе и отличается от загружаемого'
+            )
+    return rows
+
+
+def _assign_ids(model, objects):
+    """Id для вставки на базах, где bulk_create не возвращает id.
+
+    Это SQLite и MySQL: их счётчик сам догоняет явно вставленные id, а
+    пересечение с параллельной вставкой даёт IntegrityError, а не порчу.
+    """
+    first = (model.objects.aggregate(Max('pk'))['pk__max'] or 0) + 1
+    for index, obj in enumerate(objects):
+        obj.pk = first + index
+
+
+def _insert(model, objects, date_field):
+    """bulk_create с датами из файла: auto_now_add при вставке
+    перезаписывает их, поэтому даты возвращаются отдельным UPDATE.
+
+    Объекты без id получают id от базы.
+    """
+    if objects and objects[0].pk is None and (
+            not connection.features.can_return_ids_from_bulk_insert):
+        _assign_ids(model, objects)
+    dates = [getattr(obj, date_field) for obj in objects]
+    model.objects.bulk_create(objects)
+    for obj, date in zip(objects, dates):
+        setattr(obj, date_field, date)
+    model.objects.bulk_update(objects, [date_field])
+
+
+def _import_posts(batch, state):
+    authors = _ids(User, 'username', (record['author'] for record in batch))
+    groups = _ids(Group, 'slug', (record.get('group') for record in batch))
+
+    def author_id(record):
+        return _lookup(authors, record['author'], 'автор')
+
+    rows = _new_rows(
+        Post, batch, state, lambda record: (author_id(record),)
+    )
+    posts = [
+        Post(
+            pk=post_id,
+            author_id=author_id(record),
+            group_id=(
+                _lookup(groups, record['group'], 'группа')
+                if record.get('group') else None
+            ),
+            text=record['text'],
+            pub_date=parse_datetime(record['pub_date']),
+            image=record.get('image') or '',
+        )
+        for post_id, record in rows
+    ]
+    _insert(Post, posts, 'pub_date')
+    if not state['keep_ids']:
+        state['posts'].update(
+            (int(record['id']), post.pk)
+            for (_, record), post in zip(rows, posts)
+        )
+
+
+def _import_comments(batch, state):
+    authors = _ids(User, 'username', (record['author'] for record in batch))
+
+    def post_id(record):
+        if state['keep_ids']:
+            return int(record['post'])
+        return _lookup(state['posts'], int(record['post']), 'пост')
+
+    def owner(record):
+        return post_id(record), _lookup(authors, record['author'], 'автор')
+
+    rows = _new_rows(Comment, batch, state, owner)
+    _insert(Comment, [
+        Comment(
+            pk=comment_id,
+            post_id=post_id(record),
+            author_id=_lookup(authors, record['author'], 'автор'),
+            text=record['text'],
+            created=parse_datetime(record['created']),
+        )
+        for comment_id, record in rows
+    ], 'created')
+
+
+def _import_follows(batch, state):
+    names = set()
+    for record in batch:
+        names.update((record['user'], record['author']))
+    users = _ids(User, 'username', names)
+    Follow.objects.bulk_create(
+        (
+            Follow(
+                user_id=_lookup(users, record['user'], 'пользователь'),
+                author_id=_lookup(users, record['author'], 'автор'),
+            )
+            for record in batch if record['user'] != record['author']
+        ),
+        ignore_conflicts=True
+    )
+
+
+IMPORTERS = {
+    'user': _import_users,
+    'group': _import_groups,
+    'post': _import_posts,
+    'comment': _import_comments,
+    'follow': _import_follows,
+}
+
+
+def _batches(records, batch_size):
+    """Пачки подряд идущих записей одного типа."""
+    for record_type, group in groupby(records, key=lambda item: item[0]):
+        if record_type not in IMPORTERS:
+            raise TransferError(f'Неизвестный тип записи: {record_type!r}')
+        group = (record for _, record in group)
+        while True:
+            batch = list(islice(group, batch_size))
+            if not batch:
+                break
+            yield record_type, batch
+
+
+def import_records(records, batch_size=CHUNK_SIZE, keep_ids=False):
+    """Загружает записи пачками; возвращает число записей по типам.
+
+    Сигналы моделей при bulk_create не срабатывают: счётчики, ленты,
+    поисковый индекс и рейтинги нужно пересчитать после загрузки.
+    """
+    counts = dict.fromkeys(FIELDS, 0)
+    state = {'keep_ids': keep_ids, 'posts': {}}
+    for record_type, batch in _batches(records, batch_size):
+        with transaction.atomic():
+            IMPORTERS[record_type](batch, state)
+        counts[record_type] += len(batch)
+    return counts
@@ -7,9 +7,23 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('hot/', views.hot, name='hot'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
+    path(
+        'posts/<int:post_id>/comments/all/',
+        views.post_comments_stream,
+        name='post_comments_stream'
+    ),
+    path('search/', views.search_posts, name='search'),
+    path('events/', views.event_stream, name='events'),
+    path('events/poll/', views.event_poll, name='events_poll'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
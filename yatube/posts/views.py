@@ -1,36 +1,108 @@
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import (Http404, HttpResponseBadRequest, JsonResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.http import urlencode
 
-from .models import Post, Group, Follow, User
+from core.paginator import CursorPaginator, paginate
+from core.queries import query_budget
+
+from . import cache_keys, events, images, search
+from .authors import get_author_or_404
+from .counters import get_stats
+from .decorators import cache_anonymous_page
+from .models import Comment, FeedItem, Follow, Group, Post, User
 from .forms import PostForm, CommentForm
 
 POSTS_ON_PAGE = 10
-CACHING_TIME = 20
+COMMENTS_ON_PAGE = 20
+
+
+def _index_scopes(request):
+    return [cache_keys.ALL_POSTS]
+
+
+def _group_scopes(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    return [cache_keys.group(group_id or slug)]
+
+
+def _profile_scopes(request, username):
+    return [cache_keys.author(get_author_or_404(username).pk)]
 
 
+def _post_scopes(request, post_id):
+    author_id, group_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id'
+    ).first() or (0, None)
+    return [
+        cache_keys.post(post_id),
+        cache_keys.author(author_id),
+        cache_keys.group(group_id),
+    ]
+
+
+def _with_images(page_obj):
+    """Сведения о картинках всей страницы одним обращением к кэшу."""
+    page_obj.object_list = images.resolve_images(page_obj.object_list)
+    return page_obj
+
+
+@query_budget(4)
+@cache_anonymous_page(_index_scopes)
 def index(request: any) -> render:
     """Главная страница учебного проекта."""
     template_name = 'posts/index.html'
     posts = Post.objects.select_related('author', 'group').all()
-    paginator = Paginator(posts, POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = _with_images(paginate(request, posts, POSTS_ON_PAGE))
+    context = {
+        'page_obj': page_obj,
+        'cache_version': cache_keys.cache_version(cache_keys.ALL_POSTS),
+    }
+    return render(request, template_name, context)
+
+
+def _hot_scopes(request):
+    return [cache_keys.HOT, cache_keys.ALL_POSTS]
+
+
+@query_budget(4)
+@cache_anonymous_page(_hot_scopes)
+def hot(request):
+    """Популярные посты: рейтинг по комментариям и охвату с затуханием.
+
+    Рейтинг меняется с каждым комментарием и подпиской, поэтому курсор по
+    нему пропускал бы и повторял посты; страницы здесь номерные.
+    """
+    template_name = 'posts/index.html'
+    posts = Post.objects.select_related('author', 'group').order_by(
+        '-hot_score', '-pk'
+    )
+    page_obj = _with_images(
+        Paginator(posts, POSTS_ON_PAGE).get_page(request.GET.get('page'))
+    )
     context = {
         'page_obj': page_obj,
+        'cache_version': cache_keys.cache_version(
+            cache_keys.HOT, cache_keys.ALL_POSTS
+        ),
+        'hot': True,
     }
     return render(request, template_name, context)
 
 
+@query_budget(5)
+@cache_anonymous_page(_group_scopes)
 def group_posts(request: any, slug: any) -> render:
     """Страница отображающая сообщения группы переданной в параметрах."""
     template_name = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts_in_group.select_related('author', 'group').all()
-    paginator = Paginator(posts, POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = _with_images(paginate(request, posts, POSTS_ON_PAGE))
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -38,19 +110,22 @@ def group_posts(request: any, slug: any) -> render:
     return render(request, template_name, context)
 
 
+@query_budget(6)
+@cache_anonymous_page(_profile_scopes)
 def profile(request, username):
     """Страница отображающая профиль автора."""
     template_name = 'posts/profile.html'
-    author = get_object_or_404(User, username__contains=username)
+    author = get_author_or_404(
+        username,
+        User.objects.select_related('stats')
+    )
     posts = author.posts.select_related('author', 'group').all()
     if request.user.is_authenticated:
         following = Follow.objects.filter(user=request.user, author=author)
     else:
         following = False
-    count = author.posts.all().count()
-    paginator = Paginator(posts, POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    count = get_stats(author).posts_count
+    page_obj = _with_images(paginate(request, posts, POSTS_ON_PAGE))
     context = {
         'author': author,
         'page_obj': page_obj,
@@ -60,12 +135,18 @@ def profile(request, username):
     return render(request, template_name, context)
 
 
+@query_budget(5)
+@cache_anonymous_page(_post_scopes)
 def post_detail(request, post_id):
     """Страница отображающая с деталями сообщения."""
     template_name = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.select_related('author', 'post').all()
-    count = Post.objects.filter(author__username__contains=post.author).count()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        pk=post_id
+    )
+    images.resolve_images([post])
+    comments = _comments_page(post.pk, request.GET.get('comments_cursor'))
+    count = get_stats(post.author).posts_count
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
@@ -76,6 +157,77 @@ def post_detail(request, post_id):
     return render(request, template_name, context)
 
 
+def _comments_paginator(post_id):
+    return CursorPaginator(
+        Comment.objects.select_related('author').filter(post_id=post_id),
+        COMMENTS_ON_PAGE, key='created'
+    )
+
+
+def _comments_page(post_id, cursor=None):
+    """Страница комментариев поста, новые первыми."""
+    page = _comments_paginator(post_id).get_cursor_page(cursor)
+    page.post_id = post_id
+    return page
+
+
+@query_budget(4)
+@cache_anonymous_page(_post_scopes)
+def post_comments(request, post_id):
+    """Фрагмент со следующей страницей комментариев к посту."""
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404('Пост не найден.')
+    context = {
+        'comments': _comments_page(post_id, request.GET.get('cursor')),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def _stream_comments(post_id):
+    template = get_template('posts/includes/comment.html')
+    paginator = _comments_paginator(post_id)
+    cursor = None
+    while True:
+        page = paginator.get_cursor_page(cursor)
+        yield ''.join(
+            template.render({'comment': comment}) for comment in page
+        )
+        cursor = page.next_cursor
+        if cursor is None:
+            return
+
+
+def post_comments_stream(request, post_id):
+    """Все комментарии к посту потоком, по странице за запрос к базе.
+
+    Память на запрос ограничена одной страницей комментариев.
+    """
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404('Пост не найден.')
+    return StreamingHttpResponse(
+        _stream_comments(post_id), content_type='text/html; charset=utf-8'
+    )
+
+
+@query_budget(4)
+def search_posts(request):
+    """Поиск по текстам постов и комментариев."""
+    template_name = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        posts = search.search(
+            Post.objects.select_related('author', 'group'), query
+        )
+        page_obj = _with_images(paginate(request, posts, POSTS_ON_PAGE))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_params': urlencode({'q': query}) + '&',
+    }
+    return render(request, template_name, context)
+
+
 @login_required
 def post_create(request):
     """Страница для создания нового поста."""
@@ -138,21 +290,26 @@ def add_comment(request, post_id):
     return redirect(template_name, post_id=post_id)
 
 
+@query_budget(4)
 @login_required
 def follow_index(request):
     # информация о текущем пользователе доступна в переменной request.user
     """Главная страница учебного проекта."""
     template_name = 'posts/index.html'
-    follow = (Follow.objects.select_related('author')
-              .filter(user__exact=request.user))
-    follow_list = [obj.author for obj in follow]
-    posts = (Post.objects.select_related('author', 'group')
-             .filter(author__in=follow_list))
-    paginator = Paginator(posts, POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    items = (FeedItem.objects.select_related('post__author', 'post__group')
+             .filter(user=request.user))
+    page_obj = paginate(request, items, POSTS_ON_PAGE)
+    page_obj.object_list = images.resolve_images(
+        item.post for item in page_obj.object_list
+    )
+    # Правка поста повышает только поколение поста, а не лент подписчиков.
     context = {
         'page_obj': page_obj,
+        'cache_version': cache_keys.cache_version(
+            cache_keys.feed(request.user.pk),
+            *(cache_keys.post(post.pk) for post in page_obj.object_list)
+        ),
+        'feed_owner': request.user.pk,
     }
     return render(request, template_name, context)
 
@@ -161,23 +318,58 @@ def follow_index(request):
 def profile_follow(request, username):
     # Подписаться на автора
     template_name = 'posts:profile'
-    cache.clear()
-    author = get_object_or_404(User, username__contains=username)
-    count_follow = Follow.objects.filter(
-        author=author,
-        user=request.user
-    ).count()
-    if author.pk != request.user.pk and count_follow == 0:
-        Follow.objects.create(user=request.user, author=author)
+    author = get_author_or_404(username)
+    if author.pk != request.user.pk:
+        Follow.objects.get_or_create(user=request.user, author=author)
     return redirect(template_name, author)
 
 
 @login_required
 def profile_unfollow(request, username):
     # Дизлайк, отписка
-    cache.clear()
     template_name = 'posts:profile'
-    author = get_object_or_404(User, username__contains=username)
+    author = get_author_or_404(username)
     unfollow = Follow.objects.filter(user=request.user, author=author)
     unfollow.delete()
     return redirect(template_name, author)
+
+
+def _event_params(request):
+    """Пост из ?post= и номер последнего полученного события."""
+    post_id = request.GET.get('post')
+    after = request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get(
+        'after'
+    )
+    post_id = int(post_id) if post_id else None
+    after = int(after) if after else None
+    return post_id, after
+
+
+def event_stream(request):
+    """Поток Server-Sent Events о новых постах и комментариях к ?post=."""
+    try:
+        post_id, after = _event_params(request)
+    except ValueError:
+        return HttpResponseBadRequest()
+    if after is None:
+        after = events.last_id()
+    response = StreamingHttpResponse(
+        events.stream(after, post_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def event_poll(request):
+    """Те же события для клиентов без EventSource: опрос с ?after=."""
+    try:
+        post_id, after = _event_params(request)
+    except ValueError:
+        return HttpResponseBadRequest()
+    if after is None:
+        return JsonResponse({'last': events.last_id(), 'events': []})
+    last, found = events.poll(after, post_id)
+    return JsonResponse({
+        'last': last, 'events': [event for _, event in found],
+    })
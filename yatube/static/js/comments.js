@@ -0,0 +1,13 @@
+// Подгружает следующую страницу комментариев вместо перехода по ссылке.
+document.addEventListener('click', function (event) {
+  var link = event.target.closest('[data-fragment]');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  fetch(link.dataset.fragment)
+    .then(function (response) { return response.text(); })
+    .then(function (html) {
+      link.closest('[data-comments-more]').outerHTML = html;
+    });
+});
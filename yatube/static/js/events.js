@@ -0,0 +1,47 @@
+// Показывает, сколько новых постов или комментариев появилось с момента
+// загрузки страницы. Поток событий открывается, только если страница
+// отдана через ASGI (data-stream); иначе сервер опрашивается раз в 15 секунд.
+(function () {
+  var box = document.querySelector('[data-events]');
+  if (!box) {
+    return;
+  }
+  var count = 0;
+
+  function received(event) {
+    if (event.type !== box.dataset.type) {
+      return;
+    }
+    count += 1;
+    box.querySelector('[data-events-count]').textContent = count;
+    box.classList.remove('d-none');
+  }
+
+  if (box.dataset.stream && window.EventSource) {
+    var source = new EventSource(box.dataset.stream);
+    source.addEventListener(box.dataset.type, function (message) {
+      received(JSON.parse(message.data));
+    });
+    return;
+  }
+
+  var url = box.dataset.poll;
+  var separator = url.indexOf('?') < 0 ? '?' : '&';
+  var last = null;
+
+  function schedule() {
+    setTimeout(poll, 15000);
+  }
+
+  function poll() {
+    fetch(last === null ? url : url + separator + 'after=' + last)
+      .then(function (response) { return response.json(); })
+      .then(function (data) {
+        last = data.last;
+        data.events.forEach(received);
+      })
+      .then(schedule, schedule);
+  }
+
+  poll();
+})();
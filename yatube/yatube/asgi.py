@@ -0,0 +1,27 @@
+"""
+ASGI config for yatube project.
+
+Django 2.2 не поддерживает ASGI, поэтому WSGI-приложение выполняется
+адаптером core.asgi.WsgiToAsgi в пуле из ASGI_THREADS потоков, а поток
+событий /events/ обслуживает собственное приложение posts.asgi.
+
+    uvicorn yatube.asgi:application
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+wsgi_application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from core.asgi import PathRouter, WsgiToAsgi  # noqa: E402
+from posts.asgi import event_stream  # noqa: E402
+
+application = PathRouter(
+    {'/events/': event_stream},
+    WsgiToAsgi(wsgi_application, max_workers=settings.ASGI_THREADS),
+)
@@ -51,12 +51,18 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'benchmarks.apps.BenchmarksConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
     'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.RequestTimingMiddleware',
+    'core.middleware.ProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.QueryInspectorMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -84,6 +90,8 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.cache_ttl.cache_ttl',
+                'core.context_processors.server_push.server_push',
             ],
         },
     },
@@ -153,8 +161,93 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Общий кэш для нескольких процессов:
+# redis://[:password@]host:port/db — Redis или `manage.py cacheserver`,
+# file:///path/to/dir — файловый кэш на одной машине.
+# Без CACHE_URL используется локальный кэш процесса.
+CACHE_URL = os.getenv('CACHE_URL', '')
+
+if CACHE_URL.startswith('redis://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'OPTIONS': {
+                'MAX_CONNECTIONS': int(os.getenv('CACHE_MAX_CONNECTIONS', 50)),
+                'SOCKET_TIMEOUT': 1,
+            },
+        }
+    }
+elif CACHE_URL.startswith('file://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_URL[len('file://'):],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
+
+# События о новых постах и комментариях (SSE и опрос). С общим кэшем
+# события видны всем процессам.
+if CACHE_URL.startswith('redis://'):
+    PUBSUB_BROKER = 'core.pubsub.CacheBroker'
+else:
+    PUBSUB_BROKER = 'core.pubsub.LocalBroker'
+SSE_HEARTBEAT = 15
+SSE_MAX_DURATION = 5 * 60
+
+# Режим ASGI (yatube.asgi): представления выполняются в пуле из
+# ASGI_THREADS потоков, поток событий /events/ опрашивает брокер раз в
+# ASGI_EVENTS_POLL_INTERVAL секунд, не занимая поток.
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 8))
+ASGI_EVENTS_POLL_INTERVAL = 0.5
+
+# Время жизни ключей кэша по семействам, в секундах.
+CACHE_TTL = {
+    'default': 60,
+    'index_page': 20,
+    'page': 300,
+    'image': 60 * 60 * 24,
+    'api_post': 300,
 }
+
+# Поиск автора по имени из URL без учёта регистра
+# (использует функциональный индекс UPPER(username)).
+POSTS_USERNAME_CASE_INSENSITIVE = False
+
+# Подготовка миниатюр картинок постов в фоновом пуле потоков;
+# IMAGE_PIPELINE_ASYNC=0 готовит их сразу при сохранении поста.
+IMAGE_PIPELINE_ASYNC = os.getenv('IMAGE_PIPELINE_ASYNC', '1') == '1'
+IMAGE_PIPELINE_WORKERS = 2
+
+# Поиск N+1 и проверка бюджетов SQL-запросов представлений.
+QUERY_INSPECTOR = DEBUG
+QUERY_INSPECTOR_STRICT = False
+
+# Доля запросов, у которых замеряется время базы, шаблонов и кэша.
+REQUEST_TIMING = True
+REQUEST_TIMING_SAMPLE_RATE = 1 if DEBUG else 0.01
+
+# Метрики для Prometheus на /metrics/. При нескольких процессах
+# (gunicorn --workers) задайте общий каталог METRICS_MULTIPROCESS_DIR.
+METRICS = True
+METRICS_MULTIPROCESS_DIR = os.getenv('METRICS_MULTIPROCESS_DIR')
+METRICS_ALLOWED_IPS = INTERNAL_IPS
+METRICS_MAX_SERIES = 500
+
+# Выборочный профилировщик медленных запросов; стеки для flame graph
+# пишутся в PROFILER_DIR и сводятся командой aggregate_profiles. Для каждого
+# представления хранятся только PROFILER_MAX_FILES последних профилей.
+PROFILER = os.getenv('PROFILER', '') == '1'
+PROFILER_DIR = os.getenv('PROFILER_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILER_THRESHOLD = 1.0
+PROFILER_INTERVAL = 0.005
+PROFILER_MAX_FILES = 100
+
+# Период полураспада рейтинга популярности постов, секунды.
+POSTS_HOT_HALF_LIFE = 12 * 60 * 60